@@ -0,0 +1,129 @@
+# bench_concurrency.py - Many processes writing to one project at the same time
+#
+# Starts N writer processes that add tasks to the same project at once, like cron
+# jobs do while the CLI or the GUI has the project open, and checks afterwards that
+# no task was lost and every writer completed exactly its own tasks.
+#
+# The writers take turns through the three ways of writing:
+#   - journal:  ToDoList(journal=True), one locked journal append per change,
+#               compacting the project every --compact records
+#   - locked:   changes queued under ToDoList.locked(), one lock and one append per batch
+#   - merge:    merge_and_save_to_file() of a small list, like "todo.py import"
+#
+# Run from the project folder:
+#   python benchmarks/bench_concurrency.py
+#   python benchmarks/bench_concurrency.py --writers 8 --rounds 200 --batch 10
+#
+# Exits with status 1 if tasks were lost, duplicated or completed wrongly.
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from todo import ToDoList
+
+KINDS = ["journal", "locked", "merge"]
+
+
+def title(writer, round_number, item):
+    return f"w{writer} r{round_number} t{item}"
+
+
+def write(writer, project, rounds, batch, compact, start):
+    """Add rounds * batch tasks to the project, completing the first task of every round."""
+    kind = KINDS[writer % len(KINDS)]
+    start.wait()
+    if kind == "merge":
+        for round_number in range(rounds):
+            source = ToDoList()
+            source.add_tasks(title(writer, round_number, item) for item in range(batch))
+            source.tasks[0].completed = True
+            source.merge_and_save_to_file(project)
+        return
+
+    todo_list = ToDoList(journal=True, compact_threshold=compact)
+    todo_list.load_from_file(project)
+    for round_number in range(rounds):
+        titles = [title(writer, round_number, item) for item in range(batch)]
+        if kind == "locked":
+            with todo_list.locked():
+                added = todo_list.add_tasks(titles)
+                todo_list.mark_task_completed_by_id(added[0].id)
+        else:
+            added = todo_list.add_tasks(titles)
+            todo_list.mark_task_completed_by_id(added[0].id)
+            # By id: if another writer had taken the id, the wrong task would be completed
+    todo_list.close()
+
+
+def check(project, writers, rounds, batch):
+    """Return a list of problems found in the finished project (empty if everything is there)."""
+    todo_list = ToDoList()
+    todo_list.load_from_file(project)
+    problems = []
+    titles = [task.title for task in todo_list.tasks]
+    expected = {title(w, r, i) for w in range(writers) for r in range(rounds) for i in range(batch)}
+    missing = expected - set(titles)
+    if missing:
+        problems.append(f"{len(missing)} task(s) lost, e.g. {sorted(missing)[:3]}")
+    if len(titles) != len(set(titles)):
+        problems.append(f"{len(titles) - len(set(titles))} task(s) written twice")
+    if len({task.id for task in todo_list.tasks}) != len(todo_list.tasks):
+        problems.append("task ids are not unique")
+    wrong = [task.title for task in todo_list.tasks if task.completed != task.title.endswith(" t0")]
+    if wrong:
+        problems.append(f"{len(wrong)} task(s) with the wrong completed flag, e.g. {wrong[:3]}")
+    return problems
+
+
+def run(writers, rounds, batch, compact):
+    """Run one contest of writers and return (seconds, problems)."""
+    with tempfile.TemporaryDirectory() as folder:
+        project = os.path.join(folder, "Shared.json")
+        ToDoList().save_to_file(project)
+        start = multiprocessing.Event()
+        processes = [multiprocessing.Process(target=write, args=(n, project, rounds, batch, compact, start))
+                     for n in range(writers)]
+        for process in processes:
+            process.start()
+        began = time.perf_counter()
+        start.set()
+        # All writers are started before the clock runs, process start-up is not measured
+        for process in processes:
+            process.join()
+        seconds = time.perf_counter() - began
+        problems = check(project, writers, rounds, batch)
+        if any(process.exitcode for process in processes):
+            problems.append("a writer process failed")
+        return seconds, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check and time concurrent writers of one project.")
+    parser.add_argument("--writers", type=int, default=6, help="writer processes (default 6)")
+    parser.add_argument("--rounds", type=int, default=100, help="writes per writer (default 100)")
+    parser.add_argument("--batch", type=int, default=5, help="tasks added per write (default 5)")
+    parser.add_argument("--compact", type=int, default=200,
+                        help="journal records before a journal writer compacts (default 200)")
+    args = parser.parse_args(argv)
+
+    seconds, problems = run(args.writers, args.rounds, args.batch, args.compact)
+    writes = args.writers * args.rounds
+    tasks = writes * args.batch
+    print(f"{args.writers} writers, {writes} writes, {tasks} tasks in {seconds:.2f} s: "
+          f"{writes / seconds:.0f} writes/s, {tasks / seconds:.0f} tasks/s")
+    for problem in problems:
+        print("PROBLEM:", problem)
+    if problems:
+        return 1
+    print("No task lost")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
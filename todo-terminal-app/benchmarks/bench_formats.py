@@ -0,0 +1,57 @@
+# bench_formats.py - File size and load/save speed of the project file formats
+#
+# Saves the same N tasks once per format (see todo.FORMATS), then loads them back
+# with ToDoList.load_from_file() and reports the file size and throughput.
+#
+# Run from the project folder:
+#   python benchmarks/bench_formats.py
+#   python benchmarks/bench_formats.py 10000 100000
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from todo import ToDoList, FORMATS
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def make_list(size):
+    """Build a list of size tasks with realistic titles, every third one completed."""
+    todo_list = ToDoList()
+    for i in range(size):
+        todo_list.add_task(f"Task number {i}: follow up with the team")
+    for task in todo_list.tasks[::3]:
+        task.completed = True
+    return todo_list
+
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as folder:
+        print(f"{'tasks':>10} {'format':>8} {'size':>10} {'B/task':>8} {'save':>14} {'load':>14}")
+        for size in sizes:
+            todo_list = make_list(size)
+            for name in FORMATS:
+                filename = os.path.join(folder, f"bench_{name}.json")
+                todo_list.file_format = name
+
+                start = time.perf_counter()
+                todo_list.save_to_file(filename)
+                save = time.perf_counter() - start
+
+                loaded = ToDoList()
+                start = time.perf_counter()
+                loaded.load_from_file(filename)
+                load = time.perf_counter() - start
+                assert len(loaded.tasks) == size
+
+                file_size = os.path.getsize(filename)
+                print(f"{size:>10} {name:>8} {file_size / 1e6:>8.1f}MB {file_size / size:>8.1f} "
+                      f"{size / save / 1000:>9.0f}k/s {size / load / 1000:>9.0f}k/s")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,67 @@
+# bench_mapped.py - Opening a huge project with load_mapped() against a full load
+#
+# Saves N tasks in the indexed format, then measures time and memory to
+# show and complete the task in the middle of the project:
+#   - load_from_file(): every task is parsed into a Task object first
+#   - load_mapped(): the file is mapped, only the touched task is decoded
+#
+# Run from the project folder:
+#   python benchmarks/bench_mapped.py
+#   python benchmarks/bench_mapped.py 100000
+
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from todo import ToDoList, FORMAT_INDEXED
+
+SIZES = [100_000, 1_000_000]
+
+
+def measure(open_project, filename, position):
+    """
+    Open the project, show and complete the task at position.
+
+    Returns:
+        tuple: (seconds, bytes allocated while doing it)
+    """
+    gc.collect()
+    # Tasks and their list reference each other, collect the previous run before timing
+    todo_list = ToDoList(fsync_policy="never")
+    tracemalloc.start()
+    start = time.perf_counter()
+    open_project(todo_list, filename)
+    str(todo_list.tasks[position - 1])
+    todo_list.mark_task_completed(position)
+    elapsed = time.perf_counter() - start
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    todo_list.close()
+    return elapsed, used
+
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "bench_mapped.json")
+        print(f"{'tasks':>10} {'full load':>22} {'mapped':>22}")
+        for size in sizes:
+            todo_list = ToDoList(file_format=FORMAT_INDEXED)
+            for i in range(size):
+                todo_list.add_task(f"Task number {i}: follow up with the team")
+            todo_list.save_to_file(filename)
+            del todo_list
+
+            position = size * 3 // 4
+            full = measure(lambda todo, name: todo.load_from_file(name), filename, position)
+            mapped = measure(lambda todo, name: todo.load_mapped(name), filename, position)
+            print(f"{size:>10} " + " ".join(f"{seconds * 1000:>9.1f} ms {used / 1e6:>7.1f} MB"
+                                            for seconds, used in (full, mapped)))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,81 @@
+# bench_memory.py - Memory used by the task representations
+#
+# Compares how much memory N tasks need when every Task has its own __dict__
+# (how Task looked before __slots__) and with the current __slots__ Task.
+# A columnar layout (one list of titles + one bytearray of flags) is measured
+# too, as the lower bound of what the data itself needs.
+#
+# On CPython 3.11 it prints about 164, 116 and 49 bytes per task. (When Task
+# had only id, title and completed, the __slots__ Task needed about 92.)
+#
+# Run from the project folder:
+#   python benchmarks/bench_memory.py
+#   python benchmarks/bench_memory.py 10000 100000
+
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from todo import Task
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+class DictTask:
+    """The Task layout before __slots__: every instance has a __dict__ (with the same fields as Task)."""
+
+    def __init__(self, title, task_id=None):
+        self.id = task_id
+        self.title = title
+        self._completed = False
+        self._owner = None
+        self.priority = None
+        self.due = None
+
+
+def build_objects(task_class, titles):
+    """Build one task object per title."""
+    return [task_class(title, task_id) for task_id, title in enumerate(titles, start=1)]
+
+
+def build_columns(titles):
+    """Build the columnar layout: ids, titles and completion flags in separate containers."""
+    return list(range(1, len(titles) + 1)), list(titles), bytearray(len(titles))
+
+
+def measure(build, titles):
+    """
+    Return the bytes allocated by build(titles), not counting the titles themselves.
+
+    Args:
+        build: Function that turns the titles into a task collection.
+        titles (list): The task titles, created before measuring starts.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(titles)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main(sizes):
+    representations = [
+        ("__dict__ Task", lambda titles: build_objects(DictTask, titles)),
+        ("__slots__ Task", lambda titles: build_objects(Task, titles)),
+        ("columnar", build_columns),
+    ]
+
+    print(f"{'tasks':>10} " + " ".join(f"{name:>17}" for name, _ in representations))
+    for size in sizes:
+        titles = [f"Task number {i}" for i in range(size)]
+        results = [measure(build, titles) for _, build in representations]
+        row = " ".join(f"{used / size:>10.1f} B/task" for used in results)
+        print(f"{size:>10} {row}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
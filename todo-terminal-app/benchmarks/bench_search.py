@@ -0,0 +1,99 @@
+# bench_search.py - Search index against a linear scan
+#
+# Builds lists of N tasks with random titles and times the same queries twice:
+# with ToDoList.search() (inverted index) and with a plain loop over all titles,
+# which is what finding a task cost before the index existed.
+#
+# Run from the project folder:
+#   python benchmarks/bench_search.py
+#   python benchmarks/bench_search.py 10000 100000
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from todo import ToDoList, SEARCH_PREFIX, SEARCH_SUBSTRING, STATUS_ACTIVE
+
+SIZES = [10_000, 100_000, 1_000_000]
+WORDS = 50_000   # Size of the made up vocabulary the titles are drawn from
+REPEAT = 20      # Every query is timed this many times, the best run counts
+
+QUERIES = [
+    ("rare word", "kelomu", SEARCH_PREFIX, None),
+    ("prefix", "kelo", SEARCH_PREFIX, None),
+    ("two words", "kelo ka", SEARCH_PREFIX, None),
+    ("broad", "ka ri", SEARCH_PREFIX, None),
+        # Both words start thousands of titles: the time grows with the ids it touches
+    ("substring", "lomu", SEARCH_SUBSTRING, None),
+    ("active only", "kelo", SEARCH_PREFIX, STATUS_ACTIVE),
+]
+
+
+def make_words(count, rng):
+    """Make up count different pronounceable words."""
+    syllables = [c + v for c in "bdfgklmnprstvz" for v in "aeiou"]
+    words = {"kelomu"}
+    while len(words) < count:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def linear_search(todo_list, query, mode, status):
+    """Answer the query by checking every title, like a loop over todo_list.tasks would."""
+    terms = query.lower().split()
+    found = []
+    for task in todo_list.tasks:
+        if status == STATUS_ACTIVE and task.completed:
+            continue
+        words = task.title.lower().split()
+        if mode == SEARCH_PREFIX:
+            matched = all(any(word.startswith(term) for word in words) for term in terms)
+        else:
+            matched = all(any(term in word for word in words) for term in terms)
+        if matched:
+            found.append(task)
+    return found
+
+
+def best_time(function):
+    """Return the fastest of REPEAT runs of function() in milliseconds."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(sizes):
+    rng = random.Random(42)
+    words = make_words(WORDS, rng)
+
+    for size in sizes:
+        todo_list = ToDoList()
+        for _ in range(size):
+            todo_list.add_task(" ".join(rng.sample(words, 3)))
+        for task in rng.sample(todo_list.tasks, size // 2):
+            task.completed = True
+
+        start = time.perf_counter()
+        todo_list.search("")
+        # The first search builds the index, after that adds and deletes keep it up to date
+        print(f"\n{size} tasks, index built in {time.perf_counter() - start:.2f}s")
+        print(f"{'query':>12} {'hits':>8} {'index':>12} {'linear scan':>14}")
+        for name, query, mode, status in QUERIES:
+            hits = todo_list.search(query, mode=mode, status=status)
+            assert hits == linear_search(todo_list, query, mode, status)
+            indexed = best_time(lambda: todo_list.search(query, mode=mode, status=status))
+            start = time.perf_counter()
+            linear_search(todo_list, query, mode, status)
+            linear = (time.perf_counter() - start) * 1000
+            # One run is enough for the scan, it is slow enough to measure
+            print(f"{name:>12} {len(hits):>8} {indexed:>9.3f} ms {linear:>11.1f} ms")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
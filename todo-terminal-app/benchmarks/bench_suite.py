@@ -0,0 +1,196 @@
+# bench_suite.py - Throughput and peak memory of the ToDoList core and persistence
+#
+# Generates synthetic projects of 1k to 1M tasks and measures every core
+# operation: add_task, mark_task_completed, delete_task, list_tasks,
+# save_to_file, load_from_file and merge_and_save_to_file.
+#
+# Every operation is timed once without tracemalloc (it slows Python down a lot)
+# and run a second time under tracemalloc for its peak memory.
+# Results can be written to a JSON file and compared with an earlier run.
+#
+# Run from the project folder:
+#   python benchmarks/bench_suite.py
+#   python benchmarks/bench_suite.py 1000 10000 --operations add_task save_to_file
+#   python benchmarks/bench_suite.py --output baseline.json
+#   ... change the code ...
+#   python benchmarks/bench_suite.py --compare baseline.json --threshold 0.25
+#
+# With --compare the script exits with status 1 if an operation got slower (or
+# needs more memory) by more than the threshold, so it can guard a CI job.
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from todo import ToDoList
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+OPERATIONS = ["add_task", "mark_task_completed", "delete_task", "list_tasks",
+              "save_to_file", "load_from_file", "merge_and_save_to_file"]
+MAX_CALLS = 10_000
+    # Operations on single tasks are called this often at most, enough for a stable rate
+MAX_DELETES = 1_000
+    # delete_task moves the rest of the list on every call, so fewer calls on big lists
+
+
+def make_list(size, seed=42):
+    """Build a list of size tasks with varied titles, a third of them completed."""
+    rng = random.Random(seed)
+    words = ["report", "meeting", "email", "review", "call", "invoice", "plan", "fix", "deploy", "test"]
+    todo_list = ToDoList()
+    todo_list.add_tasks(f"{rng.choice(words)} {rng.choice(words)} #{i}" for i in range(size))
+    todo_list.complete_tasks(range(1, size + 1, 3))
+    return todo_list
+
+
+def prepare(operation, size, folder):
+    """
+    Build what one operation needs and return (run, items).
+
+    run() performs the measured work, items is how many tasks it handles
+    (for the throughput). Nothing done here is measured.
+    """
+    project = os.path.join(folder, "bench_project.json")
+    rng = random.Random(size)
+
+    if operation == "add_task":
+        todo_list = make_list(size)
+        calls = min(size, MAX_CALLS)
+        return (lambda: [todo_list.add_task(f"new task {i}") for i in range(calls)]), calls
+
+    if operation == "mark_task_completed":
+        todo_list = make_list(size)
+        calls = min(size, MAX_CALLS)
+        positions = [rng.randint(1, size) for _ in range(calls)]
+        return (lambda: [todo_list.mark_task_completed(p) for p in positions]), calls
+
+    if operation == "delete_task":
+        todo_list = make_list(size)
+        calls = min(size, MAX_DELETES)
+        positions = [rng.randint(1, size - i) for i in range(calls)]
+        return (lambda: [todo_list.delete_task(p) for p in positions]), calls
+
+    if operation == "list_tasks":
+        todo_list = make_list(size)
+
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                todo_list.list_tasks()
+        return run, size
+
+    if operation == "save_to_file":
+        todo_list = make_list(size)
+        return (lambda: todo_list.save_to_file(project)), size
+
+    if operation == "load_from_file":
+        make_list(size).save_to_file(project)
+        return (lambda: ToDoList().load_from_file(project)), size
+
+    if operation == "merge_and_save_to_file":
+        make_list(size).save_to_file(project)
+        new_tasks = ToDoList()
+        calls = min(size, MAX_CALLS)
+        new_tasks.add_tasks(f"merged task {i}" for i in range(calls))
+        return (lambda: new_tasks.merge_and_save_to_file(project)), calls
+
+    raise ValueError(f"unknown operation {operation!r}")
+
+
+def measure(operation, size):
+    """Return the result entry (time, throughput, peak memory) of one operation at one size."""
+    with tempfile.TemporaryDirectory() as folder:
+        run, items = prepare(operation, size, folder)
+        gc.collect()
+        # Tasks and their list reference each other, collect the setup garbage before timing
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as folder:
+        run, _ = prepare(operation, size, folder)
+        gc.collect()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"operation": operation, "size": size, "items": items, "seconds": seconds,
+            "per_second": items / seconds if seconds else float("inf"), "peak_bytes": peak}
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the changes against an earlier run and return the regressions.
+
+    An entry regresses if its throughput dropped, or its peak memory grew,
+    by more than threshold (0.25 = 25 %).
+    """
+    old = {(entry["operation"], entry["size"]): entry for entry in baseline["results"]}
+    regressions = []
+    print(f"\n{'operation':>24} {'tasks':>9} {'speed':>9} {'memory':>9}")
+    for entry in results:
+        before = old.get((entry["operation"], entry["size"]))
+        if before is None:
+            continue
+        speed = entry["per_second"] / before["per_second"] - 1
+        memory = (entry["peak_bytes"] - before["peak_bytes"]) / max(before["peak_bytes"], 1)
+        regressed = speed < -threshold or memory > threshold
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{entry['operation']:>24} {entry['size']:>9} {speed:>+8.0%} {memory:>+8.0%}{flag}")
+        if regressed:
+            regressions.append(entry)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ToDoList core operations.")
+    parser.add_argument("sizes", nargs="*", type=int, default=SIZES,
+                        help="project sizes in tasks (default: 1k 10k 100k 1M)")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=OPERATIONS,
+                        help="only run these operations")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown or memory growth before --compare fails (default 0.25)")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'operation':>24} {'tasks':>9} {'items':>7} {'seconds':>9} {'items/s':>11} {'peak MB':>8}")
+    for size in args.sizes:
+        for operation in args.operations:
+            entry = measure(operation, size)
+            results.append(entry)
+            print(f"{operation:>24} {size:>9} {entry['items']:>7} {entry['seconds']:>9.4f} "
+                  f"{entry['per_second']:>11.0f} {entry['peak_bytes'] / 1e6:>8.1f}")
+
+    if args.output:
+        run = {"python": platform.python_version(), "platform": platform.platform(),
+               "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=4)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
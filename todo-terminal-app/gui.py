@@ -1,8 +1,266 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from todo import ToDoList
-from PIL import Image, ImageTk
+from todo import ToDoList, get_catalog, plan_text, SEARCH_SUBSTRING, STATUS_ACTIVE
+from todo import instrumented, configure_instrumentation
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import os
+import queue
+import sys
+
+
+VIEW_ALL = "ALL"
+VIEW_NEXT = "NEXT UP"
+VIEW_OVERDUE = "OVERDUE"
+VIEW_WEEK = "THIS WEEK"
+VIEWS = (VIEW_ALL, VIEW_NEXT, VIEW_OVERDUE, VIEW_WEEK)
+
+
+class TaskRow:
+    # One recycled row: the widgets stay, only the task they show changes
+    def __init__(self, window, frame, label, button):
+        self.window = window
+        self.frame = frame
+        self.label = label
+        self.button = button
+        self.task = None
+        self.selected = False  # Whether the row is drawn highlighted right now
+
+
+class VirtualTaskList:
+    # Shows any number of tasks on a canvas, but only creates widgets for the rows
+    # that fit into the viewport. Scrolling moves and relabels the same few rows.
+
+    def __init__(self, parent, on_complete, font, bg, fg, accent, row_height=40):
+        self.on_complete = on_complete
+        self.font = font
+        self.bg = bg
+        self.fg = fg
+        self.accent = accent
+        self.row_height = row_height
+        self.tasks = []
+        self.rows = []
+        self.selected = set()  # Ids of the selected tasks, click selects, shift-click selects a range
+        self.anchor = None     # Position of the last clicked task, start of a shift-click range
+        self.select_bg = "#443333"
+
+        self.canvas = tk.Canvas(parent, bg=bg, highlightthickness=0, yscrollincrement=row_height)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.placeholder = self.canvas.create_text(10, 10, anchor="nw", text="🗂 No active operations",
+                                                   font=font, fill=fg)
+        self.canvas.bind("<Configure>", self.on_resize)
+        self.bind_wheel(self.canvas)
+
+    def bind_wheel(self, widget):
+        # Rows cover the canvas, so they forward the mouse wheel to it
+        widget.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        widget.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))  # Linux wheel up
+        widget.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))   # Linux wheel down
+
+    def set_tasks(self, tasks):
+        self.tasks = tasks
+        self.selected.clear()
+        self.anchor = None
+        self.update_scrollregion()
+        self.render()
+
+    def append_task(self, task):
+        self.tasks.append(task)
+        self.update_scrollregion()
+        self.render()
+
+    def remove_task(self, task):
+        if task in self.tasks:  # Tasks compare by identity, no title comparisons
+            position = self.tasks.index(task)
+            del self.tasks[position]
+            if self.anchor is not None and self.anchor >= position:
+                self.anchor = None  # the anchor row is gone, or the rows after it moved up
+        self.selected.discard(task.id)  # a hidden row must not stay selected
+        self.update_scrollregion()
+        self.render()
+
+    def remove_tasks(self, task_ids):
+        # Many rows at once: one pass over the list instead of one remove() per task
+        task_ids = set(task_ids)
+        self.tasks = [t for t in self.tasks if t.id not in task_ids]
+        self.selected -= task_ids
+        self.anchor = None
+        self.update_scrollregion()
+        self.render()
+
+    def toggle_select(self, row, event):
+        if row.task is None:
+            return
+        position = self.tasks.index(row.task)  # only the clicked row is looked up
+        if event.state & 0x0001 and self.anchor is not None:  # Shift held: select the range
+            first, last = sorted((self.anchor, position))
+            self.selected.update(t.id for t in self.tasks[first:last + 1])
+        elif row.task.id in self.selected:
+            self.selected.discard(row.task.id)
+        else:
+            self.selected.add(row.task.id)
+        self.anchor = position
+        self.render()
+
+    def update_task(self, task_id):
+        # Only the row that shows the task is touched, the rest of the list is not redrawn
+        for row in self.rows:
+            if row.task is not None and row.task.id == task_id:
+                row.label.config(text=f"OPERATION: {row.task.title}{plan_text(row.task)}")
+
+    def update_scrollregion(self):
+        height = max(len(self.tasks) * self.row_height, self.canvas.winfo_height())
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), height))
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render()
+
+    def on_resize(self, event):
+        for row in self.rows:
+            self.canvas.itemconfigure(row.window, width=event.width)
+        self.update_scrollregion()
+        self.render()
+
+    @instrumented("create_row")  # only measured with --profile or TODO_PROFILE
+    def create_row(self):
+        frame = tk.Frame(self.canvas, bg=self.bg)
+        label = tk.Label(frame, font=self.font, bg=self.bg, fg=self.fg, anchor="w")
+        label.pack(side="left", expand=True, fill="x", padx=10)
+        row = TaskRow(None, frame, label, None)
+        row.button = tk.Button(frame, text="✅ DECLASSIFIED", command=lambda: self.on_complete(row.task.id),
+                               font=self.font, bg=self.accent, fg="white",
+                               relief="flat", activebackground="#b30000")
+        row.button.pack(side="right", padx=5)
+        row.window = self.canvas.create_window(0, 0, window=frame, anchor="nw",
+                                               width=self.canvas.winfo_width(), height=self.row_height - 6)
+        for widget in (frame, label, row.button):
+            self.bind_wheel(widget)
+        for widget in (frame, label):
+            widget.bind("<Button-1>", lambda e: self.toggle_select(row, e))
+        return row
+
+    def render(self):
+        self.canvas.itemconfigure(self.placeholder, state="hidden" if self.tasks else "normal")
+
+        # Enough rows to cover the viewport (plus one that is half scrolled in)
+        needed = self.canvas.winfo_height() // self.row_height + 2
+        while len(self.rows) < needed:
+            self.rows.append(self.create_row())
+
+        first = int(self.canvas.canvasy(0) // self.row_height)
+        for slot, row in enumerate(self.rows):
+            index = first + slot
+            if index >= len(self.tasks):
+                row.task = None
+                self.canvas.itemconfigure(row.window, state="hidden")
+                continue
+            task = self.tasks[index]
+            self.canvas.coords(row.window, 0, index * self.row_height + 3)
+            self.canvas.itemconfigure(row.window, state="normal")
+            if row.task is not task:
+                row.task = task
+                row.label.config(text=f"OPERATION: {task.title}{plan_text(task)}")
+            selected = task.id in self.selected
+            if row.selected != selected:
+                row.selected = selected
+                color = self.select_bg if selected else self.bg
+                row.frame.config(bg=color)
+                row.label.config(bg=color)
+
+
+class DrawerBackground:
+    # The picture behind the folder list. PIL is only imported, and the picture only
+    # read, once the window is on screen, so they do not slow down the start.
+    # Resized copies are kept per size, and a burst of <Configure> events while the
+    # window is dragged bigger causes one resize when the dragging pauses.
+
+    def __init__(self, root, label, path, cache_size=8, delay_ms=100):
+        self.root = root
+        self.label = label
+        self.path = path
+        self.cache_size = cache_size
+        self.delay_ms = delay_ms
+        self.original = None  # The picture as read from the file, None until load()
+        self.photo_image = None  # ImageTk.PhotoImage, imported together with the picture
+        self.cache = OrderedDict()  # (width, height) -> PhotoImage, least recently used first
+        self.size = None  # Size of the panel, from the last <Configure> event
+        self.resize_job = None  # Pending after() call of show()
+
+    def load(self):
+        from PIL import Image, ImageTk  # imported here, the window is already drawn
+        self.original = Image.open(self.path)
+        self.original.load()  # read the pixels now, not during the first resize
+        self.photo_image = ImageTk.PhotoImage
+        self.show()
+
+    def on_configure(self, event):
+        self.size = (event.width, event.height)
+        if self.resize_job is not None:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(self.delay_ms, self.show)
+
+    def show(self):
+        self.resize_job = None
+        if self.original is None or self.size is None or min(self.size) < 1:
+            return
+        image = self.cache.get(self.size)
+        if image is None:
+            image = self.photo_image(self.original.resize(self.size))
+            self.cache[self.size] = image
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)  # forget the size that was not used for longest
+        else:
+            self.cache.move_to_end(self.size)
+        self.label.config(image=image)
+        self.label.image = image  # prevent garbage collection
+
+
+class PersistenceWorker:
+    # Runs loads and saves on one background thread so the window never freezes.
+    # Results travel back through a queue that the Tk thread polls with after().
+
+    def __init__(self, root, on_status, poll_ms=50):
+        self.root = root
+        self.on_status = on_status
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="todo-io")
+        self.results = queue.Queue()
+        self.root.after(self.poll_ms, self.poll)
+
+    def run(self, job, on_done=None, on_error=None):
+        # job() runs on the worker thread, on_done(result) or on_error(error) later on the Tk thread
+        def wrapper():
+            try:
+                self.post(on_done, job())
+            except Exception as error:
+                self.results.put((on_error, error, error))
+        self.executor.submit(wrapper)
+
+    def post(self, callback, value):
+        # Hand a value from the worker thread to a callback on the Tk thread
+        self.results.put((callback, value, None))
+
+    def poll(self):
+        while True:
+            try:
+                callback, value, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if error is not None:
+                self.on_status("⚠ I/O error")
+                messagebox.showerror("I/O ERROR", str(error))
+            if callback is not None:
+                callback(value)
+        self.root.after(self.poll_ms, self.poll)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)  # queued saves still finish
+
 
 class KGBAppGUI:
     def __init__(self, root):
@@ -10,7 +268,19 @@ class KGBAppGUI:
         self.root.title("TASK CONTROL CENTER")
         self.root.geometry("700x600")
         self.root.configure(bg="#0d0d0d")
-        self.todo_list = ToDoList()
+        self.current_file = None
+        self.loading = False  # True while the worker is still reading a project
+        self.load_number = 0  # Tells the newest load apart from abandoned ones
+        self.worker = PersistenceWorker(self.root, self.set_status)
+        self.todo_list = self.new_todo_list()
+        self.status_label = None
+        self.search_job = None  # Pending after() call of the search box
+        self.view = None  # Which tasks the list shows, one of VIEWS
+        self.next_count = 50  # How many tasks the NEXT UP view shows
+        self.watch_ms = 1000  # How often the open project is checked for changes of the CLI
+        self.watching = False  # True while the worker reads the changes of the open project
+        self.root.after(self.watch_ms, self.watch_project)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Theme colors
         self.bg_main = "#1a1a1a"
@@ -48,6 +318,7 @@ class KGBAppGUI:
         else:
             messagebox.showerror("ACCESS DENIED", "Incorrect authorization code.")
 
+    @instrumented("build_interface")
     def build_interface(self):
         paned = tk.PanedWindow(self.root, sashrelief="flat", bg=self.bg_main)
         paned.pack(fill="both", expand=True)
@@ -55,16 +326,17 @@ class KGBAppGUI:
         # Folders panel
         self.folder_panel = tk.Frame(paned, width=200, height=600, bg=self.bg_panel)
         self.folder_panel.pack_propagate(False)
-        self.folder_panel.bind("<Configure>", self.resize_folder_background)
         paned.add(self.folder_panel)  # make sure this isn't called twice
 
 
-        # 🧱 Add and resize background image to fill the entire panel
-        self.original_bg = Image.open("assets/drawer_bg.png")  # store original image
-        self.drawer_bg = ImageTk.PhotoImage(self.original_bg.resize((200, 600)))
-        self.drawer_bg_label = tk.Label(self.folder_panel, image=self.drawer_bg, bg=self.bg_panel)
+        # 🧱 Background image that fills the entire panel, loaded after the first paint
+        self.drawer_bg_label = tk.Label(self.folder_panel, bg=self.bg_panel)
         self.drawer_bg_label.place(x=0, y=0, relwidth=1, relheight=1)
         self.drawer_bg_label.lower()# send it to background
+        self.drawer_background = DrawerBackground(self.root, self.drawer_bg_label, "assets/drawer_bg.png")
+        self.folder_panel.bind("<Configure>", self.drawer_background.on_configure)
+        # after_idle waits until the window is drawn, after(0) then lets that frame show first
+        self.root.after_idle(lambda: self.root.after(0, self.drawer_background.load))
 
         # Now place label above image
         self.folder_title = tk.Label(self.folder_panel, text="📁 FOLDERS", bg=self.bg_panel,
@@ -98,45 +370,74 @@ class KGBAppGUI:
                   font=self.kgb_font, bg=self.accent_red, fg="white",
                   activebackground="#8b0000", relief="flat").pack(side="right")
 
-        # Scrollable task frame
+        search_frame = tk.Frame(self.task_panel, bg=self.bg_main)
+        search_frame.pack(padx=10, pady=(0, 5), fill="x")
+
+        tk.Label(search_frame, text="🔍", font=self.kgb_font, fg=self.text_soft,
+                 bg=self.bg_main).pack(side="left")
+        self.search_entry = tk.Entry(search_frame, font=self.kgb_font, bg="#333333",
+                                     fg=self.text_soft, insertbackground=self.text_soft)
+        self.search_entry.pack(side="left", expand=True, fill="x", padx=(5, 0))
+        self.search_entry.bind("<KeyRelease>", lambda e: self.schedule_search())
+
+        # The schedule views are answered from the sorted index of the list, nothing is sorted here
+        self.view = tk.StringVar(value=VIEW_ALL)
+        view_menu = tk.OptionMenu(search_frame, self.view, *VIEWS, command=lambda _: self.run_search())
+        view_menu.config(font=("Courier New", 10), bg="#333333", fg=self.text_soft,
+                         activebackground="#8b0000", relief="flat", highlightthickness=0)
+        view_menu.pack(side="right", padx=(5, 0))
+
+        # Bulk actions on the selected rows (click a row to select it, shift-click for a range)
+        bulk_frame = tk.Frame(self.task_panel, bg=self.bg_main)
+        bulk_frame.pack(padx=10, pady=(0, 5), fill="x")
+        for text, command in (("✅ DECLASSIFY SELECTED", self.complete_selected),
+                              ("🗑 SHRED SELECTED", self.delete_selected),
+                              ("🧹 SHRED DECLASSIFIED", self.clear_completed),
+                              ("↩ UNDO", self.undo),
+                              ("↪ REDO", self.redo)):
+            tk.Button(bulk_frame, text=text, command=command, font=("Courier New", 10),
+                      bg="#333333", fg=self.text_soft, activebackground="#8b0000",
+                      relief="flat").pack(side="left", padx=(0, 5))
+
+        self.root.bind("<Control-z>", lambda e: self.undo())
+        self.root.bind("<Control-y>", lambda e: self.redo())
+
+        self.status_label = tk.Label(self.task_panel, text="", font=("Courier New", 10),
+                                     fg=self.text_soft, bg=self.bg_main, anchor="e")
+        self.status_label.pack(side="bottom", fill="x", padx=10)
+
+        # Scrollable task frame, only the visible rows exist as widgets
         self.task_frame = tk.Frame(self.task_panel, bg=self.bg_main)
         self.task_frame.pack(padx=10, pady=10, fill="both", expand=True)
 
-        self.canvas = tk.Canvas(self.task_frame, bg=self.bg_main, highlightthickness=0)
-        self.scrollbar = ttk.Scrollbar(self.task_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = tk.Frame(self.canvas, bg=self.bg_main)
-
-        self.scrollable_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-
-        self.canvas.pack(side="left", fill="both", expand=True)
-        self.scrollbar.pack(side="right", fill="y")
-
-        self.placeholder = tk.Label(self.scrollable_frame, text="🗂 No active operations",
-                                    font=self.kgb_font, fg=self.text_soft, bg=self.bg_main)
-        self.placeholder.pack()
+        self.task_list = VirtualTaskList(self.task_frame, self.complete_task, font=self.kgb_font,
+                                         bg=self.bg_main, fg=self.text_soft, accent=self.accent_red)
+        self.canvas = self.task_list.canvas
+        self.scrollbar = self.task_list.scrollbar
 
         self.load_folder_buttons()
 
     def load_folder_buttons(self):
         project_dir = "projects"
         os.makedirs(project_dir, exist_ok=True)
-        files = [f for f in os.listdir(project_dir) if f.endswith(".json")]
+        # The catalog only re-reads projects that changed, and it does so on the worker
+        self.worker.run(get_catalog(project_dir).projects, self.show_folder_buttons)
 
+    @instrumented("folder_buttons")
+    def show_folder_buttons(self, projects):
         for widget in self.folder_list_frame.winfo_children():
             widget.destroy()
 
-        if not files:
+        if not projects:
             tk.Label(self.folder_list_frame, text="(No projects found)", bg=self.bg_panel,
                     fg="#666666", font=self.kgb_font).pack(padx=10, pady=10)
             return
 
-        for file in files:
-            name = os.path.splitext(file)[0]
+        for info in projects:
+            name = info.name
             btn = tk.Button(
                 self.folder_list_frame,
-                text=f"📁 {name}",
+                text=f"📁 {name} ({info.active})",
                 font=self.kgb_font,
                 bg="#00000000",
                 fg=self.text_soft,
@@ -145,11 +446,12 @@ class KGBAppGUI:
                 highlightthickness=0,
                 relief="flat",
                 anchor="w",
-                padx=12
+                padx=12,
+                command=lambda f=info.filename: self.load_project(f)
             )
             btn.pack(fill="x", padx=10, pady=1)
 
-            self.add_tooltip(btn, name)  # ✅ Now that btn is created
+            self.add_tooltip(btn, str(info))  # ✅ Now that btn is created
 
             
     def add_tooltip(self, widget, text):
@@ -168,75 +470,206 @@ class KGBAppGUI:
         widget.bind("<Leave>", on_leave)
 
 
+    def new_todo_list(self):
+        # Every click appends to the journal instead of rewriting the project, and
+        # write-behind turns a burst of clicks into one write on a background timer
+        todo_list = ToDoList(journal=True, write_behind=True)
+        todo_list.on_saved = lambda: self.worker.post(lambda _: self.saved(todo_list), None)
+        return todo_list
+
+    def saved(self, todo_list):
+        if todo_list is self.todo_list and not todo_list.dirty:
+            self.set_status(f"✔ saved · {self.counts_text()}")
+
+    def counts_text(self):
+        # Read from the live views of the list, nothing is counted here
+        return f"{self.todo_list.active_count} active / {self.todo_list.completed_count} declassified"
+
+    def set_status(self, text):
+        if self.status_label is not None:
+            self.status_label.config(text=text)
+
     def load_project(self, filename):
         full_path = os.path.join("projects", filename)
-        self.todo_list.load_from_file(full_path)
         self.current_file = full_path
+        self.loading = True
+        self.load_number += 1
+        number = self.load_number
+        self.set_status("📂 loading…")
+        self.search_entry.delete(0, tk.END)  # the search of the old project does not carry over
+
+        old_list = self.todo_list
+        new_list = self.new_todo_list()
+
+        def load():
+            old_list.close()  # pending changes of the previous project are written first
+            for page_number, page in enumerate(new_list.load_pages(full_path)):
+                if page_number == 0:
+                    # The first screen shows up while the rest of the file is still parsed
+                    self.worker.post(lambda tasks: self.show_first_page(number, tasks), list(page))
+            return new_list
+
+        self.worker.run(load, lambda loaded: self.finish_loading(number, loaded),
+                        on_error=lambda error: self.load_failed(number))
+
+    def show_first_page(self, number, tasks):
+        # Only the plain list can be shown early, the other views sort the whole project
+        if number == self.load_number and self.view.get() == VIEW_ALL:
+            self.task_list.set_tasks([t for t in tasks if not t.completed])
+
+    def load_failed(self, number):
+        if number == self.load_number:
+            self.loading = False
+            self.current_file = None
+
+    def finish_loading(self, number, loaded):
+        if number != self.load_number:
+            self.worker.run(loaded.close)  # another project was opened meanwhile
+            return
+        self.todo_list = loaded
+        self.loading = False
         self.refresh_tasks()
+        self.set_status(f"📂 {len(loaded.tasks)} operations loaded · {self.counts_text()}")
 
     def add_task(self):
         if not self.current_file:
             messagebox.showinfo("No File Selected", "Please select a folder (project) first.")
             return
+        if self.loading:
+            messagebox.showinfo("Loading", "The project is still loading, please wait.")
+            return
 
         title = self.task_entry.get().strip()
         if not title:
             return
 
-        self.todo_list.add_task(title)
-        self.todo_list.save_to_file(self.current_file)
+        self.todo_list.add_task(title)  # journaled to the project file, no full rewrite
         self.task_entry.delete(0, tk.END)
+        if self.search_query() or self.view.get() != VIEW_ALL:
+            self.refresh_tasks()  # the new task may or may not match the search or the view
+        else:
+            self.task_list.append_task(self.todo_list.tasks[-1])  # no full redraw for one new row
+        self.set_status("💾 saving…")
 
-        if self.placeholder:
-            self.placeholder.destroy()
-            self.placeholder = None
+    @instrumented("refresh_tasks")
+    def refresh_tasks(self):
+        query = self.search_query()
+        view = self.view.get()
+        if query:
+            # The search index answers this without walking through every task
+            active_tasks = self.todo_list.search(query, mode=SEARCH_SUBSTRING, status=STATUS_ACTIVE)
+        else:
+            active_tasks = None
+        if view != VIEW_ALL:
+            if view == VIEW_NEXT:
+                tasks = self.todo_list.next_tasks(self.next_count)
+            elif view == VIEW_OVERDUE:
+                tasks = self.todo_list.overdue_tasks()
+            else:
+                tasks = self.todo_list.due_this_week()
+            if active_tasks is not None:
+                found = {t.id for t in active_tasks}
+                tasks = [t for t in tasks if t.id in found]  # only the few tasks of the view are checked
+            active_tasks = tasks
+        elif active_tasks is None:
+            active_tasks = list(self.todo_list.active_tasks)  # kept up to date by the list, no filtering
+        self.task_list.set_tasks(active_tasks)
+
+    def search_query(self):
+        return self.search_entry.get().strip()
+
+    def schedule_search(self):
+        # Wait until typing pauses, so a fast typist causes one search instead of one per key
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(150, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        if not self.loading:  # finish_loading refreshes with the search text anyway
+            self.refresh_tasks()
 
-        self.refresh_tasks()
+    def complete_task(self, task_id):
+        if self.loading:
+            return  # the rows belong to the project that is being replaced
+        # Rows remember the stable task id, so there is no active list to rebuild here
+        if self.todo_list.mark_task_completed_by_id(task_id):  # journaled, no full rewrite
+            self.task_list.remove_task(self.todo_list.get_task(task_id))
+            self.set_status("💾 saving…")
 
-    def refresh_tasks(self):
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+    def complete_selected(self):
+        if self.loading or not self.task_list.selected:
+            return
+        ids = list(self.task_list.selected)
+        count = self.todo_list.complete_tasks(ids)  # one write for all of them
+        self.task_list.remove_tasks(ids)
+        self.set_status(f"💾 saving… ({count} declassified)")
+
+    def delete_selected(self):
+        if self.loading or not self.task_list.selected:
+            return
+        ids = list(self.task_list.selected)
+        if not messagebox.askyesno("Shred operations", f"Delete {len(ids)} selected operation(s)?"):
+            return
+        count = self.todo_list.delete_tasks(ids)
+        self.task_list.remove_tasks(ids)
+        self.set_status(f"💾 saving… ({count} shredded)")
 
-        active_tasks = [t for t in self.todo_list.tasks if not t.completed]
+    def clear_completed(self):
+        if self.loading or not self.current_file:
+            return
+        # Completed tasks are not shown, so the visible list stays as it is
+        count = self.todo_list.clear_completed()
+        if count:
+            self.set_status(f"💾 saving… ({count} declassified operations shredded)")
+        else:
+            self.set_status("nothing to shred")
 
-        if not active_tasks:
-            self.placeholder = tk.Label(self.scrollable_frame, text="🗂 No active operations",
-                                        font=self.kgb_font, fg=self.text_soft, bg=self.bg_main)
-            self.placeholder.pack()
+    def undo(self):
+        if self.loading:
             return
+        if self.todo_list.undo():  # journaled like the change it takes back
+            self.refresh_tasks()
+            self.set_status(f"↩ undone · {self.counts_text()}")
+        else:
+            self.set_status("nothing to undo")
 
-        for idx, task in enumerate(active_tasks, start=1):
-            row = tk.Frame(self.scrollable_frame, bg=self.bg_main)
-            row.pack(fill="x", pady=3)
-
-            label = tk.Label(row, text=f"OPERATION: {task.title}",
-                             font=self.kgb_font, bg=self.bg_main, fg=self.text_soft, anchor="w")
-            label.pack(side="left", expand=True, fill="x", padx=10)
-
-            done_button = tk.Button(row, text="✅ DECLASSIFIED", command=lambda i=idx: self.complete_task(i),
-                                    font=self.kgb_font, bg=self.accent_red, fg="white",
-                                    relief="flat", activebackground="#b30000")
-            done_button.pack(side="right", padx=5)
-
-    def complete_task(self, index):
-        active_tasks = [t for t in self.todo_list.tasks if not t.completed]
-        if index - 1 < len(active_tasks):
-            task = active_tasks[index - 1]
-            task.mark_completed()
-            if self.current_file:
-                self.todo_list.save_to_file(self.current_file)
+    def redo(self):
+        if self.loading:
+            return
+        if self.todo_list.redo():
+            self.refresh_tasks()
+            self.set_status(f"↪ redone · {self.counts_text()}")
+        else:
+            self.set_status("nothing to redo")
+
+    def watch_project(self):
+        # Changes of other programs (the CLI) to the open project are read on the worker,
+        # a saved or compacted project can mean reading the whole file again
+        if self.watching or not self.current_file or self.loading:
+            self.root.after(self.watch_ms, self.watch_project)
+            return
+        self.watching = True  # one check at a time, a slow read is not queued up again
+        todo_list = self.todo_list
+        self.worker.run(todo_list.read_changes, lambda changes: self.apply_changes(todo_list, changes),
+                        on_error=lambda error: self.apply_changes(todo_list, None))
+
+    def apply_changes(self, todo_list, changes):
+        # Back on the Tk thread, the only thread that changes the list
+        self.watching = False
+        if todo_list is self.todo_list and not self.loading and todo_list.apply_changes(changes):
             self.refresh_tasks()
+            self.set_status(f"🔄 changed elsewhere · {self.counts_text()}")
+        self.root.after(self.watch_ms, self.watch_project)
 
-    def resize_folder_background(self, event):
-        new_width = event.width
-        new_height = event.height
-        resized = self.original_bg.resize((new_width, new_height))
-        self.drawer_bg = ImageTk.PhotoImage(resized)
-        self.drawer_bg_label.config(image=self.drawer_bg)
-        self.drawer_bg_label.image = self.drawer_bg  # prevent garbage collection
+    def on_close(self):
+        self.worker.run(self.todo_list.close)  # write whatever is still pending
+        self.worker.shutdown()
+        self.root.destroy()
 
 
 if __name__ == "__main__":
+    configure_instrumentation(sys.argv[1:])  # --profile [cprofile] prints a summary on exit
     root = tk.Tk()
     app = KGBAppGUI(root)
     root.mainloop()
@@ -2,9 +2,28 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from todo import ToDoList, Task
+from todo import ToDoList, Task, ProjectCatalog, iter_snapshot, iter_task_pages
+from todo import SEARCH_SUBSTRING, STATUS_ACTIVE, STATUS_COMPLETED
+from todo import FORMAT_BINARY, FORMAT_INDEXED, FORMAT_JSON, FORMAT_SQLITE, detect_format, convert_project
+from todo import parse_ranges
+from todo import INSTRUMENTATION, PROFILE_CPROFILE, configure_instrumentation
+from todo import run_command, ProjectChangedError, project_lock
+from todo import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, parse_due
+from datetime import date
+import todo
 import unittest
 import json
+import sqlite3
+import glob
+import shutil
+import tempfile
+import subprocess
+import textwrap
+import threading
+import pstats
+import io
+import contextlib
+import time
 
 class TestToDoList(unittest.TestCase):
     def setUp(self):
@@ -53,6 +72,10 @@ class TestToDoList(unittest.TestCase):
         """
         if os.path.exists(self.test_file):
             os.remove(self.test_file)
+        if os.path.exists(self.test_file + ".journal"):
+            os.remove(self.test_file + ".journal")
+        if os.path.exists(self.test_file + ".lock"):
+            os.remove(self.test_file + ".lock")
     
     def test_add_task(self):
         """
@@ -228,12 +251,1791 @@ class TestToDoList(unittest.TestCase):
         # Step 3: Merge and save the new task into the same file
         self.todo.merge_and_save_to_file(self.test_file)
 
-        # Step 4: Read the merged file and validate its contents
-        with open(self.test_file, "r") as f:
-            merged_tasks = json.load(f)
-            self.assertEqual(len(merged_tasks), 2)  # Two tasks should now exist
-            self.assertEqual(merged_tasks[0]["title"], "Old Task")  # First task is the old one
-            self.assertEqual(merged_tasks[1]["title"], "New Task")  # Second task is the new one
+        # Step 4: Read the merged project (file + journal) and validate its contents
+        merged = ToDoList()
+        merged.load_from_file(self.test_file)
+        merged_tasks = [{"title": task.title} for task in merged.tasks]
+        self.assertEqual(len(merged_tasks), 2)  # Two tasks should now exist
+        self.assertEqual(merged_tasks[0]["title"], "Old Task")  # First task is the old one
+        self.assertEqual(merged_tasks[1]["title"], "New Task")  # Second task is the new one
+
+    def test_merge_does_not_rewrite_project(self):
+        """
+        Merging appends to the journal of the project, the JSON file itself is untouched.
+        With dedupe=True tasks whose title already exists are skipped.
+        """
+        with open(self.test_file, "w") as f:
+            json.dump([{"id": 1, "title": "Old Task", "completed": False}], f)
+        with open(self.test_file) as f:
+            before = f.read()
+
+        for title in ("Old Task", "New Task", "New Task"):
+            self.todo.add_task(title)
+        self.todo.merge_and_save_to_file(self.test_file, dedupe=True)
+
+        with open(self.test_file) as f:
+            self.assertEqual(f.read(), before)
+        merged = ToDoList()
+        merged.load_from_file(self.test_file)
+        self.assertEqual([t.title for t in merged.tasks], ["Old Task", "New Task"])
+        self.assertEqual([t.id for t in merged.tasks], [1, 2])
+    def test_task_has_no_instance_dict(self):
+        """
+        Tasks use __slots__, so a million of them do not carry a million dictionaries.
+        The public attributes still work as before.
+        """
+        task = Task("Compact")
+        self.assertFalse(hasattr(task, "__dict__"))
+        task.mark_completed()
+        self.assertEqual(str(task), "[X] Compact")
+
+class TestTaskIds(unittest.TestCase):
+    """Tests for stable task ids and the id index of ToDoList."""
+
+    def setUp(self):
+        """Create a fresh list with three tasks."""
+        self.todo = ToDoList()
+        self.test_file = "test_ids.json"
+        for title in ("First", "Second", "Third"):
+            self.todo.add_task(title)
+
+    def tearDown(self):
+        """Remove the temporary project file and its lock file."""
+        for path in (self.test_file, self.test_file + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_ids_survive_deletes(self):
+        """
+        Deleting a task in the middle does not change the ids of the others.
+        """
+        third_id = self.todo.tasks[2].id
+        self.todo.delete_task_by_id(self.todo.tasks[1].id)
+        self.assertEqual(self.todo.get_task(third_id).title, "Third")
+        self.assertEqual([t.title for t in self.todo.tasks], ["First", "Third"])
+
+    def test_complete_by_id_and_position(self):
+        """
+        Completing by stable id and by 1-based position reach the same tasks.
+        """
+        self.assertTrue(self.todo.mark_task_completed_by_id(self.todo.tasks[0].id))
+        self.todo.mark_task_completed(3)
+        self.assertEqual([t.completed for t in self.todo.tasks], [True, False, True])
+        self.assertFalse(self.todo.mark_task_completed_by_id(999))
+
+    def test_ids_are_saved_and_loaded(self):
+        """
+        Ids are stored in the JSON file and restored on load. Files without ids get new ones.
+        """
+        self.todo.delete_task(1)
+        ids = [t.id for t in self.todo.tasks]
+        self.todo.save_to_file(self.test_file)
+
+        loaded = ToDoList()
+        loaded.load_from_file(self.test_file)
+        self.assertEqual([t.id for t in loaded.tasks], ids)
+        loaded.add_task("Fourth")
+        self.assertNotIn(loaded.tasks[-1].id, ids)  # New ids never reuse existing ones
+
+        with open(self.test_file, "w") as f:
+            json.dump([{"title": "No id", "completed": False}], f)
+        loaded.load_from_file(self.test_file)
+        self.assertIsNotNone(loaded.tasks[0].id)
+
+class TestSearch(unittest.TestCase):
+    """Tests for ToDoList.search() and the search index behind it."""
+
+    def setUp(self):
+        """Create a list with a few tasks and search once, so the index exists."""
+        self.todo = ToDoList()
+        self.test_file = "test_search.json"
+        for title in ("Buy milk", "Finish the project", "Project review", "Call mom"):
+            self.todo.add_task(title)
+        self.todo.search("warm up")
+
+    def tearDown(self):
+        """Remove the temporary project file and its lock file."""
+        for path in (self.test_file, self.test_file + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def titles(self, tasks):
+        """Return the titles of the given tasks."""
+        return [t.title for t in tasks]
+
+    def test_prefix_and_substring(self):
+        """
+        Prefix queries match the start of a word, substring queries match anywhere.
+        All query words must match, case does not matter.
+        """
+        self.assertEqual(self.titles(self.todo.search("PROJ")), ["Finish the project", "Project review"])
+        self.assertEqual(self.todo.search("ject"), [])
+        self.assertEqual(self.titles(self.todo.search("ject", mode=SEARCH_SUBSTRING)),
+                         ["Finish the project", "Project review"])
+        self.assertEqual(self.titles(self.todo.search("il", mode=SEARCH_SUBSTRING)), ["Buy milk"])
+        self.assertEqual(self.titles(self.todo.search("proj rev")), ["Project review"])
+        self.assertEqual(self.todo.search(""), [])
+
+    def test_few_candidates_are_checked_by_title(self):
+        """
+        A rare word next to a word with many matches gives the same result whether
+        the candidates are checked by title or by the index alone.
+        """
+        for title in ("Mop floor", "Mow lawn", "Make tea", "Cook"):
+            self.todo.add_task(title)
+        title_of = lambda task_id: self.todo.get_task(task_id).title
+        index = self.todo._search_index
+        self.assertEqual(index.search("c m", title_of=title_of), index.search("c m"))
+        self.assertEqual(self.titles(self.todo.search("c m")), ["Call mom"])
+
+    def test_status_filter(self):
+        """
+        The status filter sees tasks completed after the index was built.
+        """
+        self.todo.mark_task_completed(2)
+        self.assertEqual(self.titles(self.todo.search("project", status=STATUS_ACTIVE)), ["Project review"])
+        self.assertEqual(self.titles(self.todo.search("project", status=STATUS_COMPLETED)),
+                         ["Finish the project"])
+
+    def test_index_follows_adds_and_deletes(self):
+        """
+        Adds and deletes update the index, a word that is gone is no longer found.
+        """
+        self.todo.add_task("Milk the cow")
+        self.assertEqual(self.titles(self.todo.search("milk")), ["Buy milk", "Milk the cow"])
+
+        self.todo.delete_task(1)
+        self.todo.delete_task_by_id(self.todo.search("cow")[0].id)
+        self.assertEqual(self.todo.search("milk"), [])
+        self.assertEqual(self.todo.search("mil", mode=SEARCH_SUBSTRING), [])
+        self.assertNotIn("milk", self.todo._search_index.postings)
+
+    def test_search_after_load(self):
+        """
+        Loading another project replaces the index.
+        """
+        other = ToDoList()
+        other.add_task("Water the plants")
+        other.save_to_file(self.test_file)
+
+        self.todo.load_from_file(self.test_file)
+        self.assertEqual(self.todo.search("milk"), [])
+        self.assertEqual(self.titles(self.todo.search("plant")), ["Water the plants"])
+
+class TestStatusViews(unittest.TestCase):
+    """Tests for the live active/completed views and counts of ToDoList."""
+
+    def setUp(self):
+        """Create a list with four tasks, the second one completed."""
+        self.todo = ToDoList()
+        self.test_file = "test_views.json"
+        for title in ("A", "B", "C", "D"):
+            self.todo.add_task(title)
+        self.todo.mark_task_completed(2)
+
+    def tearDown(self):
+        """Remove the temporary project file and its lock file."""
+        for path in (self.test_file, self.test_file + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_views_follow_changes(self):
+        """
+        Completing (through the list or the task itself) and deleting move tasks
+        between the views, a view taken earlier shows the change too.
+        """
+        active = self.todo.active_tasks
+        self.assertEqual([t.title for t in active], ["A", "C", "D"])
+        self.assertEqual((self.todo.active_count, self.todo.completed_count), (3, 1))
+
+        self.todo.tasks[2].mark_completed()         # Directly on the Task
+        self.todo.delete_task(1)
+        self.assertEqual([t.title for t in active], ["D"])
+        self.assertEqual([t.title for t in self.todo.completed_tasks], ["B", "C"])
+
+        self.todo.tasks[0].completed = False        # Reopening works as well
+        self.assertEqual([t.title for t in self.todo.active_tasks], ["B", "D"])
+        self.assertEqual([t.title for t in active], ["B", "D"])
+        self.assertEqual((self.todo.active_count, self.todo.completed_count), (2, 1))
+
+    def test_views_keep_list_order(self):
+        """
+        Tasks that come back (undo, reopening) take their place in the views, not the end.
+
+        Steps performed:
+        1. Delete "A" and undo it: "A" is first again.
+        2. Complete "A", then reopen it: still first.
+        3. Complete "C" and "A" with one bulk call and undo it.
+        """
+        self.todo.delete_task(1)
+        self.todo.undo()
+        self.assertEqual([t.title for t in self.todo.active_tasks], ["A", "C", "D"])
+        self.todo.tasks[0].completed = True
+        self.todo.tasks[0].completed = False
+        self.assertEqual([t.title for t in self.todo.active_tasks], ["A", "C", "D"])
+        self.todo.complete_tasks([3, 1])
+        self.assertEqual([t.title for t in self.todo.completed_tasks], ["A", "B", "C"])
+        self.todo.undo()
+        self.assertEqual([t.title for t in self.todo.active_tasks], ["A", "C", "D"])
+
+    def test_views_after_load(self):
+        """
+        Loading fills the views from the file, tasks of the previous content no longer count.
+        """
+        self.todo.save_to_file(self.test_file)
+        old_task = self.todo.tasks[0]
+
+        self.todo.load_from_file(self.test_file)
+        old_task.mark_completed()
+        self.assertEqual([t.title for t in self.todo.completed_tasks], ["B"])
+        self.assertEqual((self.todo.active_count, self.todo.completed_count), (3, 1))
+
+class TestJournal(unittest.TestCase):
+    """Tests for the append-only journal storage mode of ToDoList."""
+
+    def setUp(self):
+        """Create a small project snapshot and a journaled ToDoList bound to it."""
+        self.test_file = "test_journal.json"
+        with open(self.test_file, "w") as f:
+            json.dump([{"title": "Old Task", "completed": False}], f)
+        self.todo = ToDoList(journal=True)
+        self.todo.load_from_file(self.test_file)
+
+    def tearDown(self):
+        """Close the journal and remove the snapshot and journal files."""
+        self.todo.close()
+        for path in (self.test_file, self.test_file + ".journal", self.test_file + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_mutations_do_not_rewrite_snapshot(self):
+        """
+        Adding, completing and deleting only appends to the journal.
+
+        Steps performed:
+        ----------------
+        1. Remember the snapshot contents.
+        2. Add, complete and delete tasks.
+        3. Assert the snapshot is unchanged and the journal holds the records.
+        """
+        with open(self.test_file) as f:
+            before = f.read()                       # Step 1: Snapshot before mutations
+
+        self.todo.add_task("New Task")              # Step 2: Mutate the list
+        self.todo.mark_task_completed(2)
+        self.todo.delete_task(1)
+
+        with open(self.test_file) as f:
+            self.assertEqual(f.read(), before)      # Step 3a: Snapshot untouched
+        with open(self.test_file + ".journal") as f:
+            self.assertEqual(len(f.readlines()), 4) # Step 3b: Header + three records
+
+    def test_load_replays_journal(self):
+        """
+        A fresh ToDoList sees the snapshot plus everything in the journal.
+        """
+        self.todo.add_task("New Task")
+        self.todo.mark_task_completed(2)
+        self.todo.delete_task(1)
+
+        other = ToDoList()
+        other.load_from_file(self.test_file)
+        self.assertEqual([t.title for t in other.tasks], ["New Task"])
+        self.assertTrue(other.tasks[0].completed)
+
+    def test_compaction_folds_journal_into_snapshot(self):
+        """
+        Reaching the compaction threshold rewrites the snapshot and restarts the journal.
+        """
+        self.todo.compact_threshold = 3
+        for i in range(3):
+            self.todo.add_task(f"Task {i}")
+
+        with open(self.test_file) as f:
+            self.assertEqual(len(json.load(f)), 4)  # Snapshot holds all tasks now
+        self.assertFalse(os.path.exists(self.test_file + ".journal"))
+
+        self.todo.add_task("After compaction")
+        other = ToDoList()
+        other.load_from_file(self.test_file)
+        self.assertEqual(len(other.tasks), 5)
+
+    def test_deferred_writes_are_flushed_together(self):
+        """
+        With defer_writes the records wait in memory and flush() writes them in one go,
+        also when flush() runs on another thread.
+        """
+        self.todo.defer_writes = True
+        for i in range(5):
+            self.todo.add_task(f"Burst {i}")
+        self.assertFalse(os.path.exists(self.test_file + ".journal"))  # Nothing written yet
+
+        worker = threading.Thread(target=self.todo.flush)
+        worker.start()
+        worker.join()
+
+        other = ToDoList()
+        other.load_from_file(self.test_file)
+        self.assertEqual(len(other.tasks), 6)
+
+    def test_stale_journal_is_ignored(self):
+        """
+        A journal written against an older snapshot is not replayed over a newer one.
+        """
+        self.todo.add_task("Journaled Task")
+        with open(self.test_file, "w") as f:        # Someone rewrites the snapshot directly
+            json.dump([{"title": "Rewritten", "completed": False}, {"title": "Second", "completed": True}], f)
+
+        other = ToDoList()
+        other.load_from_file(self.test_file)
+        self.assertEqual([t.title for t in other.tasks], ["Rewritten", "Second"])
+
+class TestStreamingLoader(unittest.TestCase):
+    """Tests for the incremental JSON loader and page-at-a-time iteration."""
+
+    def setUp(self):
+        """Write a pretty-printed project with 120 tasks."""
+        self.test_file = "test_stream.json"
+        data = [{"id": i, "title": f"Task {i}", "completed": i % 2 == 0} for i in range(1, 121)]
+        with open(self.test_file, "w") as f:
+            json.dump(data, f, indent=4)
+
+    def tearDown(self):
+        """Remove the project and its journal."""
+        for path in (self.test_file, self.test_file + ".journal", self.test_file + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_small_chunks_parse_the_same_tasks(self):
+        """
+        Parsing with a chunk size smaller than one task gives the same result as json.load.
+        """
+        tasks = list(iter_snapshot(self.test_file, chunk_size=7))
+        self.assertEqual(len(tasks), 120)
+        self.assertEqual(tasks[41].title, "Task 42")
+        self.assertTrue(tasks[41].completed)
+
+    def test_pages_include_journal_changes(self):
+        """
+        Pages are handed out lazily and show journaled adds, completions and deletes.
+        """
+        todo = ToDoList(journal=True)
+        todo.load_from_file(self.test_file)
+        todo.delete_task_by_id(1)
+        todo.mark_task_completed_by_id(3)
+        todo.add_task("Journaled")
+        todo.close()
+
+        pages = iter_task_pages(self.test_file, page_size=50)
+        first = next(pages)                         # First page without reading further pages
+        self.assertEqual(len(first), 50)
+        self.assertEqual(first[0].title, "Task 2")
+        self.assertTrue(first[1].completed)
+        rest = [task for page in pages for task in page]
+        self.assertEqual(rest[-1].title, "Journaled")
+        self.assertEqual(len(first) + len(rest), 120)
+
+    def test_load_pages_grows_the_list(self):
+        """
+        load_pages() adds each page to the list before the next one is parsed.
+        """
+        todo = ToDoList()
+        sizes = [len(todo.tasks) for _ in todo.load_pages(self.test_file, page_size=50)]
+        self.assertEqual(sizes, [50, 100, 120])
+
+class TestFileFormats(unittest.TestCase):
+    """Tests for the compact binary format and the format detection."""
+
+    def setUp(self):
+        """Create a list with a few tasks, one completed and one with non-ASCII characters."""
+        self.test_file = "test_format.json"
+        self.todo = ToDoList(file_format=FORMAT_BINARY)
+        for title in ("First", "Café ☕", "Third"):
+            self.todo.add_task(title)
+        self.todo.delete_task(1)
+        self.todo.mark_task_completed(2)
+
+    def tearDown(self):
+        """Remove the project and its journal."""
+        for path in (self.test_file, self.test_file + ".journal", self.test_file + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_binary_round_trip(self):
+        """
+        A binary file is detected on load and gives back the same ids, titles and status,
+        also when read in chunks smaller than one record.
+        """
+        self.todo.save_to_file(self.test_file)
+        self.assertEqual(detect_format(self.test_file).name, FORMAT_BINARY)
+
+        loaded = ToDoList()
+        loaded.load_from_file(self.test_file)
+        self.assertEqual([(t.id, t.title, t.completed) for t in loaded.tasks],
+                         [(2, "Café ☕", False), (3, "Third", True)])
+        tasks = list(iter_snapshot(self.test_file, chunk_size=3))
+        self.assertEqual([t.title for t in tasks], ["Café ☕", "Third"])
+
+    def test_saves_keep_the_format_of_the_file(self):
+        """
+        Without file_format a save keeps the format the project has, new files are JSON.
+        Merging into a binary project and compacting it keeps it binary.
+        """
+        plain = ToDoList()
+        plain.add_task("Plain")
+        plain.save_to_file(self.test_file)
+        self.assertEqual(detect_format(self.test_file).name, FORMAT_JSON)
+
+        self.todo.save_to_file(self.test_file)
+        other = ToDoList(compact_threshold=1)
+        other.add_task("Merged")
+        other.merge_and_save_to_file(self.test_file)
+        self.assertFalse(os.path.exists(self.test_file + ".journal"))    # Compacted
+        self.assertEqual(detect_format(self.test_file).name, FORMAT_BINARY)
+        self.assertEqual([t.title for t in iter_snapshot(self.test_file)], ["Café ☕", "Third", "Merged"])
+
+    def test_truncated_binary_file(self):
+        """
+        A binary file that ends inside a record is reported instead of silently losing a task.
+        """
+        self.todo.save_to_file(self.test_file)
+        with open(self.test_file, "rb+") as f:
+            f.truncate(os.path.getsize(self.test_file) - 2)
+        with self.assertRaises(ValueError):
+            list(iter_snapshot(self.test_file))
+        with self.assertRaises(ValueError):
+            ToDoList(file_format="yaml")
+
+class TestMappedProject(unittest.TestCase):
+    """Tests for opening indexed project files with load_mapped()."""
+
+    def setUp(self):
+        """Save 100 tasks (one deleted, so ids have a gap) in the indexed format."""
+        self.test_file = "test_mapped.json"
+        todo = ToDoList(file_format=FORMAT_INDEXED)
+        for i in range(1, 101):
+            todo.add_task(f"Task {i}")
+        todo.delete_task(10)
+        todo.mark_task_completed(1)
+        todo.save_to_file(self.test_file)
+
+    def tearDown(self):
+        """Remove the project and its journal."""
+        for path in (self.test_file, self.test_file + ".journal", self.test_file + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_random_access_without_loading(self):
+        """
+        Tasks, ids and counts are read from the file on demand, the list stays mapped.
+        """
+        todo = ToDoList()
+        todo.load_mapped(self.test_file)
+        self.assertEqual(len(todo.tasks), 99)
+        self.assertEqual(todo.tasks[50].title, "Task 52")
+        self.assertEqual(todo.tasks[-1].title, "Task 100")
+        self.assertEqual([t.id for t in todo.tasks[8:10]], [9, 11])
+        self.assertEqual(todo.get_task(11).title, "Task 11")
+        self.assertIsNone(todo.get_task(10))
+        self.assertEqual((todo.active_count, todo.completed_count), (98, 1))
+        self.assertIsNotNone(todo._mapped)
+        todo.close()
+
+    def test_complete_flips_the_file_in_place(self):
+        """
+        Completing a mapped task changes the file without rewriting it.
+        """
+        size = os.path.getsize(self.test_file)
+        todo = ToDoList(journal=True)
+        todo.load_mapped(self.test_file)
+        todo.mark_task_completed(50)
+        self.assertTrue(todo.mark_task_completed_by_id(100))
+        self.assertEqual(todo.completed_count, 3)
+        todo.close()
+
+        self.assertFalse(os.path.exists(self.test_file + ".journal"))
+        self.assertEqual(os.path.getsize(self.test_file), size)
+        loaded = ToDoList()
+        loaded.load_from_file(self.test_file)
+        self.assertEqual([t.id for t in loaded.tasks if t.completed], [1, 51, 100])
+
+    def test_complete_keeps_records_of_other_writers(self):
+        """
+        Tasks another list journaled while the file is mapped survive completing a mapped task.
+        """
+        mapped = ToDoList()
+        mapped.load_mapped(self.test_file)
+        other = ToDoList(journal=True)
+        other.load_from_file(self.test_file)
+        other.add_task("added by the other list")
+        other.close()
+        self.assertTrue(mapped.mark_task_completed_by_id(50))
+        mapped.close()
+        loaded = ToDoList()
+        loaded.load_from_file(self.test_file)
+        self.assertEqual(loaded.tasks[-1].title, "added by the other list")
+        self.assertTrue(loaded.get_task(50).completed)
+
+    def test_changes_load_the_list(self):
+        """
+        Adding a task loads the whole list first, the change is journaled as usual.
+        """
+        todo = ToDoList(journal=True)
+        todo.load_mapped(self.test_file)
+        todo.add_task("New")
+        self.assertIsNone(todo._mapped)
+        self.assertEqual(len(todo.tasks), 100)
+        todo.close()
+
+        loaded = ToDoList()
+        loaded.load_from_file(self.test_file)
+        self.assertEqual(loaded.tasks[-1].title, "New")
+        self.assertEqual(loaded.completed_count, 1)
+
+        loaded.file_format = FORMAT_JSON
+        loaded.save_to_file(self.test_file)
+        with self.assertRaises(ValueError):         # Plain JSON cannot be mapped
+            ToDoList().load_mapped(self.test_file)
+
+class TestSqliteStorage(unittest.TestCase):
+    """Tests for projects stored in an SQLite database."""
+
+    def setUp(self):
+        """Work in a temporary folder, with a list of three tasks."""
+        self.folder = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.folder, "Work.db")
+        self.todo = ToDoList()
+        for title in ("A", "B", "C"):
+            self.todo.add_task(title)
+
+    def tearDown(self):
+        """Close the lists and remove the temporary folder."""
+        self.todo.close()
+        shutil.rmtree(self.folder)
+
+    def rows(self):
+        """Read the tasks table with a separate connection, like another process would."""
+        connection = sqlite3.connect(self.db_file)
+        try:
+            return connection.execute("SELECT id, title, completed FROM tasks ORDER BY seq").fetchall()
+        finally:
+            connection.close()
+
+    def test_every_change_updates_one_row(self):
+        """
+        After saving to a .db file, adds, completions and deletes reach the database
+        right away, without another save. The database runs in WAL mode.
+        """
+        self.todo.save_to_file(self.db_file)
+        self.assertEqual(detect_format(self.db_file).name, FORMAT_SQLITE)
+        connection = sqlite3.connect(self.db_file)
+        self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        connection.close()
+
+        self.todo.add_task("D")
+        self.todo.mark_task_completed(1)
+        self.todo.delete_task(2)
+        self.assertEqual(self.rows(), [(1, "A", 1), (3, "C", 0), (4, "D", 0)])
+
+        loaded = ToDoList()
+        loaded.load_from_file(self.db_file)
+        self.assertEqual([(t.id, t.title, t.completed) for t in loaded.tasks],
+                         [(1, "A", True), (3, "C", False), (4, "D", False)])
+        loaded.close()
+
+    def test_two_lists_share_a_database(self):
+        """
+        Two lists adding to the same database never overwrite each other's tasks:
+        a taken id is replaced by a free one.
+        """
+        self.todo.save_to_file(self.db_file)
+        other = ToDoList(defer_writes=True)
+        other.load_from_file(self.db_file)
+
+        other.add_task("From other")
+        self.todo.add_task("From first")       # Written first, takes id 4
+        other.mark_task_completed(4)
+        other.flush()
+        self.assertEqual(other.tasks[-1].id, 5)
+        self.assertEqual(other.get_task(5).title, "From other")
+        self.assertEqual(self.rows()[3:], [(4, "From first", 0), (5, "From other", 1)])
+        other.close()
+
+    def test_import_and_export(self):
+        """
+        JSON projects can be imported into a database and exported back, merging
+        into a database inserts rows.
+        """
+        json_file = os.path.join(self.folder, "Work.json")
+        self.todo.mark_task_completed(2)
+        self.todo.save_to_file(json_file)
+
+        self.assertEqual(convert_project(json_file, self.db_file), 3)
+        self.assertEqual(self.rows(), [(1, "A", 0), (2, "B", 1), (3, "C", 0)])
+
+        extra = ToDoList()
+        extra.add_task("Merged")
+        extra.merge_and_save_to_file(self.db_file)
+        convert_project(self.db_file, json_file)
+        with open(json_file, "r") as f:
+            self.assertEqual([item["title"] for item in json.load(f)], ["A", "B", "C", "Merged"])
+
+        info = ProjectCatalog(self.folder).projects()[0]
+        self.assertEqual((info.filename, info.tasks, info.completed), ("Work.db", 4, 1))
+
+class TestBulkOperations(unittest.TestCase):
+    """Tests for add_tasks, complete_tasks, delete_tasks, clear_completed and parse_ranges."""
+
+    def setUp(self):
+        """Save a journaled project with ten tasks and count how often changes are written."""
+        self.test_file = "test_bulk.json"
+        self.todo = ToDoList(journal=True)
+        self.todo.save_to_file(self.test_file)
+        self.todo.add_tasks(f"Task {i}" for i in range(1, 11))
+
+        self.writes = []
+        original_write = self.todo._write_pending
+        self.todo._write_pending = lambda: self.writes.append(len(self.todo._pending)) or original_write()
+
+    def tearDown(self):
+        """Remove the project and its journal."""
+        self.todo.close()
+        for path in (self.test_file, self.test_file + ".journal", self.test_file + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def reload(self):
+        """Load the project into a new list, journal included."""
+        loaded = ToDoList()
+        loaded.load_from_file(self.test_file)
+        return loaded
+
+    def test_bulk_changes_are_written_once(self):
+        """
+        Every bulk call writes all its records in one write, ids never shift.
+        """
+        self.assertEqual([t.id for t in self.todo.add_tasks(["A", "B"])], [11, 12])
+        self.assertEqual(self.todo.complete_tasks([2, 4, 4, 99]), 2)
+        self.assertEqual(self.todo.delete_tasks([1, 3, 5, 99]), 3)
+        self.assertEqual(self.writes, [2, 2, 3])
+
+        titles = [t.title for t in self.todo.tasks]
+        self.assertEqual(titles, ["Task 2", "Task 4", "Task 6", "Task 7", "Task 8",
+                                  "Task 9", "Task 10", "A", "B"])
+        self.assertEqual([t.title for t in self.reload().tasks], titles)
+
+    def test_clear_completed(self):
+        """
+        clear_completed() removes exactly the completed tasks, in one write.
+        """
+        self.todo.complete_tasks(range(1, 11, 2))
+        self.writes.clear()
+        self.assertEqual(self.todo.clear_completed(), 5)
+        self.assertEqual(self.writes, [5])
+        self.assertEqual([t.id for t in self.reload().tasks], [2, 4, 6, 8, 10])
+        self.assertEqual(self.todo.clear_completed(), 0)
+
+    def test_parse_ranges(self):
+        """
+        Ranges and single numbers can be mixed, anything outside the list is rejected.
+        """
+        self.assertEqual(parse_ranges("3-5, 9,4", 10), [3, 4, 5, 9])
+        for text in ("0", "8-11", "5-3", "a", "", "-2"):
+            with self.assertRaises(ValueError):
+                parse_ranges(text, 10)
+
+class TestBatchCommands(unittest.TestCase):
+    """Tests for the non-interactive commands (python todo.py add/done/rm/ls/import/export/stats)."""
+
+    def setUp(self):
+        """Work in a temporary folder."""
+        self.folder = tempfile.mkdtemp()
+        self.project = os.path.join(self.folder, "batch.json")
+
+    def tearDown(self):
+        """Remove the folder with everything the commands wrote."""
+        shutil.rmtree(self.folder)
+
+    def run_command(self, *argv, stdin=""):
+        """Run one command with the given stdin and return (exit status, printed output)."""
+        output = io.StringIO()
+        original_stdin = sys.stdin
+        sys.stdin = io.StringIO(stdin)
+        try:
+            with contextlib.redirect_stdout(output):
+                status = run_command(list(argv))
+        finally:
+            sys.stdin = original_stdin
+        return status, output.getvalue()
+
+    def titles(self):
+        """Load the project and return (title, completed) of every task."""
+        loaded = ToDoList()
+        loaded.load_from_file(self.project)
+        return [(t.title, t.completed) for t in loaded.tasks]
+
+    def test_add_from_arguments_and_stdin(self):
+        """
+        Titles come from the arguments or from stdin, blank lines are skipped.
+        """
+        self.assertEqual(self.run_command("add", self.project, "A", "B")[0], 0)
+        status, output = self.run_command("add", self.project, stdin="C\n\nD\n")
+        self.assertEqual(status, 0)
+        self.assertIn("2 task(s) added", output)
+        self.assertEqual([title for title, _ in self.titles()], ["A", "B", "C", "D"])
+
+    def test_big_import_is_one_save(self):
+        """
+        Thousands of stdin lines become one snapshot, not a journal that is compacted later.
+        """
+        self.run_command("add", self.project, "First")
+        lines = "".join(f"Task {i}\n" for i in range(5000))
+        self.run_command("add", self.project, stdin=lines)
+        self.assertFalse(os.path.exists(self.project + ".journal"))
+        self.assertEqual(len(self.titles()), 5001)
+
+    def test_format_only_for_new_projects(self):
+        """
+        --format chooses the format of a new project, an existing one in another format is refused.
+
+        Steps performed:
+            1. Create the project as binary with --format.
+            2. Adding a big batch (a full save) with the same format works.
+            3. Another format is refused and the project stays binary with its tasks.
+        """
+        self.assertEqual(self.run_command("add", self.project, "A", "--format", FORMAT_BINARY)[0], 0)
+        self.assertEqual(detect_format(self.project).name, FORMAT_BINARY)
+        lines = "".join(f"Task {i}\n" for i in range(5000))
+        self.assertEqual(self.run_command("add", self.project, "--format", FORMAT_BINARY, stdin=lines)[0], 0)
+
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            self.assertEqual(self.run_command("add", self.project, "B", "--format", FORMAT_JSON)[0], 2)
+            self.assertEqual(self.run_command("import", self.project, "-", "--format", FORMAT_JSON,
+                                              stdin="C\n")[0], 2)
+        self.assertIn("export", errors.getvalue())
+        self.assertEqual(detect_format(self.project).name, FORMAT_BINARY)
+        self.assertEqual(len(self.titles()), 5001)
+
+    def test_done_and_rm_by_position_and_id(self):
+        """
+        Selections are positions as printed by ls, or ids with --ids. Deletes never shift them.
+        """
+        self.run_command("add", self.project, "A", "B", "C", "D", "E")
+        self.run_command("done", self.project, "1,3")
+        self.run_command("rm", self.project, stdin="2\n4\n")
+        self.assertEqual(self.titles(), [("A", True), ("C", True), ("E", False)])
+        self.run_command("done", self.project, "5", "--ids")
+        self.assertEqual(self.run_command("ls", self.project, "--status", "open")[1], "")
+
+        status, _ = self.run_command("rm", self.project, "1,9")
+        self.assertEqual(status, 2)
+        self.assertEqual(len(self.titles()), 3)
+        # An invalid selection changes nothing
+
+    def test_import_counts_only_merged_tasks(self):
+        """
+        import --dedupe reports the tasks it merged, not the ones it skipped.
+        """
+        self.run_command("add", self.project, "Buy milk", "Call mom")
+        output = self.run_command("import", self.project, "-", "--dedupe", stdin="Buy milk\nCall mom\n")[1]
+        self.assertIn("0 task(s) imported", output)
+        output = self.run_command("import", self.project, "-", "--dedupe", stdin="Call mom\nWalk dog\n")[1]
+        self.assertIn("1 task(s) imported", output)
+        self.assertEqual(len(self.titles()), 3)
+
+    def test_ids_after_the_option(self):
+        """
+        Ids can follow --ids ("done P.json --ids 5"), as the README shows the command.
+        """
+        self.run_command("add", self.project, "A", "B", "C", "D")
+        self.assertEqual(self.run_command("done", self.project, "--ids", "2")[0], 0)
+        self.assertEqual(self.run_command("rm", self.project, "--ids", "1", "3")[0], 0)
+        self.assertEqual(self.titles(), [("B", True), ("D", False)])
+        self.assertEqual(self.run_command("plan", self.project, "--ids", "4", "--priority", "1")[0], 0)
+        loaded = ToDoList()
+        loaded.load_from_file(self.project)
+        self.assertEqual(loaded.get_task(4).priority, 1)
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(self.run_command("plan", self.project, "--priority", "1")[0], 2)
+
+    def test_ls_import_export_stats(self):
+        """
+        ls prints positions, import merges without loading, export copies to any format.
+        """
+        self.run_command("add", self.project, "Buy milk", "Call mom")
+        self.run_command("done", self.project, "2")
+        self.assertEqual(self.run_command("ls", self.project)[1], "1. [❌ Buy milk]\n2. [✅ Call mom]\n")
+        self.assertEqual(self.run_command("ls", self.project, "--search", "mil")[1], "1. [❌ Buy milk]\n")
+
+        self.run_command("import", self.project, "-", "--dedupe", stdin="Buy milk\nWalk dog\n")
+        database = os.path.join(self.folder, "batch.db")
+        self.run_command("export", self.project, database)
+        self.assertEqual(detect_format(database).name, FORMAT_SQLITE)
+        self.assertEqual(self.run_command("export", database, "-")[1], "Buy milk\nCall mom\nWalk dog\n")
+
+        output = self.run_command("stats", database)[1]
+        self.assertIn("tasks:    3", output)
+        self.assertIn("done:     1", output)
+        self.assertEqual(self.run_command("stats", os.path.join(self.folder, "missing.json"))[0], 1)
+
+class TestInstrumentation(unittest.TestCase):
+    """Tests for the opt-in timing and profiling of loads, saves and merges."""
+
+    def setUp(self):
+        """Work in a temporary folder, with the instrumentation switched off."""
+        self.folder = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.folder, "test_profile.json")
+        INSTRUMENTATION.disable()
+
+    def tearDown(self):
+        """Switch the instrumentation off again and remove the folder."""
+        INSTRUMENTATION.disable()
+        os.environ.pop("TODO_PROFILE", None)
+        shutil.rmtree(self.folder)
+
+    def test_disabled_by_default(self):
+        """
+        Without the variable or the option nothing is measured.
+        """
+        self.assertEqual(configure_instrumentation([]), [])
+        ToDoList().save_to_file(self.test_file)
+        self.assertIsNone(INSTRUMENTATION.mode)
+        self.assertEqual(INSTRUMENTATION.stats, {})
+
+    def test_records_calls_time_and_bytes(self):
+        """
+        Loads, saves and merges are counted with the bytes they read or wrote.
+        """
+        os.environ["TODO_PROFILE"] = "1"
+        self.assertEqual(configure_instrumentation(["extra"]), ["extra"])
+        todo = ToDoList()
+        todo.add_tasks(["Task 1", "Task 2"])
+        todo.save_to_file(self.test_file)
+        size = os.path.getsize(self.test_file)
+        ToDoList().load_from_file(self.test_file)
+        todo.merge_and_save_to_file(self.test_file)
+
+        stats = INSTRUMENTATION.stats
+        self.assertEqual(stats["save"][0], 1)
+        self.assertEqual(stats["save"][3], size)
+        self.assertEqual(stats["load"][:1] + stats["load"][3:], [1, size])
+        self.assertEqual(stats["merge"][3], os.path.getsize(self.test_file + ".journal"))
+        self.assertGreater(stats["save"][1], 0)
+        self.assertIn("merge", INSTRUMENTATION.summary())
+
+    def test_journal_and_database_writes_are_saves(self):
+        """
+        Journal appends and database writes, the app's normal way of saving, count as saves.
+        """
+        ToDoList().save_to_file(self.test_file)
+        database = os.path.join(self.folder, "test_profile.db")
+        ToDoList().save_to_file(database)
+        configure_instrumentation(["--profile"])
+        todo = ToDoList(journal=True)
+        todo.load_from_file(self.test_file)
+        todo.add_task("Task 1")
+        todo.close()
+        stats = INSTRUMENTATION.stats
+        self.assertEqual(stats["save"][0], 1)
+        self.assertEqual(stats["save"][3], os.path.getsize(self.test_file + ".journal"))
+
+        todo = ToDoList()
+        todo.load_from_file(database)
+        todo.add_task("Task 1")
+        todo.close()
+        self.assertEqual(stats["save"][0], 2)
+
+    def test_cprofile_mode_writes_profiles(self):
+        """
+        The cprofile mode writes one .prof file per operation that pstats can read.
+        """
+        configure_instrumentation(["--profile", PROFILE_CPROFILE, "--profile-dir", self.folder])
+        todo = ToDoList()
+        todo.add_task("Task 1")
+        todo.save_to_file(self.test_file)
+        todo.save_to_file(self.test_file)
+
+        paths = INSTRUMENTATION.write_profiles()
+        self.assertEqual(paths, [os.path.join(self.folder, "save.prof")])
+        stats = pstats.Stats(paths[0])
+        self.assertTrue(any(name == "save_to_file" for _, _, name in stats.stats))
+
+class TestUndoRedo(unittest.TestCase):
+    """Tests for undo() and redo() with inverse deltas."""
+
+    def setUp(self):
+        """Create a list with five tasks."""
+        self.todo = ToDoList()
+        self.todo.add_tasks(["A", "B", "C", "D", "E"])
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the projects written by the tests."""
+        self.todo.close()
+        shutil.rmtree(self.folder)
+
+    def state(self, todo_list=None):
+        """Return (title, completed) of every task, in list order."""
+        return [(t.title, t.completed) for t in (todo_list or self.todo).tasks]
+
+    def test_undo_redo_single_operations(self):
+        """
+        A deleted task comes back at its position, a completed one is open again.
+        """
+        before = self.state()
+        self.todo.delete_task(2)
+        self.todo.mark_task_completed_by_id(4)
+        self.todo.delete_task_by_id(4)
+        self.assertTrue(self.todo.undo())
+        self.assertTrue(self.todo.undo())
+        self.assertTrue(self.todo.undo())
+        self.assertEqual(self.state(), before)
+        self.assertEqual([t.id for t in self.todo.tasks], [1, 2, 3, 4, 5])
+        self.assertEqual(len(self.todo.active_tasks), 5)
+
+        self.assertTrue(self.todo.redo())
+        self.assertEqual([t.title for t in self.todo.tasks], ["A", "C", "D", "E"])
+        self.todo.add_task("F")
+        self.assertFalse(self.todo.redo())
+        # A new change drops what could be redone
+        self.assertTrue(self.todo.undo())
+        self.assertEqual([t.title for t in self.todo.tasks], ["A", "C", "D", "E"])
+
+    def test_bulk_operations_undo_as_one(self):
+        """
+        A bulk operation is undone in one step, the order of the list comes back exactly.
+        """
+        before = self.state()
+        self.todo.complete_tasks([1, 3, 5])
+        self.todo.clear_completed()
+        self.todo.add_tasks(["F", "G"])
+        self.assertEqual([t.title for t in self.todo.tasks], ["B", "D", "F", "G"])
+        self.todo.undo()
+        self.todo.undo()
+        self.assertEqual(self.state(), [("A", True), ("B", False), ("C", True), ("D", False), ("E", True)])
+        self.todo.undo()
+        self.assertEqual(self.state(), before)
+
+        self.todo.redo()
+        self.todo.redo()
+        self.assertEqual([t.title for t in self.todo.tasks], ["B", "D"])
+        self.assertEqual(self.todo.search("c"), [])
+
+    def test_undo_reaches_the_project_file(self):
+        """
+        Undone changes are journaled, a reload (JSON or SQLite) shows the restored order.
+        """
+        for name in ("undo.json", "undo.db"):
+            path = os.path.join(self.folder, name)
+            self.todo.save_to_file(path)
+            todo_list = ToDoList(journal=True)
+            todo_list.load_from_file(path)
+            todo_list.delete_tasks([2, 4])
+            todo_list.complete_tasks([3])
+            todo_list.delete_task(1)
+            todo_list.undo()
+            todo_list.undo()
+            todo_list.undo()
+            todo_list.redo()
+            self.assertEqual(self.state(todo_list), [("A", False), ("C", False), ("E", False)])
+            todo_list.undo()
+            todo_list.close()
+
+            loaded = ToDoList()
+            loaded.load_from_file(path)
+            self.assertEqual(self.state(loaded), self.state())
+            self.assertEqual([t.id for t in loaded.tasks], [1, 2, 3, 4, 5])
+
+    def test_history_is_bounded(self):
+        """
+        Only undo_limit operations are kept, an operation bigger than the delta budget clears the history.
+        """
+        todo_list = ToDoList(undo_limit=2)
+        for title in ("A", "B", "C"):
+            todo_list.add_task(title)
+        self.assertTrue(todo_list.undo())
+        self.assertTrue(todo_list.undo())
+        self.assertFalse(todo_list.undo())
+        self.assertEqual([t.title for t in todo_list.tasks], ["A"])
+
+        original = todo.UNDO_MAX_DELTAS
+        todo.UNDO_MAX_DELTAS = 3
+        try:
+            self.todo.delete_task(1)
+            self.todo.delete_tasks([2, 3, 4, 5])
+            self.assertFalse(self.todo.can_undo)
+        finally:
+            todo.UNDO_MAX_DELTAS = original
+
+class TestLiveReload(unittest.TestCase):
+    """Tests for two lists (two programs) sharing one project file."""
+
+    def setUp(self):
+        """Save a project with three tasks and open it twice in journal mode."""
+        self.folder = tempfile.mkdtemp()
+        self.project = os.path.join(self.folder, "Shared.json")
+        base = ToDoList()
+        base.add_tasks(["A", "B", "C"])
+        base.save_to_file(self.project)
+        self.cli = ToDoList(journal=True)
+        self.cli.load_from_file(self.project)
+        self.gui = ToDoList(journal=True)
+        self.gui.load_from_file(self.project)
+
+    def tearDown(self):
+        """Close both lists and remove the project."""
+        self.cli.close()
+        self.gui.close()
+        shutil.rmtree(self.folder)
+
+    def state(self, todo_list):
+        """Return (id, title, completed) of every task, in list order."""
+        return [(t.id, t.title, t.completed) for t in todo_list.tasks]
+
+    def on_disk(self):
+        """Return the state a fresh load of the project sees."""
+        fresh = ToDoList()
+        fresh.load_from_file(self.project)
+        return self.state(fresh)
+
+    def test_reload_applies_new_records(self):
+        """
+        Records the other list appended are replayed, the untouched tasks keep their objects.
+        """
+        shown = self.gui.tasks[0]
+        self.cli.add_task("D")
+        self.cli.mark_task_completed_by_id(2)
+        self.assertTrue(self.gui.reload_changes())
+        self.assertEqual(self.state(self.gui), self.on_disk())
+        self.assertIs(self.gui.tasks[0], shown)
+        self.assertFalse(self.gui.reload_changes())
+
+    def test_read_and_apply_changes_separately(self):
+        """
+        Changes read on a background thread are applied later, or dropped if the list wrote in between.
+
+        Steps performed:
+            1. Read the CLI's new task on a thread, the list does not change before apply_changes().
+            2. Read again, then let the list write a task of its own: the stale changes are dropped.
+            3. Nothing is lost: the write itself caught up with the CLI's task first.
+        """
+        self.cli.add_task("D")
+        result = []
+        reader = threading.Thread(target=lambda: result.append(self.gui.read_changes()))
+        reader.start()
+        reader.join()
+        self.assertEqual(len(self.gui.tasks), 3)
+        self.assertTrue(self.gui.apply_changes(result[0]))
+        self.assertEqual(self.state(self.gui), self.on_disk())
+        self.assertIsNone(self.gui.read_changes())
+
+        self.cli.add_task("E")
+        changes = self.gui.read_changes()
+        self.gui.add_task("F")
+        self.assertFalse(self.gui.apply_changes(changes))
+        self.assertIsNone(self.gui.read_changes())
+        self.assertEqual([t.title for t in self.gui.tasks], ["A", "B", "C", "D", "E", "F"])
+        self.assertEqual(self.state(self.gui), self.on_disk())
+
+    def test_same_new_id_is_not_lost(self):
+        """
+        Both lists add a task with the same next id, the later writer gives its task another one.
+        """
+        self.cli.add_task("from the CLI")
+        self.gui.add_task("from the GUI")
+        self.assertEqual([t.title for t in self.gui.tasks][-1], "from the GUI")
+        titles = [title for _, title, _ in self.on_disk()]
+        self.assertEqual(titles, ["A", "B", "C", "from the CLI", "from the GUI"])
+        self.cli.reload_changes()
+        self.gui.reload_changes()
+        self.assertEqual(self.state(self.cli), self.on_disk())
+        self.assertEqual(self.state(self.gui), self.on_disk())
+
+    def test_pending_changes_stay_on_top(self):
+        """
+        Changes not written yet survive a reload and end up in the file with the others.
+        """
+        self.gui.defer_writes = True
+        self.gui.add_task("pending")
+        self.gui.delete_task_by_id(1)
+        self.cli.add_task("written")
+        self.assertTrue(self.gui.reload_changes())
+        self.assertEqual([t.title for t in self.gui.tasks], ["B", "C", "written", "pending"])
+        self.gui.flush()
+        self.assertEqual(self.state(self.gui), self.on_disk())
+
+    def test_save_after_compaction_elsewhere(self):
+        """
+        A compaction by the other list is adopted, and our save does not drop its changes.
+        """
+        shown = self.gui.tasks[1]
+        self.gui.defer_writes = True
+        self.cli.add_task("D")
+        self.cli.compact()
+        self.gui.mark_task_completed_by_id(2)
+        self.gui.flush()
+        # Written like write-behind does it, without having seen the compaction
+        self.assertTrue(self.gui.reload_changes())
+        self.assertIs(self.gui.tasks[1], shown)
+        self.gui.save_to_file(self.project)
+        self.assertEqual(self.on_disk(), [(1, "A", False), (2, "B", True), (3, "C", False), (4, "D", False)])
+        self.assertTrue(self.cli.reload_changes())
+        self.assertEqual(self.state(self.cli), self.on_disk())
+
+    def test_undo_after_reload(self):
+        """
+        Undo still takes back our own change after tasks of the other list came in.
+        """
+        self.gui.delete_task_by_id(2)
+        self.cli.add_task("D")
+        self.gui.reload_changes()
+        self.assertTrue(self.gui.undo())
+        self.assertEqual([t.title for t in self.gui.tasks], ["A", "B", "C", "D"])
+        self.assertEqual(self.state(self.gui), self.on_disk())
+
+    def test_list_without_journal_refuses_to_overwrite(self):
+        """
+        Without a journal our unsaved changes cannot be merged, so the save raises.
+        """
+        plain = ToDoList()
+        plain.load_from_file(self.project)
+        plain.add_task("mine")
+        self.cli.add_task("theirs")
+        self.cli.compact()
+        with self.assertRaises(ProjectChangedError):
+            plain.save_to_file(self.project)
+        self.assertIn((4, "theirs", False), self.on_disk())
+
+    def test_list_without_journal_keeps_journaled_tasks(self):
+        """
+        Records another list only journaled are not thrown away by a save without a journal.
+        """
+        plain = ToDoList()
+        plain.load_from_file(self.project)
+        self.cli.add_task("journaled")
+        plain.add_task("from the plain list")
+        with self.assertRaises(ProjectChangedError):
+            plain.save_to_file(self.project)
+        self.assertIn((4, "journaled", False), self.on_disk())
+
+    def test_database_changes(self):
+        """
+        A database project notices commits of other connections.
+        """
+        database = os.path.join(self.folder, "Shared.db")
+        convert_project(self.project, database)
+        first = ToDoList(journal=True)
+        first.load_from_file(database)
+        second = ToDoList(journal=True)
+        second.load_from_file(database)
+        try:
+            self.assertFalse(second.reload_changes())
+            first.add_task("D")
+            first.mark_task_completed_by_id(1)
+            self.assertTrue(second.reload_changes())
+            self.assertEqual(self.state(second), self.state(first))
+            self.assertFalse(second.reload_changes())
+        finally:
+            first.close()
+            second.close()
+
+
+class TestProjectLocking(unittest.TestCase):
+    """Tests for the project lock and for many processes writing one project."""
+
+    def setUp(self):
+        """Save an empty project in a temporary folder."""
+        self.folder = tempfile.mkdtemp()
+        self.project = os.path.join(self.folder, "Shared.json")
+        ToDoList().save_to_file(self.project)
+        self.project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+    def tearDown(self):
+        """Remove the project, its journal and its lock file."""
+        shutil.rmtree(self.folder)
+
+    def lock_is_free(self):
+        """Ask another process whether it could take the lock right now."""
+        child = textwrap.dedent(f"""
+            import fcntl, sys
+            with open({self.project + ".lock"!r}, "a") as f:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    sys.exit(1)
+        """)
+        return subprocess.run([sys.executable, "-c", child]).returncode == 0
+
+    @unittest.skipIf(todo.fcntl is None, "no fcntl on this platform")
+    def test_lock_keeps_other_processes_out(self):
+        """
+        Other processes wait while we hold the lock, nested blocks of one thread do not.
+        """
+        with project_lock(self.project):
+            with project_lock(self.project, exclusive=False):
+                self.assertFalse(self.lock_is_free())
+            self.assertFalse(self.lock_is_free())
+        self.assertTrue(self.lock_is_free())
+
+    def test_loading_a_missing_project_leaves_no_lock_file(self):
+        """
+        Looking up a project that does not exist creates neither the project nor its lock file.
+        """
+        missing = os.path.join(self.folder, "Missing.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            ToDoList().load_from_file(missing)
+        self.assertEqual([name for name in os.listdir(self.folder) if name.startswith("Missing")], [])
+
+    def test_locked_writes_once(self):
+        """
+        Changes made in locked() are written together when the block ends.
+        """
+        todo_list = ToDoList(journal=True)
+        todo_list.load_from_file(self.project)
+        with todo_list.locked():
+            todo_list.add_tasks(["A", "B"])
+            todo_list.mark_task_completed_by_id(1)
+            self.assertFalse(os.path.exists(self.project + ".journal"))
+        with open(self.project + ".journal") as f:
+            self.assertEqual(len(f.readlines()), 4)     # header, two adds and the complete
+        self.assertFalse(todo_list.defer_writes)
+        todo_list.close()
+
+    def test_concurrent_writers_lose_nothing(self):
+        """
+        Writer processes that add tasks at the same time, through journal appends,
+        locked() batches and merges, lose no task and complete only their own.
+
+        Steps performed:
+        ----------------
+        1. Start four writer processes, each adds and completes its own tasks.
+        2. Wait for all of them.
+        3. Load the project: every task is there once, and exactly the first task of
+           every round is completed (completing by id hits the right task).
+        """
+        writers, rounds, batch = 4, 25, 3
+        child = textwrap.dedent(f"""
+            import sys
+            sys.path.insert(0, {self.project_dir!r})
+            from todo import ToDoList
+
+            writer = int(sys.argv[1])
+            todo_list = ToDoList(journal=True, compact_threshold=20)
+            todo_list.load_from_file({self.project!r})
+            for round_number in range({rounds}):
+                titles = [f"w{{writer}} r{{round_number}} t{{item}}" for item in range({batch})]
+                if writer % 3 == 2:
+                    source = ToDoList()
+                    source.add_tasks(titles)
+                    source.tasks[0].completed = True
+                    source.merge_and_save_to_file({self.project!r})
+                elif writer % 3 == 1:
+                    with todo_list.locked():
+                        todo_list.mark_task_completed_by_id(todo_list.add_tasks(titles)[0].id)
+                else:
+                    todo_list.mark_task_completed_by_id(todo_list.add_tasks(titles)[0].id)
+            todo_list.close()
+        """)
+        processes = [subprocess.Popen([sys.executable, "-c", child, str(n)])   # Step 1
+                     for n in range(writers)]
+        self.assertEqual([process.wait() for process in processes], [0] * writers)   # Step 2
+
+        result = ToDoList()
+        result.load_from_file(self.project)                                        # Step 3
+        titles = sorted(task.title for task in result.tasks)
+        expected = sorted(f"w{w} r{r} t{i}" for w in range(writers) for r in range(rounds) for i in range(batch))
+        self.assertEqual(titles, expected)
+        self.assertEqual(len({task.id for task in result.tasks}), len(result.tasks))
+        for task in result.tasks:
+            self.assertEqual(task.completed, task.title.endswith(" t0"), task.title)
+
+
+class TestPrioritiesAndDueDates(unittest.TestCase):
+    """Tests for task priorities, due dates and the views built on them."""
+
+    def setUp(self):
+        """Create a list with a few planned tasks. Wednesday 2026-10-14 is "today"."""
+        self.folder = tempfile.mkdtemp()
+        self.today = date(2026, 10, 14)
+        self.todo = ToDoList()
+        self.todo.add_task("Someday")
+        self.todo.add_task("Pay rent", PRIORITY_HIGH, date(2026, 10, 10))
+        self.todo.add_task("Dentist", PRIORITY_NORMAL, date(2026, 10, 16))
+        self.todo.add_task("Taxes", PRIORITY_HIGH, date(2026, 10, 30))
+        self.todo.add_task("Water plants", None, date(2026, 10, 14))
+
+    def tearDown(self):
+        """Remove the temporary project files."""
+        shutil.rmtree(self.folder)
+
+    def titles(self, tasks):
+        return [task.title for task in tasks]
+
+    def test_views(self):
+        """
+        next_tasks() orders by priority, then due date. Overdue and this week split on today and Sunday.
+        """
+        self.assertEqual(self.titles(self.todo.next_tasks(3)), ["Pay rent", "Taxes", "Dentist"])
+        self.assertEqual(self.titles(self.todo.overdue_tasks(self.today)), ["Pay rent"])
+        self.assertEqual(self.titles(self.todo.due_this_week(self.today)), ["Water plants", "Dentist"])
+
+    def test_views_follow_changes(self):
+        """
+        Completing, deleting and planning tasks updates the views, and undo takes a plan back.
+
+        Steps performed:
+        1. Build the index with a first query, then complete "Pay rent" and delete "Taxes".
+        2. Give "Someday" the highest priority and a due date this week.
+        3. Undo the plan and uncomplete "Pay rent".
+        """
+        self.todo.next_tasks()
+        rent, taxes, someday = (self.todo.search(title)[0] for title in ("rent", "taxes", "someday"))
+        rent.completed = True
+        self.todo.delete_task_by_id(taxes.id)
+        self.assertEqual(self.titles(self.todo.next_tasks()), ["Dentist", "Water plants", "Someday"])
+        self.assertEqual(self.todo.overdue_tasks(self.today), [])
+
+        self.todo.plan_task(someday.id, PRIORITY_HIGH, date(2026, 10, 15))
+        self.assertEqual(self.titles(self.todo.next_tasks(1)), ["Someday"])
+        self.assertEqual(self.titles(self.todo.due_this_week(self.today)), ["Water plants", "Someday", "Dentist"])
+
+        self.todo.undo()
+        rent.completed = False
+        self.assertEqual((someday.priority, someday.due), (None, None))
+        self.assertEqual(self.titles(self.todo.next_tasks(2)), ["Pay rent", "Dentist"])
+
+    def test_invalid_priority(self):
+        """
+        Priorities outside PRIORITIES are refused.
+        """
+        with self.assertRaises(ValueError):
+            self.todo.add_task("Nope", priority=7)
+        self.assertEqual(parse_due("+3", self.today), date(2026, 10, 17))
+        with self.assertRaises(ValueError):
+            parse_due("next week")
+
+    def test_plans_survive_every_format(self):
+        """
+        Priorities and due dates are saved and loaded in every format, and journaled in journal mode.
+        """
+        expected = [(task.title, task.priority, task.due) for task in self.todo.tasks]
+        for file_format in (FORMAT_JSON, FORMAT_BINARY, FORMAT_INDEXED, FORMAT_SQLITE):
+            filename = os.path.join(self.folder, f"Plans.{file_format}")
+            self.todo.file_format = file_format
+            self.todo.save_to_file(filename)
+            loaded = ToDoList()
+            loaded.load_from_file(filename)
+            self.assertEqual([(task.title, task.priority, task.due) for task in loaded.tasks], expected, file_format)
+            loaded.close()
+        self.todo.close()
+        mapped = ToDoList()
+        mapped.load_mapped(os.path.join(self.folder, f"Plans.{FORMAT_INDEXED}"))
+        self.assertEqual(mapped.tasks[1].due, date(2026, 10, 10))
+        mapped.close()
+
+        filename = os.path.join(self.folder, "Journal.json")
+        ToDoList().save_to_file(filename)
+        journaled = ToDoList(journal=True)
+        journaled.load_from_file(filename)
+        journaled.add_task("Pay rent", PRIORITY_LOW)
+        journaled.plan_task(journaled.tasks[0].id, PRIORITY_HIGH, date(2026, 11, 1))
+        journaled.close()
+        loaded = ToDoList()
+        loaded.load_from_file(filename)
+        self.assertEqual((loaded.tasks[0].priority, loaded.tasks[0].due), (PRIORITY_HIGH, date(2026, 11, 1)))
+
+    def test_old_binary_files_stay_version_1(self):
+        """
+        Projects without plans are written exactly as before, so older versions can still read them.
+        """
+        plain = ToDoList(file_format=FORMAT_BINARY)
+        plain.add_task("Buy milk")
+        filename = os.path.join(self.folder, "Plain.bin")
+        plain.save_to_file(filename)
+        with open(filename, "rb") as f:
+            self.assertEqual(f.read(6), todo.BinaryFormat.MAGIC)
+
+    def test_old_database_gets_columns(self):
+        """
+        A database from before priorities can be read, and gets the columns once it is opened for writing.
+        """
+        filename = os.path.join(self.folder, "Old.db")
+        connection = sqlite3.connect(filename)
+        connection.execute("CREATE TABLE tasks (id INTEGER PRIMARY KEY, seq INTEGER NOT NULL, "
+                           "title TEXT NOT NULL, completed INTEGER NOT NULL DEFAULT 0)")
+        connection.execute("INSERT INTO tasks VALUES (1, 1, 'Old task', 0)")
+        connection.commit()
+        connection.close()
+        self.assertEqual([task.title for task in iter_snapshot(filename)], ["Old task"])
+
+        old = ToDoList()
+        old.load_from_file(filename)
+        old.plan_task(1, PRIORITY_LOW, date(2026, 12, 24))
+        old.close()
+        loaded = ToDoList()
+        loaded.load_from_file(filename)
+        self.assertEqual((loaded.tasks[0].priority, loaded.tasks[0].due), (PRIORITY_LOW, date(2026, 12, 24)))
+        loaded.close()
+
+    def test_plan_command(self):
+        """
+        "todo.py plan" changes only the options it is given, "todo.py next" prints the views.
+        """
+        filename = os.path.join(self.folder, "Work.json")
+        self.todo.save_to_file(filename)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(run_command(["plan", filename, "1", "--priority", "2"]), 0)
+            self.assertEqual(run_command(["plan", filename, "2", "--due", "none"]), 0)
+        loaded = ToDoList()
+        loaded.load_from_file(filename)
+        self.assertEqual((loaded.tasks[0].priority, loaded.tasks[0].due), (PRIORITY_NORMAL, None))
+        self.assertEqual((loaded.tasks[1].priority, loaded.tasks[1].due), (PRIORITY_HIGH, None))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(run_command(["next", filename, "--count", "1"]), 0)
+        self.assertIn("Next:\n  4. Taxes (priority 1, due 2026-10-30)\n", output.getvalue())
+
+    def test_next_prints_positions(self):
+        """
+        "todo.py next" prints positions (what done, rm and plan take), not ids.
+        """
+        filename = os.path.join(self.folder, "Work.json")
+        self.todo.delete_task(1)
+        self.todo.save_to_file(filename)
+        self.assertEqual(self.todo.position_of(4), 3)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            run_command(["next", filename, "--count", "2"])
+            run_command(["done", filename, "3"])
+        self.assertIn("Next:\n  1. Pay rent (priority 1, due 2026-10-10)\n"
+                      "  3. Taxes (priority 1, due 2026-10-30)\n", output.getvalue())
+        loaded = ToDoList()
+        loaded.load_from_file(filename)
+        self.assertTrue(loaded.get_task(4).completed)
+
+
+class TestAtomicSave(unittest.TestCase):
+    """Tests for crash-safe saves (write to a temporary file, then rename)."""
+
+    def setUp(self):
+        """Write a project that must survive a crashing save."""
+        self.test_file = "test_atomic.json"
+        self.original = [{"id": 1, "title": "Keep me", "completed": False}]
+        with open(self.test_file, "w") as f:
+            json.dump(self.original, f)
+
+    def tearDown(self):
+        """Remove the project and temporary files left behind by the killed process."""
+        leftovers = glob.glob(self.test_file + ".lock") + glob.glob(".~" + self.test_file + "*.tmp")
+        for path in [self.test_file] + leftovers:
+            os.remove(path)
+
+    def test_killed_save_keeps_previous_file(self):
+        """
+        A process that dies in the middle of save_to_file leaves the old project intact.
+
+        Steps performed:
+        ----------------
+        1. Start a child process that loads the project and adds tasks.
+        2. Make json.dump write half of the data and then kill the process.
+        3. Assert the process died and the project still holds the original data.
+        """
+        project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        child = textwrap.dedent(f"""
+            import json, os, sys
+            sys.path.insert(0, {project_dir!r})
+            import todo
+
+            def dying_dump(data, f, **kwargs):
+                f.write('[{{"title": "half')
+                f.flush()
+                os._exit(3)             # Step 2: Die in the middle of writing
+
+            todo_list = todo.ToDoList()
+            todo_list.load_from_file({self.test_file!r})
+            for i in range(1000):
+                todo_list.add_task(f"New {{i}}")
+            todo.json.dump = dying_dump
+            todo_list.save_to_file({self.test_file!r})
+        """)
+        result = subprocess.run([sys.executable, "-c", child])   # Step 1: Run the child
+
+        self.assertEqual(result.returncode, 3)                    # Step 3a: It really died
+        with open(self.test_file) as f:
+            self.assertEqual(json.load(f), self.original)         # Step 3b: Old data intact
+
+    def test_fsync_policies(self):
+        """
+        Every fsync policy saves the same content, unknown policies are rejected.
+        """
+        for policy in ("always", "batched", "never"):
+            todo = ToDoList(fsync_policy=policy)
+            todo.add_task(policy)
+            todo.save_to_file(self.test_file)
+            with open(self.test_file) as f:
+                self.assertEqual(json.load(f)[0]["title"], policy)
+        with self.assertRaises(ValueError):
+            ToDoList(fsync_policy="sometimes")
+
+class TestWriteBehind(unittest.TestCase):
+    """Tests for the debounced write-behind mode of ToDoList."""
+
+    def setUp(self):
+        """Create a project with one task."""
+        self.test_file = "test_write_behind.json"
+        with open(self.test_file, "w") as f:
+            json.dump([{"id": 1, "title": "Old Task", "completed": False}], f)
+
+    def tearDown(self):
+        """Remove the project and its journal."""
+        for path in (self.test_file, self.test_file + ".journal", self.test_file + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def load(self):
+        """Return a fresh ToDoList loaded from the test project."""
+        todo = ToDoList()
+        todo.load_from_file(self.test_file)
+        return todo
+
+    def test_burst_is_written_once_after_debounce(self):
+        """
+        A burst of changes stays in memory until the list is quiet, then it is written.
+        """
+        todo = ToDoList(journal=True, write_behind=True, debounce=0.1)
+        todo.load_from_file(self.test_file)
+        saves = []
+        todo.on_saved = lambda: saves.append(len(todo.tasks))
+        for i in range(50):
+            todo.add_task(f"Burst {i}")
+        self.assertTrue(todo.dirty)
+        self.assertEqual(len(self.load().tasks), 1)     # Nothing on disk yet
+
+        time.sleep(0.4)
+        self.assertFalse(todo.dirty)
+        self.assertEqual(saves, [51])                   # One write for the whole burst
+        self.assertEqual(len(self.load().tasks), 51)
+        todo.close()
+
+    def test_max_latency_bounds_the_delay(self):
+        """
+        Changes that never stop are still written after max_latency seconds.
+        """
+        todo = ToDoList(write_behind=True, debounce=10, max_latency=0.2)
+        todo.load_from_file(self.test_file)
+        start = time.monotonic()
+        while len(self.load().tasks) == 1 and time.monotonic() - start < 2:
+            todo.add_task("Busy")                       # Never quiet for 10 seconds
+            time.sleep(0.01)
+        self.assertLess(time.monotonic() - start, 1)    # Written long before the debounce
+        todo.close()
+
+    def test_close_writes_pending_changes(self):
+        """
+        close() writes changes that are still waiting for the timer.
+        """
+        todo = ToDoList(write_behind=True, debounce=10)
+        todo.load_from_file(self.test_file)
+        todo.mark_task_completed(1)
+        todo.close()
+        self.assertTrue(self.load().tasks[0].completed)
+
+    def test_changes_do_not_wait_for_a_write(self):
+        """
+        While a background write is stuck, changes on another thread return right away.
+
+        Steps performed:
+            1. Start a compaction on a background thread that blocks inside the write.
+            2. Complete and add tasks on this thread while the write is still blocked.
+            3. Let the write finish: the changes made meanwhile are written afterwards.
+        """
+        todo_list = ToDoList(journal=True, write_behind=True, debounce=0.05)
+        todo_list.load_from_file(self.test_file)
+        writing = threading.Event()
+        release = threading.Event()
+        original = todo._write_snapshot
+
+        def stuck_write(*args, **kwargs):
+            writing.set()
+            release.wait(5)
+            original(*args, **kwargs)
+
+        todo._write_snapshot = stuck_write
+        try:
+            writer = threading.Thread(target=todo_list.compact)
+            writer.start()
+            self.assertTrue(writing.wait(5))
+            start = time.monotonic()
+            todo_list.mark_task_completed_by_id(1)
+            todo_list.add_task("Added during the write")
+            self.assertLess(time.monotonic() - start, 0.5)
+            self.assertTrue(writer.is_alive())          # The write is still blocked
+            release.set()
+            writer.join(5)
+        finally:
+            todo._write_snapshot = original
+        todo_list.close()
+        self.assertEqual([(t.title, t.completed) for t in self.load().tasks],
+                         [("Old Task", True), ("Added during the write", False)])
+
+class TestProjectCatalog(unittest.TestCase):
+    """Tests for the cached project index used by the project pickers."""
+
+    def setUp(self):
+        """Create a projects folder with two projects."""
+        self.folder = tempfile.mkdtemp()
+        self.write("Work.json", [{"id": 1, "title": "A", "completed": True},
+                                 {"id": 2, "title": "B", "completed": False}])
+        self.write("Home.json", [{"id": 1, "title": "C", "completed": False}])
+
+    def tearDown(self):
+        """Remove the projects folder."""
+        shutil.rmtree(self.folder)
+
+    def write(self, filename, data):
+        """Write a project file into the test folder."""
+        with open(os.path.join(self.folder, filename), "w") as f:
+            json.dump(data, f)
+
+    def test_counts_and_metadata(self):
+        """
+        Every project is listed with its task counts, temporary and index files are not.
+        """
+        open(os.path.join(self.folder, ".~Work.json123.tmp"), "w").close()
+        projects = ProjectCatalog(self.folder).projects()
+        self.assertEqual([p.name for p in projects], ["Home", "Work"])
+        self.assertEqual((projects[1].tasks, projects[1].completed, projects[1].active), (2, 1, 1))
+        self.assertIn("1/2 done", str(projects[1]))
+
+    def test_only_changed_projects_are_read_again(self):
+        """
+        A second scan (even from a new catalog, thanks to the index file) reads nothing,
+        a journal append makes only that project be counted again.
+        """
+        ProjectCatalog(self.folder).projects()
+
+        catalog = ProjectCatalog(self.folder)
+        counted = []
+        original_count = catalog._count
+        catalog._count = lambda filename, *args: counted.append(filename) or original_count(filename, *args)
+        catalog.projects()
+        self.assertEqual(counted, [])                   # Served from the index file
+
+        todo = ToDoList(journal=True)
+        todo.load_from_file(os.path.join(self.folder, "Home.json"))
+        todo.add_task("D")
+        todo.close()
+        projects = catalog.projects()
+        self.assertEqual(counted, ["Home.json"])        # Only the changed project
+        self.assertEqual(projects[0].tasks, 2)
+
+class TestProjectQueries(unittest.TestCase):
+    """Tests for the totals and the search over every project of a folder."""
+
+    def setUp(self):
+        """Create a projects folder with a JSON project, a database and a broken file."""
+        self.folder = tempfile.mkdtemp()
+        work = ToDoList()
+        work.add_tasks(["Send invoice", "Call bank", "Invoice archive"])
+        work.complete_tasks([1])
+        work.save_to_file(os.path.join(self.folder, "Work.json"))
+        home = ToDoList()
+        home.add_tasks(["Pay invoice", "Water plants"])
+        home.save_to_file(os.path.join(self.folder, "Home.db"))
+        home.close()
+        # Closed now, not by the garbage collector in the middle of a test (which changes the WAL file)
+        with open(os.path.join(self.folder, "Broken.json"), "w") as f:
+            f.write("[{")
+
+    def tearDown(self):
+        """Remove the projects folder."""
+        shutil.rmtree(self.folder)
+
+    def test_totals(self):
+        """
+        The totals add up every project, a broken one counts as empty.
+        """
+        totals = ProjectCatalog(self.folder).totals()
+        self.assertEqual(totals, {"projects": 3, "tasks": 5, "completed": 1, "active": 4})
+
+    def test_totals_leave_old_database_alone(self):
+        """
+        A database from before priorities is counted without being migrated or written.
+        """
+        filename = os.path.join(self.folder, "Old.db")
+        connection = sqlite3.connect(filename)
+        connection.execute("CREATE TABLE tasks (id INTEGER PRIMARY KEY, seq INTEGER NOT NULL, "
+                           "title TEXT NOT NULL, completed INTEGER NOT NULL DEFAULT 0)")
+        connection.execute("INSERT INTO tasks VALUES (1, 1, 'Old task', 1)")
+        connection.commit()
+        connection.close()
+        with open(filename, "rb") as f:
+            before = f.read()
+        totals = ProjectCatalog(self.folder).totals()
+        self.assertEqual(totals, {"projects": 4, "tasks": 6, "completed": 2, "active": 4})
+        with open(filename, "rb") as f:
+            self.assertEqual(f.read(), before)
+        connection = sqlite3.connect(filename)
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(tasks)")]
+        connection.close()
+        self.assertEqual(columns, ["id", "seq", "title", "completed"])
+
+    def test_search_all_projects(self):
+        """
+        Matches come with their project and position, status filters like ToDoList.search().
+        """
+        catalog = ProjectCatalog(self.folder)
+        found = catalog.search("invoice")
+        self.assertEqual({name: [(p, t.title) for p, t in matches] for name, matches in found.items()},
+                         {"Home.db": [(1, "Pay invoice")],
+                          "Work.json": [(1, "Send invoice"), (3, "Invoice archive")]})
+        found = catalog.search("voice", mode=SEARCH_SUBSTRING, status=STATUS_COMPLETED)
+        self.assertEqual(list(found), ["Work.json"])
+        self.assertEqual(catalog.search("   "), {})
+
+    def test_repeated_search_reads_only_changed_projects(self):
+        """
+        A repeated query is answered from the cache until a project changes.
+        """
+        catalog = ProjectCatalog(self.folder)
+        read = []
+        original = todo._search_project
+        todo._search_project = lambda path, **kwargs: read.append(os.path.basename(path)) or original(path, **kwargs)
+        try:
+            catalog.search("invoice")
+            self.assertEqual(len(read), 3)
+            read.clear()
+            catalog.search("invoice")
+            self.assertEqual(read, [])
+
+            work = ToDoList(journal=True)
+            work.load_from_file(os.path.join(self.folder, "Work.json"))
+            work.add_task("New invoice")
+            work.close()
+            found = catalog.search("invoice")
+            self.assertEqual(read, ["Work.json"])
+            self.assertEqual(len(found["Work.json"]), 3)
+        finally:
+            todo._search_project = original
+
+    def test_worker_processes(self):
+        """
+        Many projects are read by worker processes with the same results.
+        """
+        for number in range(todo.PARALLEL_MIN_PROJECTS):
+            project = ToDoList()
+            project.add_tasks([f"Task {number}", "Send invoice"])
+            project.save_to_file(os.path.join(self.folder, f"Extra{number}.json"))
+        parallel = ProjectCatalog(self.folder, workers=2)
+        serial = ProjectCatalog(self.folder, workers=1)
+        serial.index_path = parallel.index_path + "2"
+        # Two catalogs on one folder, each must count on its own
+        self.assertEqual(parallel.totals(), serial.totals())
+        self.assertEqual({name: [(p, t.title, t.completed) for p, t in matches]
+                          for name, matches in parallel.search("invoice").items()},
+                         {name: [(p, t.title, t.completed) for p, t in matches]
+                          for name, matches in serial.search("invoice").items()})
 
 if __name__ == "__main__":
     unittest.main()
@@ -13,9 +13,374 @@
 
 # One task for each task in to-do list
 
-from typing import List # For type hinting the task list
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple # For type hinting the task list
+import argparse # For the --profile option
+import atexit # For writing pending changes when the program ends
+import bisect # For keeping the search vocabulary sorted
+import cProfile # For the optional profiling of slow operations
+import functools # For the instrumented() decorator
 import json # For saving/loading data in JSON format
+import multiprocessing # For choosing how the worker processes of project queries start
+import mmap # For reading huge project files without loading them
 import os # For interacting with the file system
+import pstats # For combining the profiles of many calls into one file
+import re # For skipping whitespace while streaming JSON
+import sqlite3 # For projects stored in a database
+import struct # For the compact binary file format
+import sys # For printing the profiling summary
+import tempfile # For writing saves to a temporary file first
+import threading # For saving from a background thread while the list is in use
+import time # For the write-behind timing
+import urllib.parse # For opening databases read-only by their file: URI
+import weakref # For remembering write-behind lists without keeping them alive
+from collections import deque # For the bounded undo history
+from collections.abc import Sequence # For the lazy task list of mapped projects
+from concurrent.futures import ProcessPoolExecutor # For reading many projects at once
+from contextlib import contextmanager # For the atomic save helper
+from datetime import date, timedelta # For the due dates of tasks
+try:
+    import fcntl # For locking project files against other processes
+except ImportError:
+    fcntl = None
+    # Windows has no fcntl, there the lock only keeps the threads of one process apart
+
+JOURNAL_SUFFIX = ".journal"
+    # Journal files live next to the project file: "projects/Work.json" -> "projects/Work.json.journal"
+LOCK_SUFFIX = ".lock"
+    # The file project_lock() locks: saves replace the project file, so it cannot be locked itself
+COMPACT_THRESHOLD = 1000
+    # After this many journal records the journal is folded back into the JSON snapshot
+PAGE_SIZE = 50
+    # How many tasks make one "screen" when loading or listing page by page
+STREAM_CHUNK_SIZE = 64 * 1024
+    # How many characters the streaming loader reads from the file at once
+
+FSYNC_ALWAYS = "always"
+    # Every save and every journal record is forced to the disk before we continue
+FSYNC_BATCHED = "batched"
+    # Only every FSYNC_BATCH_SIZE-th write (and close()) is forced to the disk
+FSYNC_NEVER = "never"
+    # The operating system decides when data reaches the disk
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_BATCHED, FSYNC_NEVER)
+FSYNC_BATCH_SIZE = 100
+
+FORMAT_JSON = "json"
+    # Pretty-printed JSON, easy to read and edit by hand
+FORMAT_BINARY = "binary"
+    # Compact binary records, smaller and faster to load (see BinaryFormat)
+FORMAT_INDEXED = "indexed"
+    # Binary records plus an offset table, for opening huge projects with ToDoList.load_mapped()
+FORMAT_SQLITE = "sqlite"
+    # An SQLite database: every change updates one row instead of rewriting or journaling
+SQLITE_SUFFIX = ".db"
+    # New projects with this ending are created as databases
+SQLITE_WAL_SUFFIX = "-wal"
+    # Changes of a database live in this file next to it until SQLite checkpoints them
+PROJECT_SUFFIXES = (".json", SQLITE_SUFFIX)
+
+PROJECTS_FOLDER = "projects"
+CATALOG_INDEX = ".catalog"
+    # Cached task counts of every project, kept inside the projects folder.
+    # It starts with a dot (like the temporary save files), so it is never listed as a project.
+
+PARALLEL_MIN_PROJECTS = 8
+    # Project queries read fewer changed projects than this in the calling process,
+    # starting worker processes would take longer than reading them
+UNDO_LIMIT = 100
+    # Operations that can be undone, older ones are forgotten
+UNDO_MAX_DELTAS = 100_000
+    # Changed tasks the undo history may remember in total. An operation that changes
+    # more tasks than this (clearing a huge list) cannot be undone, so a few bulk
+    # operations never pin millions of deleted tasks in memory.
+QUERY_CACHE_SIZE = 16
+    # Search results the catalog keeps per project, the oldest query is forgotten first
+
+WRITE_BEHIND_DEBOUNCE = 0.5
+    # Write-behind waits until the list was quiet for this many seconds...
+WRITE_BEHIND_MAX_LATENCY = 5.0
+    # ...but never keeps a change in memory for longer than this
+
+SEARCH_PREFIX = "prefix"
+    # Every query word must be the start of a word in the title ("proj" finds "project")
+SEARCH_SUBSTRING = "substring"
+    # Every query word may be anywhere inside a word of the title ("ject" finds "project")
+SEARCH_MODES = (SEARCH_PREFIX, SEARCH_SUBSTRING)
+STATUS_ACTIVE = "active"
+STATUS_COMPLETED = "completed"
+_WORD = re.compile(r"\w+")
+
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+PRIORITY_LOW = 3
+PRIORITIES = (PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)
+    # A smaller number comes first. Tasks without a priority come after all of these.
+NEXT_TASKS = 10
+    # How many tasks next_tasks() returns by default
+
+PROFILE_ENV = "TODO_PROFILE"
+    # Set this environment variable to "1" (or "timing") to measure loads, saves and merges,
+    # or to "cprofile" to also write a cProfile file per operation. Same as the --profile option.
+PROFILE_DIR_ENV = "TODO_PROFILE_DIR"
+PROFILE_TIMING = "timing"
+PROFILE_CPROFILE = "cprofile"
+PROFILE_MODES = (PROFILE_TIMING, PROFILE_CPROFILE)
+PROFILE_FOLDER = "profiles"
+    # Where the .prof files of the cprofile mode are written
+IO_READ = "read"
+IO_WRITE = "write"
+IO_APPEND = "append"
+
+
+class Instrumentation:
+    """
+    Opt-in measurements of the operations that can make the app feel slow.
+
+    Every measured operation records its number of calls, wall time and the bytes
+    it read or wrote. In the cprofile mode each call also runs under cProfile and
+    the profiles of one operation are combined into <folder>/<operation>.prof,
+    which can be opened with "python -m pstats" or snakeviz.
+    A summary table is printed to stderr when the program ends.
+
+    While it is disabled (the default) a measured call costs one attribute check.
+
+    Attributes:
+        mode (Optional[str]): None (disabled), PROFILE_TIMING or PROFILE_CPROFILE.
+        folder (str): Folder for the .prof files.
+        stats (Dict[str, list]): [calls, seconds, slowest call, bytes] per operation.
+
+    Example:
+        INSTRUMENTATION.enable(PROFILE_CPROFILE)
+        ToDoList().load_from_file("projects/Work.json")
+        print(INSTRUMENTATION.summary())
+    """
+
+    def __init__(self):
+        self.mode = None
+        self.folder = PROFILE_FOLDER
+        self.stats = {}
+        self._profiles = {}
+            # Combined pstats.Stats per operation, only in the cprofile mode
+        self._profiling = False
+            # Only one cProfile can run at a time, nested or parallel calls are just timed
+        self._lock = threading.Lock()
+
+    def enable(self, mode: str = PROFILE_TIMING, folder: Optional[str] = None) -> None:
+        """
+        Start measuring.
+
+        Args:
+            mode (str): PROFILE_TIMING or PROFILE_CPROFILE.
+            folder (Optional[str]): Folder for the .prof files (default PROFILE_FOLDER).
+
+        Raises:
+            ValueError: If mode is not one of PROFILE_MODES.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, use one of {PROFILE_MODES}")
+        self.mode = mode
+        if folder is not None:
+            self.folder = folder
+
+    def disable(self) -> None:
+        """Stop measuring and forget everything measured so far."""
+        self.mode = None
+        with self._lock:
+            self.stats = {}
+            self._profiles = {}
+
+    @contextmanager
+    def measure(self, name: str, filename: Optional[str] = None, io: Optional[str] = None):
+        """
+        Measure the code inside the with block as one call of the operation name.
+
+        Args:
+            name (str): Operation name shown in the summary.
+            filename (Optional[str]): Project file the operation reads or writes.
+            io (Optional[str]): How the bytes are counted: IO_READ (size of the file and
+                its journal before), IO_WRITE (size after) or IO_APPEND (growth).
+
+        Example:
+            with INSTRUMENTATION.measure("load", "Project.json", IO_READ):
+                ...
+        """
+        if self.mode is None:
+            yield
+            return
+        before = _disk_size(filename) if io in (IO_READ, IO_APPEND) else 0
+        profile = self._start_profile()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+            if io == IO_WRITE:
+                size = _disk_size(filename)
+            elif io == IO_APPEND:
+                size = max(_disk_size(filename) - before, 0)
+                # Compacting a journal can make the files smaller, that is no negative write
+            else:
+                size = before
+            self.record(name, seconds, size, profile)
+
+    def record(self, name: str, seconds: float, size: int = 0,
+               profile: Optional[cProfile.Profile] = None) -> None:
+        """
+        Add one call of an operation to the statistics.
+
+        Args:
+            name (str): Operation name.
+            seconds (float): Wall time of the call.
+            size (int): Bytes read or written by the call.
+            profile (Optional[cProfile.Profile]): The cProfile run of the call.
+        """
+        with self._lock:
+            entry = self.stats.setdefault(name, [0, 0.0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += size
+            if profile is not None:
+                if name in self._profiles:
+                    self._profiles[name].add(profile)
+                else:
+                    self._profiles[name] = pstats.Stats(profile)
+                self._profiling = False
+
+    def summary(self) -> str:
+        """Return the statistics as a table, slowest operation (in total) first."""
+        with self._lock:
+            rows = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)
+        lines = [f"{'operation':<20} {'calls':>7} {'total s':>9} {'mean ms':>9} {'max ms':>9} {'MB':>9}"]
+        for name, (calls, seconds, slowest, size) in rows:
+            lines.append(f"{name:<20} {calls:>7} {seconds:>9.3f} {seconds / calls * 1000:>9.2f} "
+                         f"{slowest * 1000:>9.2f} {size / 1e6:>9.2f}")
+        return "\n".join(lines)
+
+    def write_profiles(self) -> List[str]:
+        """
+        Write the combined cProfile data of every operation to <folder>/<operation>.prof.
+
+        Returns:
+            List[str]: The paths of the written files.
+        """
+        with self._lock:
+            profiles = dict(self._profiles)
+        if not profiles:
+            return []
+        os.makedirs(self.folder, exist_ok=True)
+        paths = []
+        for name, stats in profiles.items():
+            path = os.path.join(self.folder, f"{name}.prof")
+            stats.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def report(self) -> None:
+        """Print the summary and write the profiles. Runs when the program ends."""
+        if self.mode is None or not self.stats:
+            return
+        print("\n" + self.summary(), file=sys.stderr)
+        for path in self.write_profiles():
+            print(f"Profile written to {path}", file=sys.stderr)
+
+    def _start_profile(self) -> Optional[cProfile.Profile]:
+        """Start a cProfile run for one call, or return None if none should run."""
+        if self.mode != PROFILE_CPROFILE:
+            return None
+        with self._lock:
+            if self._profiling:
+                return None
+            self._profiling = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+
+INSTRUMENTATION = Instrumentation()
+atexit.register(INSTRUMENTATION.report)
+    # Registered before the write-behind flush below, so atexit runs it after that flush
+    # and the final writes are part of the summary
+
+
+def instrumented(name: str, io: Optional[str] = None) -> Callable:
+    """
+    Decorator that measures every call of a function with INSTRUMENTATION.
+
+    Args:
+        name (str): Operation name shown in the summary.
+        io (Optional[str]): IO_READ, IO_WRITE or IO_APPEND if the first argument after
+            self is the project file whose bytes should be counted.
+
+    Example:
+        @instrumented("refresh_tasks")
+        def refresh_tasks(self):
+            ...
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if INSTRUMENTATION.mode is None:
+                return function(*args, **kwargs)
+            filename = args[1] if io is not None and len(args) > 1 else kwargs.get("filename")
+            with INSTRUMENTATION.measure(name, filename, io):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_instrumentation(argv: Optional[List[str]] = None) -> List[str]:
+    """
+    Turn on the instrumentation if the TODO_PROFILE variable or the --profile option asks for it.
+
+    "--profile" alone means PROFILE_TIMING, "--profile cprofile" also writes .prof files
+    (to --profile-dir or TODO_PROFILE_DIR, default "profiles").
+
+    Args:
+        argv (Optional[List[str]]): Command line arguments (default sys.argv[1:]).
+
+    Returns:
+        List[str]: The arguments that were not about profiling.
+
+    Example:
+        python todo.py --profile cprofile
+        TODO_PROFILE=1 python gui.py
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile", nargs="?", const=PROFILE_TIMING, choices=PROFILE_MODES)
+    parser.add_argument("--profile-dir")
+    argv = list(sys.argv[1:] if argv is None else argv)
+    for position, argument in enumerate(argv):
+        following = argv[position + 1] if position + 1 < len(argv) else None
+        if argument == "--profile" and following not in PROFILE_MODES:
+            argv[position] = f"--profile={PROFILE_TIMING}"
+            # A bare --profile must not take the command after it ("--profile ls") as its mode
+    args, rest = parser.parse_known_args(argv)
+
+    mode = args.profile
+    if mode is None:
+        value = os.environ.get(PROFILE_ENV, "").strip().lower()
+        if value in PROFILE_MODES:
+            mode = value
+        elif value not in ("", "0", "off", "false", "no"):
+            mode = PROFILE_TIMING
+    if mode is not None:
+        INSTRUMENTATION.enable(mode, args.profile_dir or os.environ.get(PROFILE_DIR_ENV))
+    return rest
+
+
+def _disk_size(filename: Optional[str]) -> int:
+    """Return the bytes a project takes on disk: the file plus its journal or write-ahead log."""
+    size = 0
+    if filename:
+        for path in (filename, filename + JOURNAL_SUFFIX, filename + SQLITE_WAL_SUFFIX):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+    return size
+
 
 class Task:
     """
@@ -23,20 +388,55 @@ class Task:
 
     Attributes:
         title (str): The title or description of the task.
-        completed (bool): Task completion status.
+        completed (bool): Task completion status. Changing it also moves the task
+            between the active and completed views of the ToDoList it belongs to.
+        id (int): Unique id of the task inside its project. It never changes,
+            unlike the position shown by list_tasks().
+        priority (Optional[int]): PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW or None.
+        due (Optional[date]): The day the task has to be done by, or None.
+            Change both with ToDoList.plan_task(), so the list can keep its indexes up to date.
     """
-    def __init__(self, title):
+    __slots__ = ("id", "title", "_completed", "_owner", "priority", "due")
+        # Without __slots__ every Task carries its own __dict__, which costs more memory
+        # than the title itself. See benchmarks/bench_memory.py for the numbers.
+        # _owner is the ToDoList the task is in (or None), it is told about status changes.
+
+    def __init__(self, title, task_id: Optional[int] = None, priority: Optional[int] = None,
+                 due: Optional[date] = None):
         """
         Initialize a new Task instance.
         
         Attributes:
             title (str): Task title or task description.
+            task_id (int): Stable id, normally given out by ToDoList.
+            priority (int): Optional PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW.
+            due (date): Optional due date.
         
         Example:
             task = Task("Finish the project")
+            task = Task("Pay rent", priority=PRIORITY_HIGH, due=date(2026, 11, 1))
         """
         self.title = title
-        self.completed = False
+        self._completed = False
+        self._owner = None
+        self.id = task_id
+        self.priority = priority
+        self.due = due
+
+    @property
+    def completed(self) -> bool:
+        """True once the task is done."""
+        return self._completed
+
+    @completed.setter
+    def completed(self, value: bool) -> None:
+        value = bool(value)
+        if value == self._completed:
+            return
+        self._completed = value
+        if self._owner is not None:
+            self._owner._status_changed(self)
+            # The list moves the task to its other view, no need to scan all tasks later
 
     def mark_completed(self):
         """"
@@ -55,7 +455,354 @@ class Task:
             print(task)
         """
         status = "[X]" if self.completed else "[ ]"
-        return f"{status} {self.title}"
+        return f"{status} {self.title}{plan_text(self)}"
+
+
+def plan_text(task: Task) -> str:
+    """
+    Return the priority and due date of a task for printing, "" if it has neither.
+
+    Example:
+        plan_text(task)  # " (priority 1, due 2026-11-01)"
+    """
+    parts = []
+    if task.priority is not None:
+        parts.append(f"priority {task.priority}")
+    if task.due is not None:
+        parts.append(f"due {task.due.isoformat()}")
+    return f" ({', '.join(parts)})" if parts else ""
+
+
+def parse_due(text: str, today: Optional[date] = None) -> Optional[date]:
+    """
+    Read a due date typed by the user.
+
+    Args:
+        text (str): "2026-11-01", "today", "tomorrow", "+3" (in three days) or "" for no due date.
+        today (date): The day the relative forms count from (default: date.today()).
+
+    Returns:
+        Optional[date]: The day, None for "".
+
+    Raises:
+        ValueError: If the text is none of these.
+
+    Example:
+        parse_due("+7")  # one week from today
+    """
+    text = text.strip().lower()
+    if not text:
+        return None
+    today = today or date.today()
+    if text == "today":
+        return today
+    if text == "tomorrow":
+        return today + timedelta(days=1)
+    if text.startswith("+") and text[1:].isdigit():
+        return today + timedelta(days=int(text[1:]))
+    return date.fromisoformat(text)
+        # Raises ValueError for anything that is not YYYY-MM-DD
+
+
+def _due_from_text(text: Optional[str]) -> Optional[date]:
+    """Turn the due date of a file or journal record ("2026-11-01" or null) back into a date."""
+    return date.fromisoformat(text) if text else None
+
+
+def _check_plan(priority: Optional[int], due: Optional[date]) -> None:
+    """Raise ValueError if a priority or due date cannot be stored."""
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {PRIORITIES} or None, not {priority!r}")
+    if due is not None and not isinstance(due, date):
+        raise ValueError(f"due must be a date or None, not {due!r}")
+
+
+def _with_plan(item: dict, task: Task) -> dict:
+    """
+    Add the priority and due date of a task to a JSON item or journal record.
+
+    Only what is set is written, so files of tasks without them look exactly like before.
+
+    Returns:
+        dict: The same item, for convenience.
+    """
+    if task.priority is not None:
+        item["priority"] = task.priority
+    if task.due is not None:
+        item["due"] = task.due.isoformat()
+    return item
+
+
+def _plan_record(task: Task) -> dict:
+    """Return the journal record that gives a task its current priority and due date."""
+    return {"op": "plan", "id": task.id, "priority": task.priority,
+            "due": task.due.isoformat() if task.due is not None else None}
+
+
+class SearchIndex:
+    """
+    Inverted index from the words of task titles to task ids.
+
+    Searching 1M titles one by one takes a long time, looking a word up in a dict does not.
+    The index is updated task by task (add() and remove()), it is never rebuilt on a change.
+
+    Attributes:
+        postings (Dict[str, set]): word -> ids of the tasks whose title contains the word.
+        vocabulary (List[str]): All words, sorted, so every word with a given prefix
+            is one slice of the list (found with bisect).
+        trigrams (Dict[str, set]): Every 3 letter piece of a word -> words containing it.
+            A substring query only has to check the words sharing all its pieces.
+    """
+
+    def __init__(self):
+        """
+        Initialization of an empty index.
+
+        Example:
+            index = SearchIndex()
+        """
+        self.postings: Dict[str, set] = {}
+        self.vocabulary: List[str] = []
+        self.trigrams: Dict[str, set] = {}
+
+    def add(self, task: Task) -> None:
+        """
+        Index the words of a task title.
+
+        Args:
+            task (Task): A task that already has its id.
+
+        Example:
+            index.add(task)
+        """
+        for word in set(_WORD.findall(task.title.lower())):
+            ids = self.postings.get(word)
+            if ids is None:
+                # A word we have not seen yet
+                ids = self.postings[word] = set()
+                bisect.insort(self.vocabulary, word)
+                for trigram in _trigrams(word):
+                    self.trigrams.setdefault(trigram, set()).add(word)
+            ids.add(task.id)
+
+    def remove(self, task: Task) -> None:
+        """
+        Forget the words of a task title.
+
+        Args:
+            task (Task): A task that was added before.
+
+        Example:
+            index.remove(task)
+        """
+        for word in set(_WORD.findall(task.title.lower())):
+            ids = self.postings.get(word)
+            if ids is None:
+                continue
+            ids.discard(task.id)
+            if not ids:
+                # No task uses the word anymore
+                del self.postings[word]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, word)]
+                for trigram in _trigrams(word):
+                    words = self.trigrams[trigram]
+                    words.discard(word)
+                    if not words:
+                        del self.trigrams[trigram]
+
+    def words_matching(self, term: str, mode: str = SEARCH_PREFIX) -> List[str]:
+        """
+        Return the indexed words that match one query word.
+
+        Args:
+            term (str): One lower case query word.
+            mode (str): SEARCH_PREFIX or SEARCH_SUBSTRING.
+
+        Example:
+            index.words_matching("proj")  # ["project", "projects"]
+        """
+        if mode == SEARCH_PREFIX:
+            start = bisect.bisect_left(self.vocabulary, term)
+            end = bisect.bisect_left(self.vocabulary, term + "\U0010ffff")
+                # "\U0010ffff" is the highest character, so this is the end of the prefix slice
+            return self.vocabulary[start:end]
+
+        if len(term) < 3:
+            # Too short for trigrams, check every word (there are far fewer words than tasks)
+            return [word for word in self.vocabulary if term in word]
+        candidates = None
+        for trigram in _trigrams(term):
+            words = self.trigrams.get(trigram)
+            if not words:
+                return []
+            candidates = set(words) if candidates is None else candidates & words
+            if not candidates:
+                return []
+        return [word for word in candidates if term in word]
+            # Sharing all pieces is not enough ("abcab" has the pieces of "bcabc")
+
+    def search(self, query: str, mode: str = SEARCH_PREFIX,
+               title_of: Optional[Callable[[int], str]] = None) -> set:
+        """
+        Return the ids of the tasks whose title matches every word of the query.
+
+        Args:
+            query (str): One or more words, case does not matter.
+            mode (str): SEARCH_PREFIX or SEARCH_SUBSTRING.
+            title_of (Callable): Optional id -> title lookup. With it, a handful of
+                candidates is checked by reading their titles instead of going through
+                the ids of hundreds of matching words.
+
+        Example:
+            index.search("buy milk")
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {SEARCH_MODES}, not {mode!r}")
+        terms = _WORD.findall(query.lower())
+        if not terms:
+            return set()
+
+        matches = []
+        for term in set(terms):
+            postings = [self.postings[word] for word in self.words_matching(term, mode)]
+            if not postings:
+                return set()
+            matches.append((term, postings))
+        matches.sort(key=lambda match: sum(len(ids) for ids in match[1]))
+
+        # Only the rarest query word collects all its ids, the other words just keep
+        # the ids that are already candidates. "&" walks the smaller of the two sets,
+        # so a common word like "ka" costs as much as the few candidates, not its thousands of tasks.
+        result = set()
+        for ids in matches[0][1]:
+            result |= ids
+        for index, (_, postings) in enumerate(matches[1:], start=1):
+            if not result:
+                break
+            if title_of is not None and len(result) < len(postings):
+                # Fewer candidates than matching words: read the candidate titles
+                terms = [term for term, _ in matches[index:]]
+                return {task_id for task_id in result
+                        if _title_matches(title_of(task_id), terms, mode)}
+            result = set().union(*(result & ids for ids in postings))
+        return result
+
+
+def _title_matches(title: str, terms: List[str], mode: str) -> bool:
+    """Check one title against query words the same way the index would."""
+    words = _WORD.findall(title.lower())
+    if mode == SEARCH_PREFIX:
+        return all(any(word.startswith(term) for word in words) for term in terms)
+    return all(any(term in word for word in words) for term in terms)
+
+
+def _trigrams(word: str) -> set:
+    """Return every 3 letter piece of a word ("milk" -> {"mil", "ilk"})."""
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class ScheduleIndex:
+    """
+    Sorted indexes of the open tasks, by what should be done next and by due date.
+
+    Both are plain lists kept sorted with bisect: a task is put in or taken out with
+    one binary search, and "the next 10", "overdue" or "due this week" are one slice,
+    so a view never sorts the whole list. The ToDoList adds and removes open tasks
+    one by one, like it does with the SearchIndex.
+
+    Attributes:
+        next_up (List[tuple]): (priority, due day, id) of every open task, sorted.
+            Tasks without a priority or due date get NO_PRIORITY or NO_DUE, so they come last.
+        by_due (List[tuple]): (due day, id) of the open tasks that have a due date, sorted.
+            Days are date.toordinal() numbers.
+    """
+    NO_PRIORITY = max(PRIORITIES) + 1
+    NO_DUE = date.max.toordinal() + 1
+
+    def __init__(self):
+        """
+        Initialization of an empty index.
+
+        Example:
+            index = ScheduleIndex()
+        """
+        self.next_up: List[tuple] = []
+        self.by_due: List[tuple] = []
+        self._keys: Dict[int, tuple] = {}
+            # id -> key in next_up. A task is removed by the key it was added with,
+            # even if its priority or due date changed in between.
+
+    def add(self, task: Task) -> None:
+        """
+        Index an open task.
+
+        Args:
+            task (Task): A task that already has its id.
+
+        Example:
+            index.add(task)
+        """
+        if task.id in self._keys:
+            return
+        day = task.due.toordinal() if task.due is not None else self.NO_DUE
+        key = (task.priority if task.priority is not None else self.NO_PRIORITY, day, task.id)
+        self._keys[task.id] = key
+        bisect.insort(self.next_up, key)
+        if task.due is not None:
+            bisect.insort(self.by_due, (day, task.id))
+
+    def remove(self, task: Task) -> None:
+        """
+        Forget a task (it was completed, deleted or is about to get another plan).
+
+        Args:
+            task (Task): A task that was added before. Unknown tasks are ignored.
+
+        Example:
+            index.remove(task)
+        """
+        key = self._keys.pop(task.id, None)
+        if key is None:
+            return
+        del self.next_up[bisect.bisect_left(self.next_up, key)]
+        if key[1] != self.NO_DUE:
+            del self.by_due[bisect.bisect_left(self.by_due, (key[1], key[2]))]
+
+    def first(self, count: int) -> List[int]:
+        """
+        Return the ids of the count tasks to do next: highest priority first, then the
+        earliest due date, then the oldest task.
+
+        Example:
+            index.first(10)
+        """
+        return [key[2] for key in self.next_up[:max(count, 0)]]
+
+    def due_between(self, first: Optional[date], last: date) -> List[int]:
+        """
+        Return the ids of the tasks due from first to last (both included), earliest first.
+
+        Args:
+            first (Optional[date]): The first day, None for "any day before last".
+            last (date): The last day.
+
+        Example:
+            index.due_between(None, date.today() - timedelta(days=1))  # overdue
+        """
+        start = 0 if first is None else bisect.bisect_left(self.by_due, (first.toordinal(),))
+        end = bisect.bisect_left(self.by_due, (last.toordinal() + 1,))
+        # (day,) sorts before every (day, id), so these are the edges of the days
+        return [task_id for _, task_id in self.by_due[start:end]]
+
+
+class ProjectChangedError(RuntimeError):
+    """
+    Raised when a list without a journal would save over changes another program
+    made to the same project file after it was loaded.
+
+    A list in journal mode never raises it: it knows its own changes record by record,
+    so it reads the other changes first and then saves both.
+    """
 
 
 class ToDoList:
@@ -64,178 +811,4031 @@ class ToDoList:
     
     Attributes:
         title (List[Task]): A list holding Task objects.
+            Besides the list, tasks are indexed by their stable id, so lookups,
+            completing and deleting by id do not scan the list.
+        active_tasks, completed_tasks: Live views of the open and the done tasks.
+            They are kept up to date on every change, so they (and active_count,
+            completed_count) never scan the list.
+        next_tasks(), overdue_tasks(), due_this_week(): The open tasks by priority and
+            due date, answered from a sorted index instead of sorting the list.
+        journal (bool): When True every add/complete/delete is appended to a small journal
+            file next to the project instead of rewriting the whole JSON file.
+            Projects stored in an SQLite database always work like this, except that
+            every change updates one row of the database.
+        filename (str): The project file the journal belongs to (set by load/save).
+        fsync_policy (str): FSYNC_ALWAYS, FSYNC_BATCHED or FSYNC_NEVER.
+        file_format (str): The format saves are written in, None to keep the file's format.
+        defer_writes (bool): When True journal records are kept in memory until flush()
+            is called, so a burst of changes becomes one write.
+        write_behind (bool): When True changes are written by a background timer
+            once the list has been quiet for debounce seconds.
+        dirty (bool): True while there are changes that are not written yet.
+        on_saved (Callable): Called (from the timer thread) after write-behind wrote changes.
+
+    Several programs (the CLI and the GUI) can have the same project open. Changes the
+    others write are picked up by reload_changes(), and a save never overwrites them.
     """
     
-    def __init__(self):
-        """Initialization of an empty to-do list."""
+    def __init__(self, journal: bool = False, compact_threshold: int = COMPACT_THRESHOLD,
+                 fsync_policy: str = FSYNC_ALWAYS, defer_writes: bool = False,
+                 write_behind: bool = False, debounce: float = WRITE_BEHIND_DEBOUNCE,
+                 max_latency: float = WRITE_BEHIND_MAX_LATENCY, file_format: Optional[str] = None,
+                 undo_limit: int = UNDO_LIMIT):
+        """
+        Initialization of an empty to-do list.
+
+        Args:
+            journal (bool): Turn on the append-only journal storage mode.
+            compact_threshold (int): Number of journal records after which the journal
+                is compacted back into the JSON snapshot.
+            fsync_policy (str): How hard saves are pushed to the disk. Saves are always
+                atomic (the old file stays intact if the app dies while saving), the
+                policy only decides how much may be lost on a power failure.
+            defer_writes (bool): Buffer journal records until flush(). flush() and the
+                saves may then run on another thread than the one changing the list.
+            write_behind (bool): Write changes in the background: a burst of changes
+                costs one write. In journal mode the records are appended, otherwise
+                the whole project file is saved. Pending changes are also written by
+                flush(), close() and when the program exits.
+            debounce (float): Seconds without changes before write-behind writes.
+            max_latency (float): Longest time in seconds a change waits in memory,
+                even if changes keep coming.
+            file_format (str): FORMAT_JSON or FORMAT_BINARY for every save. None (the
+                default) keeps the format a project file already has and writes new
+                files as JSON. Loading always detects the format by itself.
+            undo_limit (int): How many operations undo() can take back, 0 turns the history off.
+
+        Example:
+            new_todolist = ToDoList(journal=True, fsync_policy=FSYNC_BATCHED)
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {FSYNC_POLICIES}, not {fsync_policy!r}")
+        if file_format is not None and file_format not in FORMATS:
+            raise ValueError(f"file_format must be one of {sorted(FORMATS)}, not {file_format!r}")
         self.tasks: List[Task] = []
             # We could write it like 'self.tasks = []'
             # Like this now any new user viewing this code knows that this list is labeled for "Tasks" 
+        self._by_id: Dict[int, Task] = {}   # id -> Task index for O(1) lookups
+        self._next_id = 1                   # Next free id for a new task
+        self._active: Dict[int, Task] = {}  # id -> Task of the open tasks, in list order
+        self._done: Dict[int, Task] = {}    # id -> Task of the completed tasks, in list order
+        self._views_in_order = True
+            # False after a task went back into a view out of order (an undone delete,
+            # a reopened task), the views are sorted again when they are read next
+        self._search_index: Optional[SearchIndex] = None
+            # Built by the first search(), then kept up to date by every add and delete
+        self._schedule: Optional[ScheduleIndex] = None
+            # Built by the first next_tasks()/overdue_tasks()/due_this_week(), then kept
+            # up to date by every add, delete, complete and plan_task()
+        self._mapped: Optional[MappedTasks] = None   # Set while a project is open with load_mapped()
+        self._database = False       # True while the project file is an SQLite database
+        self._store: Optional[SqliteStore] = None    # Its connection, opened when the project is bound
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.filename: Optional[str] = None
+        self._journal_file = None    # Open append handle, created on the first journal record
+        self._journal_records = 0    # How many records the current journal holds
+        self._seen_snapshot: Optional[list] = None
+            # _file_identity() of the project file when we last read or wrote it,
+            # anything else means another process saved the project since
+        self._journal_offset = 0     # Bytes of the journal that are already in the list
+        self._data_version: Optional[int] = None   # PRAGMA data_version of a database project
+        self.fsync_policy = fsync_policy
+        self.file_format = file_format
+        self._unsynced_writes = 0    # Writes not yet forced to disk (FSYNC_BATCHED)
+        self.defer_writes = defer_writes
+        self._pending: list = []     # Journal records waiting for flush()
+        self._lock = threading.RLock()
+            # Guards the pending records, the dirty flag and the write-behind timer. Only held
+            # for a moment (never while writing), so changing the list never waits for a write
+        self._write_lock = threading.RLock()
+            # One write at a time: held by flush, save and compaction for the whole write, and
+            # guards the journal file, so a background thread can write while the list changes
+        self.dirty = False
+        self.write_behind = write_behind
+        self.debounce = debounce
+        self.max_latency = max_latency
+        self.on_saved: Optional[Callable[[], None]] = None
+        self._timer: Optional[threading.Timer] = None
+        self._dirty_since = 0.0      # When the oldest unwritten change happened
+        self._last_change = 0.0      # When the newest change happened
+        self.undo_limit = undo_limit
+        self._undo: deque = deque()  # One list of inverse deltas per operation, newest last
+        self._redo: list = []        # Operations taken back by undo(), redo() applies them again
+        self._history_size = 0       # Deltas held by both stacks together
+        if write_behind:
+            self.defer_writes = True
+            _write_behind_lists.add(self)
 
-    def add_task(self, title: str) -> None:
+    def add_task(self, title: str, priority: Optional[int] = None, due: Optional[date] = None) -> None:
         """ 
         Add a new task with the given title. 
         
         Args:
             title (str): The title or description of the task.
+            priority (int): Optional PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW.
+            due (date): Optional due date.
+
+        Raises:
+            ValueError: If the priority is not one of PRIORITIES.
+
+        Example:
+            new_todolist = ToDoList()
+            new_todolist.add_task("Finish the project")
+            new_todolist.add_task("Pay rent", PRIORITY_HIGH, date(2026, 11, 1))
+        """
+        # We could have written it like:
+        #   def add_task(self, title):
+        #       self.tasks.append(Task(title))
+        # But adding "title: str" and "-> None" makes it more easier to understand and test by the new users
+        _check_plan(priority, due)
+        self._materialize()
+        task = self._register(Task(title, priority=priority, due=due))
+        self.tasks.append(task)
+        self._log(_with_plan({"op": "add", "id": task.id, "title": title}, task))
+        self._remember([("delete", task.id)])
+
+    def get_task(self, task_id: int) -> Optional[Task]:
+        """
+        Return the task with the given stable id, or None if there is none.
+
+        Args:
+            task_id (int): The stable id of the task (Task.id), not its position.
+
+        Example:
+            task = new_todolist.get_task(7)
+        """
+        if self._mapped is not None:
+            position = self._mapped.find(task_id)
+            return None if position is None else self._mapped[position]
+        return self._by_id.get(task_id)
+
+    def position_of(self, task_id: int) -> Optional[int]:
+        """
+        Return the position of a task as list_tasks() shows it (starting at 1), or None.
+
+        Ids are given out in list order, so the position is found with a binary search
+        over the ids. Only if undo or another program moved tasks out of that order
+        is the list searched from the start.
+
+        Args:
+            task_id (int): The stable id of the task (Task.id).
+
+        Example:
+            for task in new_todolist.next_tasks():
+                print(new_todolist.position_of(task.id), task)
+        """
+        if self._mapped is not None:
+            position = self._mapped.find(task_id)
+            return None if position is None else position + 1
+        task = self._by_id.get(task_id)
+        if task is None:
+            return None
+        low, high = 0, len(self.tasks)
+        while low < high:
+            middle = (low + high) // 2
+            if self.tasks[middle].id < task_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.tasks) and self.tasks[low] is task:
+            return low + 1
+        return self.tasks.index(task) + 1
+
+    @property
+    def active_tasks(self):
+        """
+        The tasks that are not completed yet, as a live view.
+
+        The view follows the list: a task disappears from it as soon as it is completed
+        or deleted. Use list() on it to get a copy that stays as it is. The tasks are
+        in list order, also after undo or reopening a task put one back.
+
+        Example:
+            for task in new_todolist.active_tasks:
+                print(task)
+        """
+        self._materialize()
+        self._order_views()
+        return self._active.values()
+
+    @property
+    def completed_tasks(self):
+        """
+        The completed tasks, as a live view (see active_tasks).
+
+        Example:
+            print(len(new_todolist.completed_tasks), "tasks done")
+        """
+        self._materialize()
+        self._order_views()
+        return self._done.values()
+
+    @property
+    def active_count(self) -> int:
+        """Number of tasks that are not completed yet."""
+        if self._mapped is not None:
+            return len(self._mapped) - self._mapped.completed_count
+        return len(self._active)
+
+    @property
+    def completed_count(self) -> int:
+        """Number of completed tasks."""
+        if self._mapped is not None:
+            return self._mapped.completed_count
+        return len(self._done)
+
+    def search(self, query: str, mode: str = SEARCH_PREFIX,
+               status: Optional[str] = None) -> List[Task]:
+        """
+        Find the tasks whose title contains every word of the query.
+
+        The first search indexes all titles once, after that the index is updated by
+        every add and delete, so a search costs about the same for 100 or 1M tasks.
+
+        Args:
+            query (str): One or more words, case does not matter.
+            mode (str): SEARCH_PREFIX ("proj" finds "project") or SEARCH_SUBSTRING
+                ("ject" finds "project").
+            status (str): None for all tasks, STATUS_ACTIVE or STATUS_COMPLETED.
+
+        Returns:
+            List[Task]: The matching tasks in the order they were added.
+
+        Example:
+            new_todolist = ToDoList()
+            new_todolist.add_task("Buy milk")
+            new_todolist.search("mil")  # [Task "Buy milk"]
+        """
+        if status not in (None, STATUS_ACTIVE, STATUS_COMPLETED):
+            raise ValueError(f"status must be None, {STATUS_ACTIVE!r} or {STATUS_COMPLETED!r}, not {status!r}")
+        self._materialize()
+        if self._search_index is None:
+            self._search_index = SearchIndex()
+            for task in self.tasks:
+                self._search_index.add(task)
+
+        found = []
+        ids = self._search_index.search(query, mode, title_of=lambda task_id: self._by_id[task_id].title)
+        for task_id in sorted(ids):
+            # Ids are given out in order, so sorting them gives the order of the list
+            task = self._by_id[task_id]
+            if status is None or task.completed == (status == STATUS_COMPLETED):
+                found.append(task)
+        return found
+    
+    def list_tasks(self, page_size: Optional[int] = None) -> None:
+        """
+        Print all tasks with their status.
+
+        Args:
+            page_size (int): If given, stop after every page_size tasks and ask
+                before printing the next page.
+        
+        Example:
+            new_todolist = ToDoList()
+            new_todolist.list_tasks()
+        """
+        
+        if not self.tasks:
+        # Check if the list is empty
+            print("No tasks found.") 
+            return
+        
+        for idx, task in enumerate(self.tasks, start=1):
+            # enumerate counts and go trough the giving list making counting a lot easier
+            # so there is the idx which is just declared
+            # enumerate just affects the print not the list
+            status = "✅" if task.completed else "❌"
+            print(f"{idx}. [{status} {task.title}]{plan_text(task)}")
+            if page_size and idx % page_size == 0 and idx < len(self.tasks):
+                more = input(f"-- {idx}/{len(self.tasks)} shown, Enter for more, q to stop -- ")
+                if more.strip().lower() == "q":
+                    return
+        print(f"{self.active_count} open, {self.completed_count} done")
+        # The counts are kept up to date by every change, printing them costs nothing
+            
+    def mark_task_completed(self, task_id: int) -> None:
+        """
+        Mark the task with the given ID as completed.
+
+        The ID here is the position shown by list_tasks(). Use
+        mark_task_completed_by_id() to address a task by its stable id.
+        
+        Args:
+            task_id(int): The given id that is to be marked as finished
+            
+        Example:
+            new_todolist = ToDoList()
+            new_todolist.mark_task_completed(2)
+        """
+        if 1 <= task_id <= len(self.tasks):
+            self.mark_task_completed_by_id(self.tasks[task_id - 1].id)
+            # Example easier to understand:
+            # We want task 1. In listed function with enumerate its in the position 1. We write 1 and the position [0] where its our first to-do task
+        else:
+            print("Invalid task ID")
+
+    def mark_task_completed_by_id(self, task_id: int) -> bool:
+        """
+        Mark the task with the given stable id as completed.
+
+        Args:
+            task_id (int): The stable id of the task (Task.id).
+
+        Returns:
+            bool: True if the task exists, False otherwise.
+
+        Example:
+            new_todolist.mark_task_completed_by_id(7)
+        """
+        task = self.get_task(task_id)
+        if task is None:
+            print("Invalid task ID")
+            return False
+        if not task.completed:
+            self._remember([("uncomplete", task_id)])
+        task.completed = True
+        if self._mapped is None:
+            self._log({"op": "complete", "id": task_id})
+            # A mapped file already holds the change, there is nothing to journal
+        return True
+            
+    def delete_task(self, task_id: int) -> None:
+        """
+        Delete the task with the given ID.
+
+        The ID here is the position shown by list_tasks(). Use
+        delete_task_by_id() to address a task by its stable id.
+        
+        Args:
+            task_id(int): The given id that is marked for delete
+            
+        Example:
+            new_todolist = ToDoList()
+            new_todolist.delete_task(2)
+        """ 
+        self._materialize()
+        if 1 <= task_id <= len(self.tasks):
+            task = self.tasks.pop(task_id - 1)
+            self._unregister(task)
+            self._log({"op": "delete", "id": task.id})
+            self._remember([("insert", task_id - 1, task)])
+            # Undo puts the task object itself back at its old position, nothing is copied
+        else:
+            print("Invalid task ID")
+
+    def delete_task_by_id(self, task_id: int) -> bool:
+        """
+        Delete the task with the given stable id.
+
+        Args:
+            task_id (int): The stable id of the task (Task.id).
+
+        Returns:
+            bool: True if the task existed, False otherwise.
+
+        Example:
+            new_todolist.delete_task_by_id(7)
+        """
+        self._materialize()
+        task = self._by_id.get(task_id)
+        if task is None:
+            print("Invalid task ID")
+            return False
+        self._unregister(task)
+        position = self.tasks.index(task)
+        # Tasks have no __eq__, so index() matches by identity and never compares titles
+        del self.tasks[position]
+        self._log({"op": "delete", "id": task_id})
+        self._remember([("insert", position, task)])
+        return True
+    
+    def add_tasks(self, titles: Iterable[str], priority: Optional[int] = None,
+                  due: Optional[date] = None) -> List[Task]:
+        """
+        Add many tasks at once. They are written to the project in one write.
+
+        Args:
+            titles (Iterable[str]): The titles of the new tasks.
+            priority (int): Optional priority of all of them.
+            due (date): Optional due date of all of them.
+
+        Returns:
+            List[Task]: The new tasks, in order.
+
+        Example:
+            new_todolist.add_tasks(["Buy milk", "Call mom"])
+        """
+        _check_plan(priority, due)
+        self._materialize()
+        added = [self._register(Task(title, priority=priority, due=due)) for title in titles]
+        self.tasks.extend(added)
+        self._log_many([_with_plan({"op": "add", "id": task.id, "title": task.title}, task) for task in added])
+        self._remember([("delete", task.id) for task in added])
+        return added
+
+    def complete_tasks(self, task_ids: Iterable[int]) -> int:
+        """
+        Mark many tasks completed at once, addressed by their stable ids.
+
+        Ids that do not exist (or tasks that are already completed) are skipped.
+        The changes are written to the project in one write.
+
+        Args:
+            task_ids (Iterable[int]): Stable ids (Task.id), not positions.
+
+        Returns:
+            int: How many tasks were completed.
+
+        Example:
+            new_todolist.complete_tasks([3, 4, 5])
+        """
+        records = []
+        for task_id in task_ids:
+            task = self.get_task(task_id)
+            if task is None or task.completed:
+                continue
+            task.completed = True
+            records.append({"op": "complete", "id": task.id})
+        if self._mapped is None:
+            self._log_many(records)
+            # A mapped file already holds the changes, there is nothing to journal
+        self._remember([("uncomplete", record["id"]) for record in records])
+        return len(records)
+
+    def delete_tasks(self, task_ids: Iterable[int]) -> int:
+        """
+        Delete many tasks at once, addressed by their stable ids.
+
+        Deleting one position after another shifts the positions after every delete
+        and moves the rest of the list every time. Here the list is compacted in one
+        pass and the changes are written to the project in one write.
+
+        Args:
+            task_ids (Iterable[int]): Stable ids (Task.id), not positions. Unknown ids are skipped.
+
+        Returns:
+            int: How many tasks were deleted.
+
+        Example:
+            new_todolist.delete_tasks([3, 4, 5])
+        """
+        self._materialize()
+        doomed = set()
+        for task_id in task_ids:
+            task = self._by_id.get(task_id)
+            if task is not None:
+                self._unregister(task)
+                doomed.add(task_id)
+        if not doomed:
+            return 0
+        kept = []
+        removed = []
+        for position, task in enumerate(self.tasks):
+            if task.id in doomed:
+                removed.append(("insert", position, task))
+            else:
+                kept.append(task)
+        self.tasks[:] = kept
+        # [:] changes the list in place, so everyone holding self.tasks sees the result
+        self._log_many([{"op": "delete", "id": task_id} for task_id in sorted(doomed)])
+        removed.reverse()
+        # Undo applies the deltas backwards: the lowest position goes back in first,
+        # so every position is right at the moment its task is inserted
+        self._remember(removed)
+        return len(doomed)
+
+    def clear_completed(self) -> int:
+        """
+        Delete all completed tasks.
+
+        The completed view already knows them, so they are not searched for.
+
+        Returns:
+            int: How many tasks were deleted.
+
+        Example:
+            new_todolist.clear_completed()
+        """
+        self._materialize()
+        return self.delete_tasks(list(self._done))
+
+    def plan_task(self, task_id: int, priority: Optional[int] = None, due: Optional[date] = None) -> bool:
+        """
+        Set the priority and the due date of a task. None removes them.
+
+        Args:
+            task_id (int): The stable id of the task (Task.id).
+            priority (int): PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW or None.
+            due (date): The due date or None.
+
+        Returns:
+            bool: True if the task exists, False otherwise.
+
+        Raises:
+            ValueError: If the priority is not one of PRIORITIES.
+
+        Example:
+            new_todolist.plan_task(7, PRIORITY_HIGH, date(2026, 11, 1))
+        """
+        _check_plan(priority, due)
+        self._materialize()
+        task = self._by_id.get(task_id)
+        if task is None:
+            print("Invalid task ID")
+            return False
+        if (task.priority, task.due) == (priority, due):
+            return True
+        self._remember([("plan", task_id, task.priority, task.due)])
+        self._set_plan(task, priority, due)
+        self._log(_plan_record(task))
+        return True
+
+    def next_tasks(self, count: int = NEXT_TASKS) -> List[Task]:
+        """
+        Return the open tasks to do next: the highest priority first, then the earliest
+        due date, then the oldest. Tasks without a priority or due date come last.
+
+        The first call sorts the open tasks once, after that every change moves one
+        task in the sorted index, so asking again costs only the count tasks returned.
+
+        Args:
+            count (int): How many tasks at most.
+
+        Example:
+            for task in new_todolist.next_tasks(5):
+                print(task)
+        """
+        schedule = self._schedule_index()
+        return [self._by_id[task_id] for task_id in schedule.first(count)]
+
+    def overdue_tasks(self, today: Optional[date] = None) -> List[Task]:
+        """
+        Return the open tasks whose due date is before today, the most overdue first.
+
+        Args:
+            today (date): The current day (default: date.today()).
+
+        Example:
+            late = new_todolist.overdue_tasks()
+        """
+        today = today or date.today()
+        schedule = self._schedule_index()
+        return [self._by_id[task_id] for task_id in schedule.due_between(None, today - timedelta(days=1))]
+
+    def due_this_week(self, today: Optional[date] = None) -> List[Task]:
+        """
+        Return the open tasks due from today until Sunday, earliest first.
+        Tasks due before today are overdue_tasks().
+
+        Args:
+            today (date): The current day (default: date.today()).
+
+        Example:
+            soon = new_todolist.due_this_week()
+        """
+        today = today or date.today()
+        sunday = today + timedelta(days=6 - today.weekday())
+        schedule = self._schedule_index()
+        return [self._by_id[task_id] for task_id in schedule.due_between(today, sunday)]
+
+    def undo(self) -> bool:
+        """
+        Take back the last add, complete or delete (a bulk operation counts as one).
+
+        The history holds inverse deltas ("insert this task at position k",
+        "uncomplete id 7"), not copies of the list. Undoing is journaled like any
+        other change, so it reaches the project file too.
+
+        Returns:
+            bool: False if there was nothing to undo.
+
+        Example:
+            new_todolist.delete_task(3)
+            new_todolist.undo()  # the task is back at position 3
+        """
+        if not self._undo:
+            return False
+        deltas = self._undo.pop()
+        inverse = self._apply_deltas(deltas[::-1])
+        self._redo.append(inverse)
+        self._history_size += len(inverse) - len(deltas)
+        return True
+
+    def redo(self) -> bool:
+        """
+        Apply the last operation taken back by undo() again.
+
+        Any new change clears what can be redone.
+
+        Returns:
+            bool: False if there was nothing to redo.
+
+        Example:
+            new_todolist.undo()
+            new_todolist.redo()
+        """
+        if not self._redo:
+            return False
+        deltas = self._redo.pop()
+        inverse = self._apply_deltas(deltas[::-1])
+        self._undo.append(inverse)
+        self._history_size += len(inverse) - len(deltas)
+        return True
+
+    @property
+    def can_undo(self) -> bool:
+        """True if undo() has something to take back."""
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        """True if redo() has something to apply again."""
+        return bool(self._redo)
+
+    def reload_changes(self) -> bool:
+        """
+        Pick up the changes other programs wrote to the project since we last read or wrote it.
+
+        Only what changed is read: the journal records appended after the ones we know,
+        or for a database the rows, and only if SQLite says another connection committed.
+        If the project file was saved again (for example compacted by the other program)
+        it is read again, but tasks that did not change keep their Task objects.
+        Changes of this list that are not written yet stay on top of the new state.
+        A list without a journal that has unsaved changes is left alone (its save
+        raises ProjectChangedError instead).
+
+        Cheap enough to call about once a second: without changes it costs two os.stat() calls.
+
+        Returns:
+            bool: True if tasks changed.
+
+        Example:
+            new_todolist = ToDoList(journal=True)
+            new_todolist.load_from_file("projects/Work.json")
+            ...  # the GUI adds a task to the same project
+            if new_todolist.reload_changes():
+                new_todolist.list_tasks()
+        """
+        with self._write_lock:
+            if self.filename is None:
+                return False
+            with project_lock(self.filename, exclusive=False):
+                return self._catch_up()
+
+    def read_changes(self) -> Optional[tuple]:
+        """
+        The reading half of reload_changes(): read what other programs changed, but
+        leave the list alone. It can run on a background thread while another thread
+        keeps using the list, that thread then calls apply_changes() with the result.
+
+        Returns:
+            tuple: The changes for apply_changes(), or None if there are none.
+
+        Example:
+            changes = new_todolist.read_changes()   # on the worker thread
+            new_todolist.apply_changes(changes)     # back on the thread that uses the list
+        """
+        filename = self.filename
+        if filename is None:
+            return None
+        if self._database:
+            with self._write_lock, project_lock(filename, exclusive=False):
+                return self._read_changes()
+                # The connection is shared with the writes of this list, they take turns
+        with project_lock(filename, exclusive=False):
+            return self._read_changes()
+
+    def apply_changes(self, changes: Optional[tuple]) -> bool:
+        """
+        Put the changes read by read_changes() into the list.
+
+        If the list read or wrote its project in between, or a write is running right
+        now, the changes may be stale and are dropped without waiting. Nothing is lost:
+        the next read_changes() reads them again.
+
+        Args:
+            changes (tuple): What read_changes() returned.
+
+        Returns:
+            bool: True if tasks changed.
+        """
+        if not self._write_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                return self._apply_changes(changes)
+        finally:
+            self._write_lock.release()
+
+    @contextmanager
+    def locked(self):
+        """
+        Hold the project lock for a read-modify-write cycle of several changes.
+
+        On entry the list picks up the changes other programs wrote (see reload_changes).
+        Changes made inside the block wait in memory and are written together on exit,
+        all under one lock: no other program writes in between, so a check made in the
+        block is still true when its change is written ("add it unless it is there").
+
+        Example:
+            new_todolist = ToDoList(journal=True)
+            new_todolist.load_from_file("projects/Work.json")
+            with new_todolist.locked():
+                if not new_todolist.search("backup"):
+                    new_todolist.add_task("Run the backup")
+        """
+        if self.filename is None:
+            yield self
+            return
+        with self._write_lock, project_lock(self.filename):
+            self._catch_up()
+            deferred = self.defer_writes
+            self.defer_writes = True
+            try:
+                yield self
+            finally:
+                self.defer_writes = deferred
+                self.flush()
+
+    @instrumented("save", IO_WRITE)
+    def save_to_file(self, filename: str) -> None:
+        """
+        Save tasks to a file in JSON format
+
+        Args:
+            filename (str): name of a file where we want to save the file
+            
+        Raises:
+            ProjectChangedError: If filename is the project this list was loaded from,
+                another program changed it since, and this list (without a journal)
+                has unsaved changes of its own.
+
+        Example:
+            new_todolist = ToDoList()
+            new_todolist.save_to_file("Project.json") 
+        """
+        self._materialize()
+        # The file may be the one that is mapped, it is replaced below
+        with self._write_lock, project_lock(filename):
+            # Nobody else writes the project until the new file is in place
+            if filename == self.filename:
+                self._catch_up()
+                # Changes other programs wrote meanwhile go into this save too
+                if not self._database and (_file_identity(filename) != self._seen_snapshot or
+                                           (not self.journal and self._journal_grew())):
+                    raise ProjectChangedError(f"'{filename}' was changed by another program since it was "
+                                              f"loaded, load it again or save to another file")
+                    # A list without a journal also removes the journal below, records of
+                    # other programs in it would be lost
+            with self._lock:
+                tasks = list(self.tasks)
+                # Copying the list is one quick step, so a save from a background thread
+                # never sees the list half way through an insert or delete
+                self._pending = []
+                # Every pending record describes a change that is already in the copy
+                self.dirty = False
+                # Changes made while the file is written are pending again afterwards
+            try:
+                _write_snapshot(filename, tasks, fsync=self._should_fsync(), file_format=self.file_format)
+            except BaseException:
+                with self._lock:
+                    self.dirty = True
+                raise
+
+            # The snapshot now holds everything, so any journal for this file is folded in
+            if not self.journal:
+                _remove_journal(filename)
+            self._bind(filename)
+            
+
+    def load_from_file(self, filename: str) -> None:
+        """
+        Load tasks from a file
+        
+        Args:
+            filename(str): name of a file where we want to load from
+            
+        Example:
+            new_todolist = ToDoList()
+            new_todolist.load_from_file("Project.json") 
+        """
+        for _ in self.load_pages(filename):
+            pass
+            # Loading page by page and just not stopping between the pages is a full load
+
+    def load_pages(self, filename: str, page_size: int = PAGE_SIZE) -> Iterator[List[Task]]:
+        """
+        Load tasks from a file page by page.
+
+        The file is parsed incrementally, so the first page is available before the
+        rest of the file has been read. self.tasks grows with every page. The load
+        is only complete (and the journal bound) once all pages were consumed.
+
+        Args:
+            filename (str): name of a file where we want to load from
+            page_size (int): How many tasks one page holds.
+
+        Yields:
+            List[Task]: The tasks of the next page, already added to self.tasks.
+
+        Example:
+            new_todolist = ToDoList()
+            for page in new_todolist.load_pages("Project.json"):
+                print(len(new_todolist.tasks), "tasks loaded so far")
+        """
+        if not os.path.exists(filename):
+            print(f"File '{filename}' not found. Starting with an empty to-do list.")
+        self.flush()
+        # Changes to the previously open project still go to that project
+        self._unmap()
+        self._set_tasks([])
+
+        with INSTRUMENTATION.measure("load", filename, IO_READ), project_lock(filename, exclusive=False):
+            # Shared: other readers go on, but no save or journal append can
+            # change the file between the journal and the snapshot
+            # A generator cannot use @instrumented, the time between the pages counts too
+            identity = _file_identity(filename)
+            # Taken first: if someone saves while we read, reload_changes() reads it again
+            records, offset = _read_journal_tail(filename)
+            # Changes written after the last snapshot are waiting in the journal
+            page = []
+            for task in _stream_tasks(filename, records):
+                self.tasks.append(self._register(task))
+                page.append(task)
+                if len(page) >= page_size:
+                    yield page
+                    page = []
+            if page:
+                yield page
+
+            self.dirty = False
+            self._bind(filename, records, offset, identity)
+            
+
+    @instrumented("load_mapped", IO_READ)
+    def load_mapped(self, filename: str) -> None:
+        """
+        Open a project in the indexed format without loading it.
+
+        self.tasks becomes a MappedTasks sequence: a task is only read from the file
+        when it is accessed, so opening is instant and memory stays flat for any
+        number of tasks. Reading, counting and completing tasks work on the file
+        directly (completing flips one byte in it). The first add, delete, search or
+        use of active_tasks/completed_tasks loads the whole list like load_from_file().
+
+        Args:
+            filename (str): A project file saved with file_format=FORMAT_INDEXED.
+
+        Raises:
+            ValueError: If the file is in another format.
+
+        Example:
+            huge = ToDoList()
+            huge.load_mapped("projects/Archive.json")
+            huge.mark_task_completed(750000)
+        """
+        if detect_format(filename).name != FORMAT_INDEXED:
+            raise ValueError(f"'{filename}' is not in the {FORMAT_INDEXED!r} format, "
+                             f"save it with file_format=FORMAT_INDEXED first")
+        self.close()
+        # Changes to the previously open project still go to that project
+        self._unmap()
+        with project_lock(filename):
+            if _read_journal(filename):
+                # Changes are waiting in the journal, they have to be in the file before it is mapped
+                folded = ToDoList(fsync_policy=self.fsync_policy)
+                folded.load_from_file(filename)
+                folded.save_to_file(filename)
+        self._set_tasks([])
+        self._mapped = MappedTasks(filename, owner=self)
+        self.tasks = self._mapped
+        self.filename = filename
+        self.dirty = False
+
+    @instrumented("merge", IO_APPEND)
+    def merge_and_save_to_file(self, filename: str, dedupe: bool = False) -> int:
+        """
+        Merge existing tasks in the to-do list with current tasks and save it all together.
+
+        The existing project is not parsed or rewritten: the current tasks are appended
+        to its journal, so merging 10 tasks into a huge project costs 10 small records.
+        They become part of the JSON file at the next compaction.
+
+        Args:
+            filename (str): The to-do list to save the merged tasks into.
+            dedupe (bool): Skip tasks whose title is already in the project (or earlier
+                in this merge). The project is streamed once into a set of titles,
+                so each check is a hash lookup instead of a scan.
+
+        Returns:
+            int: How many tasks were merged, without the ones dedupe skipped.
+
+        Example:
+            added = new_todolist.merge_and_save_to_file("projects/Work.json", dedupe=True)
+        """
+        with project_lock(filename):
+            # From reading the journal to compacting it, no other writer gets in between
+            if not os.path.exists(filename):
+                # Nothing to merge with, the tasks simply become a new project
+                _write_snapshot(filename, self.tasks, fsync=self._should_fsync(), file_format=self.file_format)
+                return len(self.tasks)
+
+            records = _read_journal(filename)
+            # Only the small journal is read, it tells whether we can keep appending to it
+            new_tasks = self.tasks
+            if dedupe:
+                titles = {task.title for task in _stream_tasks(filename, records)}
+                new_tasks = []
+                for task in self.tasks:
+                    if task.title not in titles:
+                        titles.add(task.title)
+                        new_tasks.append(task)
+
+            # The tasks are added without ids, readers give them the next free ids of the project
+            additions = [_with_plan({"op": "add", "title": task.title, "completed": task.completed}, task)
+                         for task in new_tasks]
+            if _is_database(filename):
+                store = SqliteStore(filename, self.fsync_policy)
+                try:
+                    store.apply(additions)
+                    # One INSERT per task, the rest of the database is not touched
+                finally:
+                    store.close()
+                return len(additions)
+            _append_journal(filename, additions, restart=not records, fsync=self._should_fsync())
+
+            if len(records) + len(additions) >= self.compact_threshold:
+                target = ToDoList(fsync_policy=self.fsync_policy)
+                # No file_format: the compacted project stays in the format it has
+                target.load_from_file(filename)
+                target.save_to_file(filename)
+            return len(additions)
+
+    def compact(self) -> None:
+        """
+        Fold the journal back into the JSON snapshot of the current project.
+
+        Example:
+            new_todolist = ToDoList(journal=True)
+            new_todolist.load_from_file("Project.json")
+            new_todolist.compact()
+        """
+        if self.filename is not None:
+            self.save_to_file(self.filename)
+
+    def flush(self) -> None:
+        """
+        Write the changes that are waiting in memory, all in one write.
+
+        In journal mode these are the pending journal records. A write-behind list
+        without a journal saves the whole project if it has unsaved changes.
+        Safe to call from a background thread while the list is being changed.
+
+        Example:
+            new_todolist = ToDoList(journal=True, defer_writes=True)
+            new_todolist.load_from_file("Project.json")
+            new_todolist.add_task("Buy milk")
+            new_todolist.flush()
+        """
+        with self._write_lock:
+            with self._lock:
+                self._cancel_timer()
+            if not self.journal and not self._database:
+                written = self.dirty and self.write_behind and self.filename is not None
+                if written:
+                    self.save_to_file(self.filename)
+                    # Without a journal, writing the changes means saving the whole project
+            else:
+                written = self._write_pending()
+        if written and self.write_behind:
+            self._notify_saved()
+
+    def _write_pending(self) -> bool:
+        """
+        Append the pending journal records to the journal in one write.
+
+        The caller holds self._write_lock. self._lock is only taken to swap the
+        records out, the list can be changed while they are written.
+
+        Returns:
+            bool: True if records were written.
+        """
+        if self.filename is None:
+            with self._lock:
+                self._pending = []
+            return False
+        if self._database:
+            records = self._take_pending()
+            if not records:
+                return False
+            if self._store is None:
+                self._store = SqliteStore(self.filename, self.fsync_policy)
+            try:
+                with INSTRUMENTATION.measure("save", self.filename, IO_APPEND):
+                    renumbered = self._store.apply(records)
+                    # In journal and write-behind mode this is how the app saves
+            except BaseException:
+                self._restore_pending(records)
+                raise
+            with self._lock:
+                self._renumber(renumbered)
+                # Records of changes made meanwhile get the new ids too
+            return True
+        with project_lock(self.filename):
+            # From checking the journal to appending to it, no other writer gets in between
+            if not self.defer_writes:
+                self._catch_up()
+                # Written right after the change, so this is the thread that changes the list
+            up_to_date, taken, unnumbered = self._check_journal()
+            with self._lock:
+                if taken:
+                    self._move_pending_ids(taken, unnumbered)
+                records = self._take_pending()
+            if not records:
+                return False
+            with INSTRUMENTATION.measure("save", self.filename, IO_APPEND):
+                # In journal and write-behind mode this is how the app saves, the compaction
+                # below is measured by save_to_file() itself
+                try:
+                    if self._journal_file is None:
+                        if _journal_start(self.filename):
+                            self._journal_file = open(self.filename + JOURNAL_SUFFIX, "a")
+                            # Another program started a journal for this snapshot, ours go after its records
+                        else:
+                            _append_journal(self.filename, [], restart=True, fsync=False)
+                            # The new journal starts with its header line, after that we only append
+                            self._journal_file = open(self.filename + JOURNAL_SUFFIX, "a")
+                    self._journal_file.write("".join(json.dumps(record) + "\n" for record in records))
+                    self._journal_file.flush()
+                except BaseException:
+                    self._restore_pending(records)
+                    raise
+                if self._should_fsync():
+                    os.fsync(self._journal_file.fileno())
+            self._journal_records += len(records)
+            if up_to_date:
+                self._journal_offset = os.fstat(self._journal_file.fileno()).st_size
+                # Nobody else wrote since we last looked, so the list has everything up to here
+                if self._journal_records >= self.compact_threshold:
+                    self.compact()
+                    # With changes of others still unread the compaction waits for reload_changes()
+        return True
+
+    def _take_pending(self) -> list:
+        """Swap the pending records out for writing. The changes made from now on are pending again."""
+        with self._lock:
+            records, self._pending = self._pending, []
+            self.dirty = False
+        return records
+
+    def _restore_pending(self, records: list) -> None:
+        """Put records back in front of the pending ones after their write failed."""
+        with self._lock:
+            self._pending[:0] = records
+            self.dirty = True
+
+    def _check_journal(self) -> Tuple[bool, Optional[set], int]:
+        """
+        Get the journal ready for the pending records when other programs may write
+        to the same project.
+
+        The append handle is dropped if the journal was removed or replaced, or
+        belongs to a snapshot that was saved over since: the records would be lost there.
+        The tasks of the other programs are not put into the list here, this may run
+        on the write-behind thread while the GUI shows the list; reload_changes() does that.
+
+        Returns:
+            Tuple[bool, set, int]: True if nobody else wrote since we last read the project,
+                so after appending, the list holds everything up to the end of the journal.
+                Then the ids the other programs used and how many tasks they added without
+                an id: pending adds with those ids need new ones (see _move_pending_ids).
+        """
+        path = self.filename + JOURNAL_SUFFIX
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+        if self._journal_file is not None and (
+                stat is None or os.fstat(self._journal_file.fileno()).st_ino != stat.st_ino):
+            self._journal_file.close()
+            self._journal_file = None
+
+        if _file_identity(self.filename) != self._seen_snapshot:
+            records = _read_journal(self.filename)
+            taken = {task.id for task in _stream_tasks(self.filename, records)}
+            # The project was saved over, every id in it is taken (ids are resolved by the reader)
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+            self._journal_records = len(records)
+            return False, taken, 0
+        if stat is None or stat.st_size == self._journal_offset:
+            return True, None, 0
+        records, _ = _read_journal_tail(self.filename, self._journal_offset if stat.st_size > self._journal_offset else 0)
+        return (False, {record.get("id") for record in records if record.get("op") == "add"},
+                sum(1 for record in records if record.get("op") == "add" and record.get("id") is None))
+
+    def _move_pending_ids(self, taken: set, unnumbered: int = 0) -> None:
+        """
+        Give pending (not yet written) adds new ids if another program already used theirs.
+
+        Args:
+            taken (set): Ids the other programs wrote.
+            unnumbered (int): How many tasks they added without an id. Readers give those
+                the next free ids, so all pending adds move past them to be safe.
+        """
+        clashes = [record["id"] for record in self._pending if record.get("op") == "add"
+                   and record.get("before") is None and record.get("id") in self._by_id
+                   and (unnumbered or record["id"] in taken)]
+        if not clashes:
+            return
+        first = max(self._next_id, max((task_id for task_id in taken if task_id is not None), default=0) + 1)
+        self._renumber({old_id: first + unnumbered + number for number, old_id in enumerate(clashes)})
+
+    def _catch_up(self) -> bool:
+        """
+        Apply the changes other programs wrote since we last read or wrote the project,
+        see reload_changes(). The caller holds self._write_lock.
+
+        Returns:
+            bool: True if tasks changed.
+        """
+        changes = self._read_changes()
+        with self._lock:
+            return self._apply_changes(changes)
+
+    def _changes_base(self) -> tuple:
+        """What the list has read of its project so far, changes read later only fit this state."""
+        return self.filename, self._seen_snapshot, self._journal_offset, self._data_version
+
+    def _read_changes(self) -> Optional[tuple]:
+        """
+        Read the changes other programs wrote since we last read or wrote the project,
+        without changing the list (see read_changes()).
+
+        Returns:
+            tuple: (base, kind, data) for _apply_changes(), or None if nothing changed.
+        """
+        if self.filename is None or self._mapped is not None:
+            return None
+        base = self._changes_base()
+        if self._database:
+            if self._store is None:
+                return None
+            version = self._store.data_version()
+            if version == self._data_version:
+                return None
+            return base, "rows", (list(self._store.iter_tasks()), version)
+        if self.dirty and not self.journal:
+            return None
+            # Without records of our own changes they cannot be kept on top of the others
+
+        if _file_identity(self.filename) != self._seen_snapshot:
+            return base, "snapshot", self._read_snapshot()
+        try:
+            size = os.path.getsize(self.filename + JOURNAL_SUFFIX)
+        except FileNotFoundError:
+            size = 0
+        if size == self._journal_offset:
+            return None
+        if size < self._journal_offset:
+            return base, "snapshot", self._read_snapshot()
+            # The journal was started again
+        records, offset = _read_journal_tail(self.filename, self._journal_offset)
+        if any(record.get("op") == "add" and record.get("id") is None for record in records):
+            return base, "snapshot", self._read_snapshot()
+            # Tasks merged in without ids get theirs from the reader, read the file like every reader
+        return base, "tail", (records, offset)
+
+    def _journal_grew(self) -> bool:
+        """Tell whether the journal of our project has records we have not read yet."""
+        return bool(_read_journal_tail(self.filename, self._journal_offset)[0])
+
+    def _replay_tail(self, records: list) -> bool:
+        """
+        Replay journal records other programs appended (see _catch_up).
+
+        Our own records can be among them, when we appended after records we had not
+        read yet. Our tasks are in the list already, they move behind the ones added
+        before them, so the order is the one every reader of the file sees.
+
+        Returns:
+            bool: True if there were records.
+        """
+        added = [record.get("id") for record in records
+                 if record.get("op") == "add" and record.get("before") is None]
+        own = [task_id for task_id in added if task_id in self._by_id]
+        self._replay(records)
+        if own:
+            tail = set(added)
+            self.tasks[:] = ([task for task in self.tasks if task.id not in tail] +
+                             [self._by_id[task_id] for task_id in dict.fromkeys(added) if task_id in self._by_id])
+            self._views_in_order = False
+        return bool(records)
+
+    def _read_snapshot(self) -> tuple:
+        """Read the whole project again, for when the snapshot changed (applied with _adopt)."""
+        identity = _file_identity(self.filename)
+        records, offset = _read_journal_tail(self.filename)
+        return list(_stream_tasks(self.filename, records)), identity, offset, len(records)
+
+    def _apply_changes(self, changes: Optional[tuple]) -> bool:
+        """
+        Put changes read by _read_changes() into the list. The caller holds both locks.
+
+        Args:
+            changes (tuple): What _read_changes() returned.
+
+        Returns:
+            bool: True if tasks changed.
+        """
+        if changes is None:
+            return False
+        base, kind, data = changes
+        if base != self._changes_base() or (self.dirty and not self.journal):
+            return False
+            # The list read or wrote the project since, the next reload reads it again
+        if kind == "rows":
+            tasks, self._data_version = data
+            return self._merge_external(lambda: self._adopt(tasks))
+        if kind == "tail":
+            records, self._journal_offset = data
+            self._journal_records += len(records)
+            return self._merge_external(lambda: self._replay_tail(records))
+        tasks, identity, offset, count = data
+        changed = self._merge_external(lambda: self._adopt(tasks))
+        self._seen_snapshot = identity
+        self._journal_offset = offset
+        self._journal_records = count
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+            # It may belong to the old snapshot, the next write checks which journal to use
+        return changed
+
+    def _merge_external(self, apply: Callable[[], bool]) -> bool:
+        """
+        Run apply(), which puts the changes of other programs into the list, with the
+        tasks added here but not written yet set aside. They go back at the end
+        afterwards (where they are in the file, too) and get a new id if theirs was taken.
+
+        Returns:
+            bool: What apply() returned, or True if our own tasks moved.
+        """
+        local = [self._by_id[record["id"]] for record in self._pending
+                 if record.get("op") == "add" and record.get("id") in self._by_id]
+        local = list({id(task): task for task in local}.values())
+        # An id can be added twice (undo, redo), the task is set aside once
+        for task in local:
+            self._unregister(task)
+        if local:
+            self.tasks[:] = [task for task in self.tasks if task._owner is self]
+            # Only the tasks set aside have no owner now
+        changed = apply()
+        renumbered = {}
+        for task in local:
+            old_id = task.id
+            self.tasks.append(self._register(task))
+            if task.id != old_id:
+                renumbered[old_id] = task.id
+        self._renumber_records(renumbered)
+        return changed or bool(renumbered)
+
+    def _adopt(self, tasks: List[Task]) -> bool:
+        """
+        Make the list hold tasks read again from the project file, then apply the
+        changes of this list that are not written yet on top.
+
+        Tasks with an id we already have keep their Task object (the GUI rows showing
+        them stay valid), only a different title, completed flag or plan is copied over.
+
+        Args:
+            tasks (List[Task]): The tasks in the file, in order.
+
+        Returns:
+            bool: True if anything changed.
+        """
+        changed = False
+        adopted = []
+        for task in tasks:
+            current = self._by_id.get(task.id)
+            if current is None:
+                current = self._register(task)
+                changed = True
+            else:
+                if current.title != task.title:
+                    self._unregister(current)
+                    current.title = task.title
+                    self._register(current)
+                    # Re-registering puts the new title into the search index
+                    changed = True
+                if current.completed != task.completed:
+                    current.completed = task.completed
+                    changed = True
+                if (current.priority, current.due) != (task.priority, task.due):
+                    self._set_plan(current, task.priority, task.due)
+                    changed = True
+            adopted.append(current)
+        kept = {task.id for task in tasks}
+        for task in self.tasks:
+            if task.id not in kept:
+                self._unregister(task)
+                changed = True
+        if changed or any(old is not new for old, new in zip(self.tasks, adopted)):
+            self.tasks[:] = adopted
+            self._views_in_order = False
+            changed = True
+        self._replay([record for record in self._pending if record.get("op") != "add"])
+        return changed
+
+    def close(self) -> None:
+        """
+        Write pending records and close the journal file handle (the journal itself stays on disk).
+
+        Example:
+            new_todolist.close()
+        """
+        with self._write_lock:
+            self.flush()
+            self._release()
+
+    def _release(self) -> None:
+        """
+        Close the journal file handle and the database connection without writing the
+        pending records. They stay pending, for the project the list is bound to next.
+        """
+        with self._write_lock:
+            if self._mapped is not None and self.fsync_policy != FSYNC_NEVER:
+                self._mapped.flush()
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+            if self._journal_file is not None:
+                if self.fsync_policy != FSYNC_NEVER and self._unsynced_writes:
+                    os.fsync(self._journal_file.fileno())
+                    self._unsynced_writes = 0
+                self._journal_file.close()
+                self._journal_file = None
+
+    def _should_fsync(self) -> bool:
+        """
+        Count one write and decide whether it has to be forced to disk.
+
+        Returns:
+            bool: True if the caller should fsync now.
+        """
+        if self.fsync_policy == FSYNC_ALWAYS:
+            return True
+        if self.fsync_policy == FSYNC_NEVER:
+            return False
+        self._unsynced_writes += 1
+        if self._unsynced_writes >= FSYNC_BATCH_SIZE:
+            self._unsynced_writes = 0
+            return True
+        return False
+
+    def _register(self, task: Task) -> Task:
+        """
+        Give a task a stable id (if it has none yet) and add it to the id index.
+
+        Args:
+            task (Task): The task to index. It is not appended to self.tasks here.
+
+        Returns:
+            Task: The same task, for convenience.
+        """
+        if task.id is None or task.id in self._by_id:
+            task.id = self._next_id
+        self._by_id[task.id] = task
+        if task.id >= self._next_id:
+            self._next_id = task.id + 1
+        self._enter_view(self._done if task.completed else self._active, task)
+        task._owner = self
+        if self._search_index is not None:
+            self._search_index.add(task)
+        if self._schedule is not None and not task.completed:
+            self._schedule.add(task)
+        return task
+
+    def _unregister(self, task: Task) -> None:
+        """
+        Remove a task from the id index, the active/completed views and the search index.
+
+        Args:
+            task (Task): The task to forget. It is not removed from self.tasks here.
+        """
+        del self._by_id[task.id]
+        self._active.pop(task.id, None)
+        self._done.pop(task.id, None)
+        task._owner = None
+        if self._search_index is not None:
+            self._search_index.remove(task)
+        if self._schedule is not None:
+            self._schedule.remove(task)
+
+    def _status_changed(self, task: Task) -> None:
+        """
+        Move a task to the view that matches its status. Called by Task.completed.
+
+        Args:
+            task (Task): A task of this list whose completed flag just changed.
+        """
+        if self._mapped is not None:
+            with self._write_lock, project_lock(self._mapped.filename):
+                # Flipping the byte changes the file, no other writer may be in the middle of it
+                self._refresh_mapping()
+                self._mapped.set_completed(task)
+                if self._should_fsync():
+                    self._mapped.flush()
+            return
+        if self._by_id.get(task.id) is not task:
+            return
+            # A copy read from a mapped file before the list was loaded completely
+        if task.completed:
+            del self._active[task.id]
+            self._enter_view(self._done, task)
+            if self._schedule is not None:
+                self._schedule.remove(task)
+        else:
+            del self._done[task.id]
+            self._enter_view(self._active, task)
+            if self._schedule is not None:
+                self._schedule.add(task)
+
+    def _enter_view(self, view: Dict[int, Task], task: Task) -> None:
+        """
+        Put a task into the active or the completed view.
+
+        A dict keeps the order things were put in, so a task that belongs in front of
+        others (its id is smaller, ids are given out in list order) marks the views for
+        sorting. New tasks, by far the most common case, simply go to the end.
+        """
+        if view and next(reversed(view)) > task.id:
+            self._views_in_order = False
+        view[task.id] = task
+
+    def _order_views(self) -> None:
+        """Sort the active and completed views into list order again, if a change mixed them up."""
+        if self._views_in_order:
+            return
+        for view in (self._active, self._done):
+            tasks = [task for task in self.tasks if task.id in view]
+            view.clear()
+            view.update((task.id, task) for task in tasks)
+            # Cleared and refilled in place, so views handed out earlier see the new order too
+        self._views_in_order = True
+
+    def _schedule_index(self) -> ScheduleIndex:
+        """Return the schedule index, building it from the open tasks on first use."""
+        self._materialize()
+        if self._schedule is None:
+            self._schedule = ScheduleIndex()
+            for task in self._active.values():
+                self._schedule.add(task)
+        return self._schedule
+
+    def _set_plan(self, task: Task, priority: Optional[int], due: Optional[date]) -> None:
+        """Change the priority and due date of a task of this list and move it in the schedule index."""
+        indexed = self._schedule is not None and not task.completed
+        if indexed:
+            self._schedule.remove(task)
+        task.priority = priority
+        task.due = due
+        if indexed:
+            self._schedule.add(task)
+
+    def _remember(self, deltas: list) -> None:
+        """
+        Put the inverse deltas of a new operation on the undo history.
+
+        A new operation makes everything undone so far impossible to redo. Old
+        operations are forgotten when there are more than undo_limit of them or
+        more than UNDO_MAX_DELTAS deltas in total.
+
+        Args:
+            deltas (list): ("delete", id), ("insert", position, task), ("uncomplete", id)
+                or ("plan", id, priority, due) tuples, in the order the changes happened.
+        """
+        if not deltas or self.undo_limit <= 0:
+            return
+        self._history_size -= sum(len(redo) for redo in self._redo)
+        self._redo = []
+        if len(deltas) > UNDO_MAX_DELTAS:
+            self._clear_history()
+            # Too big to remember, and older operations cannot be undone past it
+            return
+        self._undo.append(deltas)
+        self._history_size += len(deltas)
+        while len(self._undo) > self.undo_limit or self._history_size > UNDO_MAX_DELTAS:
+            self._history_size -= len(self._undo.popleft())
+
+    def _clear_history(self) -> None:
+        """Forget everything undo() and redo() could do, for example when another project is loaded."""
+        self._undo = deque()
+        self._redo = []
+        self._history_size = 0
+
+    def _apply_deltas(self, deltas: list) -> list:
+        """
+        Apply deltas (see _remember) in order and journal the result in one write.
+
+        Runs of inserts or deletes are applied in one pass over the list, so undoing
+        the deletion of 100k tasks does not shift the list 100k times.
+
+        Args:
+            deltas (list): The deltas to apply.
+
+        Returns:
+            list: The inverse deltas, undoing them applies them in reverse order again.
+        """
+        inverse = []
+        records = []
+        start = 0
+        while start < len(deltas):
+            op = deltas[start][0]
+            end = start + 1
+            if op in ("insert", "delete"):
+                while end < len(deltas) and deltas[end][0] == op:
+                    end += 1
+            run = deltas[start:end]
+            if op == "insert":
+                inverse.extend(self._insert_run(run, records))
+            elif op == "delete":
+                inverse.extend(self._delete_run(run, records))
+            elif op == "plan":
+                _, task_id, priority, due = run[0]
+                self._materialize()
+                task = self._by_id.get(task_id)
+                if task is not None:
+                    inverse.append(("plan", task_id, task.priority, task.due))
+                    self._set_plan(task, priority, due)
+                    records.append(_plan_record(task))
+            else:
+                task_id = run[0][1]
+                task = self.get_task(task_id)
+                if task is not None:
+                    task.completed = op == "complete"
+                    if self._mapped is None:
+                        records.append({"op": op, "id": task_id})
+                inverse.append(("uncomplete" if op == "complete" else "complete", task_id))
+            start = end
+        self._log_many(records)
+        return inverse
+
+    def _insert_run(self, run: list, records: list) -> list:
+        """
+        Put deleted tasks back at their positions and journal them with the id of
+        the task that follows them, so readers of the file restore the order too.
+
+        Returns:
+            list: ("delete", id) deltas that remove them again.
+        """
+        self._materialize()
+        positions = [position for _, position, _ in run]
+        if positions == sorted(positions):
+            merged = []
+            rest = iter(self.tasks)
+            for _, position, task in run:
+                while len(merged) < position:
+                    following = next(rest, None)
+                    if following is None:
+                        break
+                        # Another program removed tasks since the delete, the rest goes to the end
+                    merged.append(following)
+                merged.append(task)
+            merged.extend(rest)
+            self.tasks[:] = merged
+            # One pass instead of one list.insert() (which moves the rest of the list) per task
+        else:
+            for _, position, task in run:
+                self.tasks.insert(position, task)
+        for _, _, task in run:
+            self._register(task)
+        for _, position, task in reversed(run):
+            # Last one first: the task a record points to is then always back already
+            if position >= len(self.tasks) or self.tasks[position] is not task:
+                position = self.tasks.index(task)
+            record = _with_plan({"op": "add", "id": task.id, "title": task.title, "completed": task.completed}, task)
+            if position + 1 < len(self.tasks):
+                record["before"] = self.tasks[position + 1].id
+            records.append(record)
+        return [("delete", task.id) for _, _, task in run]
+
+    def _delete_run(self, run: list, records: list) -> list:
+        """
+        Delete tasks by id in one pass over the list.
+
+        Returns:
+            list: ("insert", position, task) deltas that put them back.
+        """
+        self._materialize()
+        doomed = {task_id for _, task_id in run if task_id in self._by_id}
+        kept = []
+        removed = []
+        for position, task in enumerate(self.tasks):
+            if task.id in doomed:
+                removed.append(("insert", position, task))
+                self._unregister(task)
+            else:
+                kept.append(task)
+        self.tasks[:] = kept
+        records.extend({"op": "delete", "id": task_id} for task_id in sorted(doomed))
+        return removed[::-1]
+
+    def _set_tasks(self, tasks: List[Task]) -> None:
+        """
+        Replace all tasks and rebuild the id index.
+
+        Tasks keep their id unless it is missing or already taken by an earlier task,
+        then they get the next free id. This is the same rule the streaming loader uses.
+
+        Args:
+            tasks (List[Task]): The new content of the list.
+        """
+        for task in self.tasks:
+            task._owner = None
+            # Old tasks may still be shown somewhere, completing them must not touch the new views
+        self.tasks = []
+        self._by_id = {}
+        self._active = {}
+        self._done = {}
+        self._views_in_order = True
+        self._next_id = 1
+        self._search_index = None
+            # A new set of tasks, the next search() indexes them again
+        self._schedule = None
+        self._clear_history()
+        for task in tasks:
+            self.tasks.append(self._register(task))
+
+    def _refresh_mapping(self) -> None:
+        """
+        Map the project file again if other programs changed it since it was mapped.
+        The caller holds project_lock().
+
+        Records another program journaled are folded into the file first: a flip
+        changes the file's mtime, after which the journal no longer matches it and
+        the records would be ignored by every reader.
+        """
+        filename = self._mapped.filename
+        journaled = _journal_start(filename) != 0
+        identity = _file_identity(filename)
+        if not journaled and identity is not None and identity[2] == self._mapped.inode:
+            return
+        if journaled:
+            folded = ToDoList(fsync_policy=self.fsync_policy)
+            folded.load_from_file(filename)
+            folded.save_to_file(filename)
+            # No file_format: the folded project stays indexed
+        self._unmap()
+        self._mapped = MappedTasks(filename, owner=self)
+        self.tasks = self._mapped
+
+    def _unmap(self) -> None:
+        """Close the mapped project file, if there is one, and empty the list."""
+        if self._mapped is None:
+            return
+        if self.fsync_policy != FSYNC_NEVER:
+            self._mapped.flush()
+        self._mapped.close()
+        self._mapped = None
+        self.tasks = []
+
+    def _materialize(self) -> None:
+        """
+        Turn a mapped project into a normal, fully loaded list.
+
+        Called before every change the file format cannot do in place. Afterwards
+        the list behaves exactly as after load_from_file() of the same file.
+        """
+        if self._mapped is None:
+            return
+        with self._write_lock:
+            filename = self._mapped.filename
+            tasks = list(self._mapped)
+            self._unmap()
+            history = self._undo, self._redo, self._history_size
+            self._set_tasks(tasks)
+            self._undo, self._redo, self._history_size = history
+            # Still the same project with the same ids, what can be undone stays
+            self._bind(filename)
+
+    def _replay(self, records: list) -> None:
+        """
+        Apply journal records in the order they were written, without journaling them again.
+
+        Args:
+            records (list): Records returned by _read_journal.
+        """
+        for record in records:
+            op = record.get("op")
+            if op == "add":
+                if record.get("id") in self._by_id:
+                    continue
+                    # Already in the snapshot (the save ran between the change and its record)
+                task = self._register(_task_from_item(record))
+                following = self._by_id.get(record.get("before"))
+                if following is not None:
+                    self.tasks.insert(self.tasks.index(following), task)
+                    self._views_in_order = False
+                    # An undone delete: the task goes back in front of the task that followed it
+                else:
+                    self.tasks.append(task)
+                continue
+
+            if "id" in record:
+                task = self._by_id.get(record["id"])
+            elif 1 <= record.get("index", 0) <= len(self.tasks):
+                task = self.tasks[record["index"] - 1]
+                # Journals written before tasks had ids address them by position
+            else:
+                task = None
+            if task is None:
+                continue
+            if op == "complete":
+                task.completed = True
+            elif op == "uncomplete":
+                task.completed = False
+            elif op == "plan":
+                self._set_plan(task, record.get("priority"), _due_from_text(record.get("due")))
+            elif op == "delete":
+                self._unregister(task)
+                self.tasks.remove(task)
+
+    def _bind(self, filename: str, records: Optional[list] = None, offset: int = 0,
+              identity: Optional[list] = None) -> None:
+        """
+        Tie the list to the project file it was loaded from or saved to, so later
+        changes are written there: as rows of a database, as journal records, or
+        (without a journal) by write-behind saves.
+
+        Args:
+            filename (str): The project file.
+            records (list): Records already read from a valid journal, if any.
+            offset (int): Where the journal ends after those records (see _read_journal_tail).
+            identity (list): _file_identity() of the file when it was read, None after a save.
+        """
+        if _is_database(filename):
+            self._release()
+            self._database = True
+            self.filename = filename
+            self._store = SqliteStore(filename, self.fsync_policy)
+            self._data_version = self._store.data_version()
+            # Our own commits do not change it, so a new value means another program wrote
+        elif self.journal:
+            self._database = False
+            self._start_journal(filename, records)
+        else:
+            self._release()
+            self._database = False
+            self.filename = filename
+        self._seen_snapshot = identity if identity is not None else _file_identity(filename)
+        self._journal_offset = offset if records else 0
+
+    def _renumber(self, renumbered: Dict[int, int]) -> None:
+        """
+        Give tasks the ids the database gave them (see SqliteStore.apply), or new ids
+        when another process used theirs first. The undo history follows them.
+
+        Args:
+            renumbered (Dict[int, int]): old id -> new id.
+        """
+        tasks = [self._by_id[old_id] for old_id in renumbered if old_id in self._by_id]
+        for task in tasks:
+            self._unregister(task)
+            # All first, a new id may be the old id of another task in the same batch
+        for task in tasks:
+            task.id = renumbered[task.id]
+            self._register(task)
+        self._renumber_records(renumbered)
+
+    def _renumber_records(self, renumbered: Dict[int, int]) -> None:
+        """
+        Change ids in the pending records and the undo history after tasks got new ids.
+
+        Args:
+            renumbered (Dict[int, int]): old id -> new id.
+        """
+        for record in self._pending:
+            for key in ("id", "before"):
+                if record.get(key) in renumbered:
+                    record[key] = renumbered[record[key]]
+        for stack in (self._undo, self._redo):
+            for number, deltas in enumerate(stack):
+                stack[number] = [delta if delta[0] == "insert"
+                                 else (delta[0], renumbered.get(delta[1], delta[1])) + delta[2:]
+                                 for delta in deltas]
+                # ("insert", position, task) holds the task itself, the others its id
+                # (and "plan" the old priority and due date after it)
+
+    def _start_journal(self, filename: str, records: Optional[list] = None) -> None:
+        """
+        Bind the journal to a project file.
+
+        A valid journal for the current snapshot is kept and appended to,
+        anything else is replaced by a fresh journal.
+
+        Args:
+            filename (str): The project file the journal belongs to.
+            records (list): Records already read from a valid journal, if any.
+        """
+        self._release()
+        self.filename = filename
+        if records:
+            self._journal_records = len(records)
+            self._journal_file = open(filename + JOURNAL_SUFFIX, "a")
+        else:
+            _remove_journal(filename)
+            self._journal_records = 0
+
+    def _log(self, record: dict) -> None:
+        """
+        Append one record to the journal. One mutation is one small write.
+
+        With defer_writes the record only waits in memory until the next flush().
+
+        Args:
+            record (dict): The operation, for example {"op": "add", "title": "Buy milk"}.
+        """
+        self._log_many([record])
+
+    def _log_many(self, records: list) -> None:
+        """
+        Append the records of one bulk operation, they are written together in one write
+        (one transaction for a database).
+
+        Args:
+            records (list): The operations, in the order they happened.
+        """
+        if not records:
+            return
+        journaled = (self.journal or self._database) and self.filename is not None
+        with self._lock:
+            self.dirty = True
+            if journaled:
+                self._pending.extend(records)
+            # Together, so a write that swaps the records out at this moment gets both or neither
+        if self.write_behind:
+            self._schedule_write()
+        if journaled and not self.defer_writes:
+            self.flush()
+
+    def _schedule_write(self) -> None:
+        """
+        Remember that the list changed and make sure a write-behind timer is running.
+
+        A change only stores the time, so a burst of a thousand changes starts one timer
+        and not a thousand.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._last_change = now
+            if self._timer is None:
+                self._dirty_since = now
+                self._start_timer(min(self.debounce, self.max_latency))
+
+    def _start_timer(self, delay: float) -> None:
+        """Start the write-behind timer thread."""
+        self._timer = threading.Timer(delay, self._write_behind_due)
+        self._timer.daemon = True
+        # A daemon timer does not keep the program alive, the atexit hook writes instead
+        self._timer.start()
+
+    def _cancel_timer(self) -> None:
+        """Stop a waiting write-behind timer."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _write_behind_due(self) -> None:
+        """
+        Timer callback: write the changes, unless the list is still busy and the
+        maximum latency has not been reached yet. Then wait a bit longer.
+        """
+        with self._lock:
+            self._timer = None
+            if not self.dirty:
+                return
+            now = time.monotonic()
+            quiet_at = self._last_change + self.debounce
+            deadline = self._dirty_since + self.max_latency
+            if now < quiet_at and now < deadline:
+                self._start_timer(min(quiet_at, deadline) - now)
+                return
+        self.flush()
+        # Outside self._lock: changes made during the write only start the next timer
+
+    def _notify_saved(self) -> None:
+        """Tell the owner (for example the GUI) that write-behind wrote the changes."""
+        if self.on_saved is not None:
+            self.on_saved()
+
+
+_write_behind_lists = weakref.WeakSet()
+    # Every list in write-behind mode, so their changes can be written when the program ends
+
+
+@atexit.register
+def _flush_write_behind_lists() -> None:
+    """Write the pending changes of all write-behind lists when Python exits."""
+    for todo_list in list(_write_behind_lists):
+        todo_list.close()
+
+
+def _file_fingerprint(filename: str) -> Optional[list]:
+    """
+    Return [size, mtime_ns] of a file, or None when it does not exist.
+
+    The journal stores this for the snapshot it extends. If the snapshot was rewritten
+    afterwards (compaction or a save from somewhere else) the journal is stale and ignored.
+    """
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _file_identity(filename: str) -> Optional[list]:
+    """
+    Return [size, mtime_ns, inode] of a file, or None when it does not exist.
+
+    Like _file_fingerprint, but a list also uses it to notice that another process
+    rewrote its project. Saves replace the file, which always gives it a new inode,
+    so even a save within the same mtime tick (coarse file system clocks) is noticed.
+    """
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+def _journal_start(filename: str) -> int:
+    """
+    Check the header line of the journal of a project file.
+
+    Args:
+        filename (str): The project file (not the journal itself).
+
+    Returns:
+        int: The length of the header line in bytes, where the records start,
+            or 0 if there is no journal for the snapshot that is in filename now.
+    """
+    try:
+        with open(filename + JOURNAL_SUFFIX, "rb") as f:
+            line = f.readline()
+    except FileNotFoundError:
+        return 0
+    if not line.endswith(b"\n"):
+        return 0
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return 0
+    if header.get("op") != "base" or header.get("snapshot") != _file_fingerprint(filename):
+        return 0
+    return len(line)
+
+
+def _read_journal_tail(filename: str, offset: int = 0) -> Tuple[list, int]:
+    """
+    Read the journal records of a project file from a byte offset on.
+
+    With offset 0 the header is checked first. A later offset is one returned by
+    an earlier call, so a list only reads what other processes appended since.
+
+    Args:
+        filename (str): The project file (not the journal itself).
+        offset (int): Where to start reading, 0 for the whole journal.
+
+    Returns:
+        Tuple[list, int]: The records, and the offset right after the last complete one
+            (0 if there is no valid journal). A record that is still being written is
+            read the next time.
+    """
+    if offset == 0:
+        offset = _journal_start(filename)
+        if offset == 0:
+            return [], 0
+    try:
+        with open(filename + JOURNAL_SUFFIX, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+
+    records = []
+    for line in data.split(b"\n")[:-1]:
+        # The last piece is empty, or a record without its newline yet
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break
+            # A half written last line (crash while appending) ends the journal
+        offset += len(line) + 1
+    return records, offset
+
+
+def _read_journal(filename: str) -> list:
+    """
+    Read the journal records that still apply to the snapshot in filename.
+
+    Args:
+        filename (str): The project file (not the journal itself).
+
+    Returns:
+        list: The records after the header line, or [] if there is no valid journal.
+    """
+    return _read_journal_tail(filename)[0]
+
+
+_WHITESPACE = re.compile(r"\s*")
+_SEPARATOR = re.compile(r"\s*,\s*")
+
+
+def _task_from_item(item: dict) -> Task:
+    """
+    Build a Task from one dictionary of a JSON project file.
+
+    Args:
+        item (dict): For example {"id": 3, "title": "Buy milk", "completed": false}, with
+            "priority" and "due" if the task has them. Journal add records look the same.
+    """
+    due = item.get("due")
+    task = Task(item["title"], item.get("id"), item.get("priority"), date.fromisoformat(due) if due else None)
+    # We are implementing the value from 'title' and the stable id if the file has one
+    task._completed = bool(item.get("completed", False))
+    # Default version supposed to set on False and if not empty he just gonna write what in the dictionary
+    # The new task belongs to no list yet, so the flag is set without going through the property
+    return task
+
+
+def iter_snapshot(filename: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Task]:
+    """
+    Read the tasks of a project file one by one, without loading the whole file.
+
+    The file format (JSON or compact binary) is detected from the first bytes of the file.
+    The file is read in chunks and every task is decoded as soon as it is complete,
+    so memory stays around one chunk plus one task.
+    The journal of the file is not applied here, see iter_task_pages().
+
+    Args:
+        filename (str): The project file.
+        chunk_size (int): How many characters (bytes for binary files) to read at once.
+
+    Yields:
+        Task: The tasks in file order, with the ids stored in the file (None for old files).
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not a list of tasks.
+
+    Example:
+        for task in iter_snapshot("projects/Work.json"):
+            print(task)
+    """
+    yield from detect_format(filename).iter_tasks(filename, chunk_size)
+
+
+def _iter_json_tasks(filename: str, chunk_size: int) -> Iterator[Task]:
+    """
+    Stream the tasks of a JSON project file (see iter_snapshot).
+
+    Every element of the task array is decoded with raw_decode as soon as the
+    chunks read so far contain all of it.
+    """
+    decoder = json.JSONDecoder()
+    with open(filename, "r") as f:
+        buffer = ""
+        pos = 0
+
+        def read_more() -> bool:
+            # Drop what was already decoded and append the next chunk
+            nonlocal buffer, pos
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def peek() -> str:
+            # Skip whitespace and return the next character ("" at the end of the file)
+            nonlocal pos
+            while True:
+                pos = _WHITESPACE.match(buffer, pos).end()
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not read_more():
+                    return ""
+
+        if peek() != "[":
+            raise ValueError(f"'{filename}' is not a JSON list of tasks")
+        pos += 1
+        if peek() == "]":
+            return
+
+        decode = decoder.raw_decode
+        separator = _SEPARATOR.match
+        while True:
+            peek()
+            while True:
+                try:
+                    item, pos = decode(buffer, pos)
+                    break
+                except json.JSONDecodeError:
+                    # The task is cut off at the end of the buffer, read the rest of it
+                    if not read_more():
+                        raise
+            yield _task_from_item(item)
+
+            # Fast path: the next task already starts inside the buffer
+            match = separator(buffer, pos)
+            if match is not None and match.end() < len(buffer):
+                pos = match.end()
+                continue
+
+            next_char = peek()
+            if next_char == "]":
+                return
+            if next_char != ",":
+                raise ValueError(f"'{filename}' is not a JSON list of tasks")
+            pos += 1
+
+
+def _read_snapshot(filename: str) -> List[Task]:
+    """
+    Read the tasks stored in a project file (without its journal).
+
+    Args:
+        filename (str): The project file.
+
+    Returns:
+        List[Task]: The tasks, with the ids stored in the file (None for old files without ids).
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    return list(iter_snapshot(filename))
+
+
+def _stream_tasks(filename: str, records: list) -> Iterator[Task]:
+    """
+    Stream the tasks of a project file with its journal already applied.
+
+    Ids are resolved like ToDoList._set_tasks() does it, so every reader of the same
+    file sees the same ids. Only the ids seen so far are kept in memory, not the tasks.
+
+    Args:
+        filename (str): The project file.
+        records (list): The journal records of the file (see _read_journal).
+
+    Yields:
+        Task: The current tasks in order, snapshot first, then tasks added in the journal.
+    """
+    if any(r.get("op") in ("complete", "delete") and "id" not in r for r in records):
+        # Journals written before tasks had ids address tasks by position,
+        # which only makes sense on the fully loaded list
+        old_list = ToDoList()
+        try:
+            old_list._set_tasks(_read_snapshot(filename))
+        except FileNotFoundError:
+            pass
+        old_list._replay(records)
+        yield from old_list.tasks
+        return
+
+    completed = {}   # id -> completed, the last complete/uncomplete record wins
+    planned = {}     # id -> (priority, due) of the last plan record
+    deleted = set()
+    added = {}       # id -> the latest add record of that id, in the order of the records
+    for number, record in enumerate(records):
+        op = record.get("op")
+        task_id = record.get("id")
+        if op == "add":
+            key = task_id if task_id is not None else ("new", number)
+            added.pop(key, None)
+            added[key] = record
+            if task_id is not None:
+                deleted.discard(task_id)
+                # Added again after a delete: an undone delete
+                completed[task_id] = record.get("completed", False)
+                planned.pop(task_id, None)
+                # The add record carries the plan the task had then
+        elif op == "plan":
+            planned[task_id] = (record.get("priority"), _due_from_text(record.get("due")))
+        elif op == "complete":
+            completed[task_id] = True
+        elif op == "uncomplete":
+            completed[task_id] = False
+        elif op == "delete":
+            deleted.add(task_id)
+
+    restored = {}
+    # id -> undone deletes that go back right in front of the task with that id
+    appended = []
+    for record in added.values():
+        if record.get("before") is not None:
+            restored.setdefault(record["before"], []).append(record)
+        else:
+            appended.append(record)
+
+    seen = set()
+    next_id = 1
+
+    def resolve(task: Task) -> Optional[Task]:
+        nonlocal next_id
+        if task.id is None or task.id in seen:
+            task.id = next_id
+        seen.add(task.id)
+        if task.id >= next_id:
+            next_id = task.id + 1
+        if task.id in deleted:
+            return None
+        if task.id in completed:
+            task.completed = completed[task.id]
+        if task.id in planned:
+            task.priority, task.due = planned[task.id]
+        return task
+
+    def from_record(record: dict) -> Iterator[Task]:
+        """Yield the task of an add record, after the undone deletes that belong in front of it."""
+        if record.get("id") in seen:
+            return
+            # Already in the snapshot (the save ran between the change and its record)
+        task = _task_from_item(record)
+        alive = resolve(task)
+        yield from restored_before(task.id)
+        if alive is not None:
+            yield task
+
+    def restored_before(task_id: int) -> Iterator[Task]:
+        for record in restored.pop(task_id, ()):
+            yield from from_record(record)
+
+    try:
+        for task in iter_snapshot(filename):
+            alive = resolve(task)
+            yield from restored_before(task.id)
+            if alive is not None:
+                yield task
+    except FileNotFoundError:
+        pass
+        # A new project can exist only as a journal until its first compaction
+
+    for record in appended:
+        yield from from_record(record)
+    for records_left in list(restored.values()):
+        # The task they belonged in front of is gone, they go to the end
+        for record in records_left:
+            yield from from_record(record)
+
+
+def iter_task_pages(filename: str, page_size: int = PAGE_SIZE) -> Iterator[List[Task]]:
+    """
+    Iterate over the tasks of a project file one page at a time.
+
+    Unlike ToDoList.load_pages() nothing is kept after a page was handed out,
+    so even huge projects can be browsed with flat memory.
+
+    Args:
+        filename (str): The project file.
+        page_size (int): How many tasks one page holds.
+
+    Yields:
+        List[Task]: The next page of tasks (journal changes included).
+
+    Example:
+        first_page = next(iter_task_pages("projects/Work.json"))
+    """
+    page = []
+    for task in _stream_tasks(filename, _read_journal(filename)):
+        page.append(task)
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _write_snapshot(filename: str, tasks: List[Task], fsync: bool = True,
+                    file_format: Optional[str] = None) -> None:
+    """
+    Write tasks to a project file, replacing its content atomically.
+
+    Args:
+        filename (str): The project file.
+        tasks (List[Task]): The tasks to store.
+        fsync (bool): Force the new content to disk before it replaces the old file.
+        file_format (str): Name of the format to write (see FORMATS). None keeps the
+            format the file has now, new files are written as JSON (as SQLite
+            databases if the name ends with ".db").
+    """
+    if file_format is None:
+        if os.path.exists(filename):
+            serializer = detect_format(filename)
+        elif filename.endswith(SQLITE_SUFFIX):
+            serializer = FORMATS[FORMAT_SQLITE]
+        else:
+            serializer = FORMATS[FORMAT_JSON]
+    elif file_format in FORMATS:
+        serializer = FORMATS[file_format]
+    else:
+        raise ValueError(f"file_format must be one of {sorted(FORMATS)}, not {file_format!r}")
+    serializer.save(filename, tasks, fsync)
+
+
+class TaskFormat:
+    """
+    How tasks are stored in a project file. Subclass it and pass an instance to
+    register_format() to add a new format.
+
+    Attributes:
+        name (str): The name used for file_format, e.g. "json".
+        binary (bool): Whether write() gets a binary file instead of a text file.
+    """
+    name = ""
+    binary = False
+
+    def matches(self, head: bytes) -> bool:
+        """
+        Tell whether a file that starts with head is in this format.
+
+        Args:
+            head (bytes): The first bytes of the file (at most 16).
+        """
+        raise NotImplementedError
+
+    def write(self, f, tasks: List[Task]) -> None:
+        """
+        Write all tasks to the open file f.
+
+        Args:
+            f: A text file (binary file if self.binary is True) opened for writing.
+            tasks (List[Task]): The tasks to store.
+        """
+        raise NotImplementedError
+
+    def iter_tasks(self, filename: str, chunk_size: int) -> Iterator[Task]:
+        """
+        Read the tasks of a file in this format one by one.
+
+        Args:
+            filename (str): The project file.
+            chunk_size (int): How much to read at once.
+        """
+        raise NotImplementedError
+
+    def save(self, filename: str, tasks: List[Task], fsync: bool) -> None:
+        """
+        Replace the content of filename with tasks, atomically.
+
+        The default writes a temporary file with write() and renames it over filename.
+        Formats that are not written as one stream (databases) override this instead.
+        """
+        with _atomic_open(filename, fsync, binary=self.binary) as f:
+            self.write(f, tasks)
+
+
+class JsonFormat(TaskFormat):
+    """
+    The readable format: a pretty-printed JSON list of {"id", "title", "completed"},
+    plus "priority" and "due" (as "YYYY-MM-DD") for the tasks that have them.
+    Every file that no other format recognizes is read as JSON.
+    """
+    name = FORMAT_JSON
+
+    def matches(self, head: bytes) -> bool:
+        return head.lstrip()[:1] == b"["
+
+    def write(self, f, tasks: List[Task]) -> None:
+        data = [_with_plan({"id": task.id, "title": task.title, "completed": task.completed}, task)
+                for task in tasks]
+        # List comprehension is more easier to make then using basic for + append or even map()
+        # So we make here a dictionary from the tasks we are implementing 
+        json.dump(data, f, indent=4)
+        # indent used for dictionary to make enough space to see clearly and to be more organized for human eye
+
+    def iter_tasks(self, filename: str, chunk_size: int) -> Iterator[Task]:
+        return _iter_json_tasks(filename, chunk_size)
+
+
+class BinaryFormat(TaskFormat):
+    """
+    The compact format: a magic header, then one record per task.
+
+    Every record is a fixed 9 byte head (id, completed flag, length of the title)
+    packed with struct, followed by the title in UTF-8. No keys, quotes or
+    indentation are repeated for every task, and reading a record is two slices
+    instead of parsing text.
+
+    Projects where some task has a priority or due date are written as version 2
+    (MAGIC_PLANNED): the head grows by 5 bytes for them (PLANNED_RECORD). The
+    others stay version 1, so they are as small as before and older versions of
+    the app can still read them.
+    """
+    name = FORMAT_BINARY
+    binary = True
+    MAGIC = b"\x00TODO\x01"
+        # Starts with a zero byte, which can never start a JSON file. The last byte is the version.
+    MAGIC_PLANNED = b"\x00TODO\x02"
+    RECORD = struct.Struct("<IBI")
+        # id (0 = no id), completed (0 or 1), title length in bytes
+    PLANNED_RECORD = struct.Struct("<IBIBI")
+        # The same, then priority (0 = none) and due date as date.toordinal() (0 = none).
+        # The completed flag stays at byte 4, MappedTasks flips it in place in both versions.
+
+    def matches(self, head: bytes) -> bool:
+        return head.startswith((self.MAGIC, self.MAGIC_PLANNED))
+
+    def record_for(self, magic: bytes) -> struct.Struct:
+        """Return the record layout of a file that starts with magic."""
+        return self.PLANNED_RECORD if magic == self.MAGIC_PLANNED else self.RECORD
+
+    @staticmethod
+    def unpack_task(fields: tuple, title: str) -> Task:
+        """Build a Task from the unpacked head of a record (either layout) and its title."""
+        task = Task(title, fields[0] or None)
+        task._completed = fields[1] == 1
+        if len(fields) > 3:
+            task.priority = fields[3] or None
+            task.due = date.fromordinal(fields[4]) if fields[4] else None
+        return task
+
+    def write(self, f, tasks: List[Task]) -> None:
+        planned = _has_plans(tasks)
+        pack = (self.PLANNED_RECORD if planned else self.RECORD).pack
+        f.write(self.MAGIC_PLANNED if planned else self.MAGIC)
+        parts = []
+        for task in tasks:
+            title = task.title.encode("utf-8")
+            if planned:
+                parts.append(pack(task.id or 0, task.completed, len(title), *_plan_fields(task)))
+            else:
+                parts.append(pack(task.id or 0, task.completed, len(title)))
+            parts.append(title)
+            if len(parts) >= 2 * PAGE_SIZE:
+                f.write(b"".join(parts))
+                parts = []
+                # Writing in small batches keeps memory flat for huge lists
+        f.write(b"".join(parts))
+
+    def iter_tasks(self, filename: str, chunk_size: int) -> Iterator[Task]:
+        with open(filename, "rb") as f:
+            magic = f.read(len(self.MAGIC))
+            if not self.matches(magic):
+                raise ValueError(f"'{filename}' is not a binary task file")
+            yield from self._iter_records(f, filename, chunk_size, self.record_for(magic))
+
+    def _iter_records(self, f, filename: str, chunk_size: int, record: struct.Struct) -> Iterator[Task]:
+        """Decode the records (in the layout record) from the current position of f up to the end of the file."""
+        unpack = record.unpack_from
+        planned = record is self.PLANNED_RECORD
+        head_size = record.size
+        buffer = b""
+        pos = 0
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buffer = buffer[pos:] + chunk
+            # Keep the unfinished record of the last chunk, add the next chunk
+            pos = 0
+            end = len(buffer)
+            while pos + head_size <= end:
+                fields = unpack(buffer, pos)
+                length = fields[2]
+                start = pos + head_size
+                if start + length > end:
+                    break
+                    # The title continues in the next chunk
+                task = Task(buffer[start:start + length].decode("utf-8"), fields[0] or None)
+                task._completed = fields[1] == 1
+                if planned:
+                    task.priority = fields[3] or None
+                    task.due = date.fromordinal(fields[4]) if fields[4] else None
+                yield task
+                pos = start + length
+        if pos != len(buffer):
+            raise ValueError(f"'{filename}' ends in the middle of a task")
+
+
+def _has_plans(tasks: List[Task]) -> bool:
+    """Tell whether any task has a priority or a due date (the binary formats then need version 2)."""
+    return any(task.priority is not None or task.due is not None for task in tasks)
+
+
+def _plan_fields(task: Task) -> tuple:
+    """Return (priority, due day) of a task as BinaryFormat.PLANNED_RECORD stores them, 0 for none."""
+    return task.priority or 0, task.due.toordinal() if task.due is not None else 0
+
+
+class IndexedFormat(BinaryFormat):
+    """
+    The binary format plus a table with the file offset of every record, so any
+    task can be found without reading the ones before it. MappedTasks opens
+    these files with mmap (see ToDoList.load_mapped()).
+
+    Layout: HEADER (magic, flags, number of tasks, number of completed tasks),
+    then one 8 byte offset per task, then the records of BinaryFormat.
+    """
+    name = FORMAT_INDEXED
+    MAGIC = b"\x00TODX\x01"
+    MAGIC_PLANNED = b"\x00TODX\x02"
+    HEADER = struct.Struct("<6sBxQQ")
+        # magic, flags, padding, number of tasks, number of completed tasks
+    OFFSET = struct.Struct("<Q")
+    IDS_ASCENDING = 1
+        # Flag: the ids grow from record to record, so an id can be found with a binary search
+
+    def write(self, f, tasks: List[Task]) -> None:
+        titles = [task.title.encode("utf-8") for task in tasks]
+            # The offsets come before the records, so all record sizes must be known first
+        ids = [task.id or 0 for task in tasks]
+        ascending = all(a < b for a, b in zip(ids, ids[1:])) and 0 not in ids
+        completed = sum(1 for task in tasks if task.completed)
+        planned = _has_plans(tasks)
+        record = self.PLANNED_RECORD if planned else self.RECORD
+        f.write(self.HEADER.pack(self.MAGIC_PLANNED if planned else self.MAGIC,
+                                 self.IDS_ASCENDING if ascending else 0, len(tasks), completed))
+
+        offset = self.HEADER.size + self.OFFSET.size * len(tasks)
+        offsets = []
+        for title in titles:
+            offsets.append(offset)
+            offset += record.size + len(title)
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+
+        pack = record.pack
+        parts = []
+        for task_id, task, title in zip(ids, tasks, titles):
+            if planned:
+                parts.append(pack(task_id, task.completed, len(title), *_plan_fields(task)))
+            else:
+                parts.append(pack(task_id, task.completed, len(title)))
+            parts.append(title)
+            if len(parts) >= 2 * PAGE_SIZE:
+                f.write(b"".join(parts))
+                parts = []
+        f.write(b"".join(parts))
+
+    def iter_tasks(self, filename: str, chunk_size: int) -> Iterator[Task]:
+        with open(filename, "rb") as f:
+            magic, _, count, _ = self.HEADER.unpack(f.read(self.HEADER.size))
+            if not self.matches(magic):
+                raise ValueError(f"'{filename}' is not an indexed task file")
+            f.seek(self.HEADER.size + self.OFFSET.size * count)
+            # Reading everything in order does not need the offsets
+            yield from self._iter_records(f, filename, chunk_size, self.record_for(magic))
+
+
+class MappedTasks(Sequence):
+    """
+    The tasks of an indexed project file, decoded only when they are accessed.
+
+    The file is opened with mmap: the operating system reads the pages that are
+    touched and nothing else, so opening a project with a million tasks is instant
+    and memory does not grow with its size. Completing a task changes its flag
+    byte inside the file.
+
+    Every access decodes a new Task object, only the file holds the state.
+
+    Attributes:
+        completed_count (int): Number of completed tasks (stored in the file header).
+    """
+
+    def __init__(self, filename: str, owner: Optional["ToDoList"] = None):
+        """
+        Map a project file written with FORMAT_INDEXED.
+
+        Args:
+            filename (str): The project file.
+            owner (ToDoList): Set as the owner of the decoded tasks, so completing
+                them is written back through the list.
+
+        Raises:
+            ValueError: If the file is not in the indexed format.
+        """
+        self.filename = filename
+        self.owner = owner
+        self._file = open(filename, "r+b")
+        self.inode = os.fstat(self._file.fileno()).st_ino
+            # A save replaces the file, ToDoList then has to map the new one
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        fmt = FORMATS[FORMAT_INDEXED]
+        magic, flags, self._count, self.completed_count = fmt.HEADER.unpack_from(self._map, 0)
+        if not fmt.matches(magic):
+            self.close()
+            raise ValueError(f"'{filename}' is not an indexed task file")
+        self._record = fmt.record_for(magic)
+        self._ids_ascending = bool(flags & fmt.IDS_ASCENDING)
+        self._positions: Optional[Dict[int, int]] = None
+            # id -> position, only built if the ids are not in order
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self._count))]
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("task position out of range")
+        offset = self._offset(position)
+        fields = self._record.unpack_from(self._map, offset)
+        start = offset + self._record.size
+        task = BinaryFormat.unpack_task(fields, self._map[start:start + fields[2]].decode("utf-8"))
+        task._owner = self.owner
+        return task
+
+    def find(self, task_id: int) -> Optional[int]:
+        """
+        Return the position of the task with the given id, or None.
+
+        Uses a binary search over the ids in the file when they are in order,
+        so no task has to be decoded.
+
+        Example:
+            position = mapped.find(750000)
+        """
+        if not self._ids_ascending:
+            if self._positions is None:
+                self._positions = {self._id_at(i): i for i in range(self._count)}
+            return self._positions.get(task_id)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._id_at(middle) < task_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._id_at(low) == task_id:
+            return low
+        return None
+
+    def set_completed(self, task: Task) -> None:
+        """
+        Write the completed flag of a task into the file, in place.
+
+        Args:
+            task (Task): A task decoded from this file.
+        """
+        position = self.find(task.id)
+        if position is None:
+            return
+        flag = self._offset(position) + 4
+            # The flag byte follows the 4 byte id of the record
+        if self._map[flag] == task.completed:
+            return
+        self._map[flag] = int(task.completed)
+        self.completed_count += 1 if task.completed else -1
+        header = FORMATS[FORMAT_INDEXED].HEADER
+        struct.pack_into("<Q", self._map, header.size - 8, self.completed_count)
+
+    def flush(self) -> None:
+        """Force the changed bytes to disk."""
+        self._map.flush()
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        self._map.close()
+        self._file.close()
+
+    def _offset(self, position: int) -> int:
+        """File offset of the record at position, read from the offset table."""
+        table = FORMATS[FORMAT_INDEXED].HEADER.size
+        return struct.unpack_from("<Q", self._map, table + 8 * position)[0]
+
+    def _id_at(self, position: int) -> int:
+        """Id of the record at position, without decoding its title."""
+        return struct.unpack_from("<I", self._map, self._offset(position))[0]
+
+
+FORMATS: Dict[str, TaskFormat] = {}
+    # All known file formats by name, filled by register_format()
+
+
+def register_format(serializer: TaskFormat) -> None:
+    """
+    Make a file format available for saving (file_format=serializer.name) and loading.
+
+    Args:
+        serializer (TaskFormat): An instance of a TaskFormat subclass.
+
+    Example:
+        register_format(MyFormat())
+    """
+    FORMATS[serializer.name] = serializer
+
+
+register_format(JsonFormat())
+register_format(BinaryFormat())
+register_format(IndexedFormat())
+
+
+class SqliteStore:
+    """
+    A project stored in an SQLite database.
+
+    Unlike a JSON file, the database can change one task at a time: every add,
+    complete and delete is one small statement. The database runs in WAL mode,
+    so the CLI and the GUI (or any other process) can read it while one of them writes.
+
+    Table "tasks": id, seq (order of the list), title, completed, priority, due ("YYYY-MM-DD").
+    There are indexes on seq, completed and title. Databases created before
+    tasks had priorities get the two columns when they are opened.
+
+    Example:
+        store = SqliteStore("projects/Work.db")
+        store.apply([{"op": "add", "title": "Buy milk"}])
+        store.close()
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            priority INTEGER,
+            due TEXT
+        );
+        CREATE INDEX IF NOT EXISTS tasks_seq ON tasks (seq);
+        CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed);
+        CREATE INDEX IF NOT EXISTS tasks_title ON tasks (title);
+    """
+    PLAN_COLUMNS = (("priority", "INTEGER"), ("due", "TEXT"))
+    SYNCHRONOUS = {FSYNC_ALWAYS: "FULL", FSYNC_BATCHED: "NORMAL", FSYNC_NEVER: "OFF"}
+        # How hard SQLite pushes commits to the disk for every fsync policy
+
+    def __init__(self, filename: str, fsync_policy: str = FSYNC_ALWAYS):
+        """
+        Open (or create) a project database.
+
+        Args:
+            filename (str): The database file.
+            fsync_policy (str): FSYNC_ALWAYS, FSYNC_BATCHED or FSYNC_NEVER.
+        """
+        self.filename = filename
+        self.connection = sqlite3.connect(filename, isolation_level=None, check_same_thread=False)
+        # isolation_level=None: transactions are started explicitly with BEGIN IMMEDIATE.
+        # check_same_thread=False: write-behind commits from its timer thread, ToDoList._lock
+        # makes sure only one thread uses the connection at a time.
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(f"PRAGMA synchronous={self.SYNCHRONOUS[fsync_policy]}")
+        self.connection.executescript(self.SCHEMA)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(tasks)")}
+        for name, kind in self.PLAN_COLUMNS:
+            if name not in columns:
+                self.connection.execute(f"ALTER TABLE tasks ADD COLUMN {name} {kind}")
+                # Adding an empty column does not rewrite the rows, it is instant for any size
+
+    def iter_tasks(self) -> Iterator[Task]:
+        """
+        Read all tasks in list order. Rows are fetched as they are needed.
+
+        Example:
+            titles = [task.title for task in store.iter_tasks()]
+        """
+        for task_id, title, completed, priority, due in self.connection.execute(
+                "SELECT id, title, completed, priority, due FROM tasks ORDER BY seq"):
+            task = Task(title, task_id, priority, date.fromisoformat(due) if due else None)
+            task._completed = bool(completed)
+            yield task
+
+    def counts(self) -> tuple:
+        """Return (tasks, completed tasks), counted by SQLite with the completed index."""
+        tasks, completed = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM tasks").fetchone()
+        return tasks, completed
+
+    def replace_all(self, tasks: List[Task]) -> None:
+        """
+        Make the database hold exactly these tasks, in one transaction.
+
+        Args:
+            tasks (List[Task]): The tasks to store, in list order.
+        """
+        rows = ((task.id, seq, task.title, int(task.completed), task.priority,
+                 task.due.isoformat() if task.due is not None else None)
+                for seq, task in enumerate(tasks, start=1))
+        with self._transaction():
+            self.connection.execute("DELETE FROM tasks")
+            self.connection.executemany(
+                "INSERT INTO tasks (id, seq, title, completed, priority, due) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def apply(self, records: list) -> Dict[int, int]:
+        """
+        Apply journal style records ({"op": "add"/"complete"/"uncomplete"/"plan"/"delete", ...}),
+        one row each, all in one transaction.
+
+        An added task keeps its id unless another process already used that id for its
+        own task, then SQLite gives it the next free one.
+
+        Args:
+            records (list): The records, in the order they happened.
+
+        Returns:
+            Dict[int, int]: old id -> new id of the added tasks that got another id.
+        """
+        renumbered: Dict[int, int] = {}
+        execute = self.connection.execute
+        with self._transaction():
+            seq = execute("SELECT COALESCE(MAX(seq), 0) FROM tasks").fetchone()[0]
+            for record in records:
+                op = record.get("op")
+                task_id = record.get("id")
+                task_id = renumbered.get(task_id, task_id)
+                if op == "add":
+                    seq += 1
+                    position = seq
+                    following = execute("SELECT seq FROM tasks WHERE id = ?",
+                                        (renumbered.get(record.get("before"), record.get("before")),)).fetchone()
+                    if following is not None:
+                        # An undone delete: make room in front of the task that followed it
+                        position = following[0]
+                        execute("UPDATE tasks SET seq = seq + 1 WHERE seq >= ?", (position,))
+                    row = (record["title"], int(record.get("completed", False)), position,
+                           record.get("priority"), record.get("due"))
+                    inserted = False
+                    if task_id is not None:
+                        inserted = execute("INSERT OR IGNORE INTO tasks (title, completed, seq, priority, due, id) "
+                                           "VALUES (?, ?, ?, ?, ?, ?)", row + (task_id,)).rowcount == 1
+                    if not inserted:
+                        new_id = execute("INSERT INTO tasks (title, completed, seq, priority, due) "
+                                         "VALUES (?, ?, ?, ?, ?)", row).lastrowid
+                        if task_id is not None:
+                            renumbered[task_id] = new_id
+                elif op == "complete":
+                    execute("UPDATE tasks SET completed = 1 WHERE id = ?", (task_id,))
+                elif op == "uncomplete":
+                    execute("UPDATE tasks SET completed = 0 WHERE id = ?", (task_id,))
+                elif op == "plan":
+                    execute("UPDATE tasks SET priority = ?, due = ? WHERE id = ?",
+                            (record.get("priority"), record.get("due"), task_id))
+                elif op == "delete":
+                    execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return renumbered
+
+    def data_version(self) -> int:
+        """
+        Return SQLite's data_version of this connection. It changes whenever another
+        connection (of any process) commits, but not for commits of this connection.
+        """
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the connection. The last connection also folds the WAL file into the database."""
+        self.connection.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Run the block in one write transaction, undo everything if it fails."""
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+
+def _task_from_row(row: tuple) -> Task:
+    """Build a Task from a (id, title, completed, priority, due) row of the tasks table."""
+    task_id, title, completed, priority, due = row
+    task = Task(title, task_id, priority, date.fromisoformat(due) if due else None)
+    task._completed = bool(completed)
+    return task
+
+
+class SqliteFormat(TaskFormat):
+    """
+    Projects stored in an SQLite database (see SqliteStore). Saving replaces all
+    rows in one transaction, a ToDoList bound to the database changes single rows.
+    """
+    name = FORMAT_SQLITE
+    MAGIC = b"SQLite format 3\x00"
+
+    def matches(self, head: bytes) -> bool:
+        return head.startswith(self.MAGIC)
+
+    def iter_tasks(self, filename: str, chunk_size: int) -> Iterator[Task]:
+        connection = sqlite3.connect(filename)
+        try:
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(tasks)")}
+            plan = "priority, due" if "due" in columns else "NULL, NULL"
+            # Only read here, a database from before priorities is not changed to add the columns
+            cursor = connection.execute(f"SELECT id, title, completed, {plan} FROM tasks ORDER BY seq")
+            for row in cursor:
+                yield _task_from_row(row)
+        except sqlite3.DatabaseError as error:
+            raise ValueError(f"'{filename}' is not a task database: {error}")
+        finally:
+            connection.close()
+
+    def save(self, filename: str, tasks: List[Task], fsync: bool) -> None:
+        policy = FSYNC_ALWAYS if fsync else FSYNC_NEVER
+        if os.path.exists(filename) and detect_format(filename) is self:
+            store = SqliteStore(filename, policy)
+            try:
+                store.replace_all(tasks)
+                # The transaction makes the whole replacement atomic
+            finally:
+                store.close()
+            return
+
+        # A new database (or one replacing a file in another format) is built next to the
+        # target and renamed over it, like every other save
+        directory = os.path.dirname(os.path.abspath(filename))
+        fd, temp_name = tempfile.mkstemp(prefix=".~" + os.path.basename(filename), suffix=".tmp",
+                                         dir=directory)
+        os.close(fd)
+        try:
+            store = SqliteStore(temp_name, policy)
+            try:
+                store.replace_all(tasks)
+            finally:
+                store.close()
+            for suffix in (SQLITE_WAL_SUFFIX, "-shm"):
+                if os.path.exists(filename + suffix):
+                    os.remove(filename + suffix)
+                    # Left over from an older database, it must not be applied to the new one
+            _copy_mode(filename, temp_name)
+            os.replace(temp_name, filename)
+        except BaseException:
+            for suffix in ("", SQLITE_WAL_SUFFIX, "-shm"):
+                if os.path.exists(temp_name + suffix):
+                    os.remove(temp_name + suffix)
+            raise
+        if fsync:
+            _fsync_directory(directory)
+
+
+register_format(SqliteFormat())
+
+
+def convert_project(source: str, target: str, file_format: Optional[str] = None) -> int:
+    """
+    Copy a project into another file, for example to import a JSON project into a
+    database or to export a database back to JSON.
+
+    Args:
+        source (str): The project to read (any format, its journal is applied).
+        target (str): The file to write. It is replaced if it exists.
+        file_format (str): Format of the target. None picks it from the name of a new
+            target (".db" -> FORMAT_SQLITE, anything else JSON).
+
+    Returns:
+        int: The number of tasks copied.
+
+    Example:
+        convert_project("projects/Work.json", "projects/Work.db")
+    """
+    tasks = list(_stream_tasks(source, _read_journal(source)))
+    if file_format is None and os.path.exists(target):
+        file_format = FORMAT_SQLITE if target.endswith(SQLITE_SUFFIX) else FORMAT_JSON
+        # The target is replaced, so its old format does not matter
+    _write_snapshot(target, tasks, file_format=file_format)
+    _remove_journal(target)
+    return len(tasks)
+
+
+def detect_format(filename: str) -> TaskFormat:
+    """
+    Find out the format of a project file from its first bytes.
+
+    Args:
+        filename (str): The project file.
+
+    Returns:
+        TaskFormat: The matching format. Files no format claims are treated as JSON,
+            which also reports what is wrong with them.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+
+    Example:
+        print(detect_format("projects/Work.json").name)
+    """
+    with open(filename, "rb") as f:
+        head = f.read(16)
+    for serializer in FORMATS.values():
+        if serializer.name != FORMAT_JSON and serializer.matches(head):
+            return serializer
+    return FORMATS[FORMAT_JSON]
+
+
+@contextmanager
+def _atomic_open(filename: str, fsync: bool = True, binary: bool = False):
+    """
+    Open a temporary file for writing and rename it over filename when done.
+
+    Opening the target with mode 'w' would empty it first, so dying in the middle
+    of a save used to lose the whole project. Here the target is only replaced by
+    os.replace() once the new content is completely written, which is atomic:
+    readers see either the old or the new file, never half of one.
+
+    Args:
+        filename (str): The file to replace.
+        fsync (bool): Force the new content (and the rename) to disk.
+        binary (bool): Open the temporary file in binary mode.
+
+    Example:
+        with _atomic_open("projects/Work.json") as f:
+            f.write("[]")
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    # The temporary file must be in the same folder, rename only is atomic inside one file system.
+    # The ".~" prefix and ".tmp" suffix keep it out of the "*.json" project lists.
+    fd, temp_name = tempfile.mkstemp(prefix=".~" + os.path.basename(filename), suffix=".tmp",
+                                     dir=directory)
+    try:
+        with os.fdopen(fd, "wb" if binary else "w") as f:
+            yield f
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        _copy_mode(filename, temp_name)
+        os.replace(temp_name, filename)
+    except BaseException:
+        os.remove(temp_name)
+        raise
+    if fsync:
+        _fsync_directory(directory)
+        # The rename itself lives in the folder, so the folder is synced too
+
+
+def _copy_mode(target: str, temp_name: str) -> None:
+    """Give the temporary file the permissions of the file it replaces (or the usual default)."""
+    try:
+        mode = os.stat(target).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+        # mkstemp creates private 0600 files, a new project should look like any other file
+    os.chmod(temp_name, mode)
+
+
+def _fsync_directory(directory: str) -> None:
+    """Force a rename inside directory to disk (not possible on Windows, where it is skipped)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _append_journal(filename: str, records: list, restart: bool, fsync: bool) -> None:
+    """
+    Append records to the journal of a project file.
+
+    Args:
+        filename (str): The project file (not the journal itself).
+        records (list): The records to append.
+        restart (bool): Start a new journal first. Needed when there is no valid journal,
+            the first line then ties the journal to the current snapshot.
+        fsync (bool): Force the records to disk.
+    """
+    path = filename + JOURNAL_SUFFIX
+    if restart:
+        with open(path, "w") as f:
+            header = {"op": "base", "snapshot": _file_fingerprint(filename)}
+            f.write(json.dumps(header) + "\n")
+    with open(path, "a") as f:
+        # Append mode always writes at the current end, even with other handles open
+        f.write("".join(json.dumps(record) + "\n" for record in records))
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+
+
+def _is_database(filename: str) -> bool:
+    """Tell whether filename is an existing project database."""
+    return os.path.exists(filename) and detect_format(filename).name == FORMAT_SQLITE
+
+
+def _remove_journal(filename: str) -> None:
+    """Delete the journal of a project file if there is one."""
+    try:
+        os.remove(filename + JOURNAL_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+
+class _ProjectLock:
+    """
+    The advisory lock (fcntl.flock) of one project, shared by all lists of this process.
+
+    flock() locks belong to an open file, so a second open of the lock file in the same
+    process would wait for the first one forever. That is why there is one _ProjectLock
+    per project and process: it is reentrant, and the threads of the process take turns
+    on a threading.RLock before they touch the file lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.handle = None
+        self.depth = 0           # How many project_lock() blocks hold it right now
+        self.exclusive = False
+
+    def acquire(self, exclusive: bool) -> None:
+        self.thread_lock.acquire()
+        if fcntl is None or (self.depth and (self.exclusive or not exclusive)):
+            self.depth += 1
+            return
+            # Already held strongly enough by an outer block of this thread
+        try:
+            if self.handle is None:
+                try:
+                    self.handle = open(self.path, "a")
+                except OSError:
+                    self.depth += 1
+                    return
+                    # A read-only folder: nobody can write the project there, so no lock is needed
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        except BaseException:
+            self.thread_lock.release()
+            raise
+        self.exclusive = exclusive
+        self.depth += 1
+
+    def release(self) -> None:
+        self.depth -= 1
+        if self.depth == 0 and self.handle is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+            self.exclusive = False
+        self.thread_lock.release()
+
+
+_project_locks: Dict[str, _ProjectLock] = {}
+_project_locks_guard = threading.Lock()
+
+
+@contextmanager
+def project_lock(filename: str, exclusive: bool = True):
+    """
+    Hold the lock of a project file, so other processes wait instead of writing at the same time.
+
+    Loads take it shared (any number of readers at once), saves, merges and journal
+    appends take it exclusive. Blocks of the same thread can nest. The lock is advisory:
+    it protects against every program that uses this module, not against editors.
+
+    Args:
+        filename (str): The project file (the lock file next to it is created if needed).
+        exclusive (bool): False for reading, readers then do not wait for each other.
+            A project that does not exist is not locked for reading: there is nothing
+            to read, and no lock file is left next to a name that was only looked up.
+
+    Example:
+        with project_lock("projects/Work.json"):
+            ...  # read, change and write the project, nobody else writes meanwhile
+    """
+    if not exclusive and not os.path.exists(filename):
+        yield
+        return
+    path = os.path.abspath(filename) + LOCK_SUFFIX
+    with _project_locks_guard:
+        lock = _project_locks.setdefault(path, _ProjectLock(path))
+    lock.acquire(exclusive)
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+class ProjectInfo:
+    """
+    Summary of one project file, as shown by the project pickers.
+
+    Attributes:
+        filename (str): File name inside the projects folder, e.g. "Work.json" or "Work.db".
+        path (str): Path of the project file.
+        tasks (int): Number of tasks (journal included).
+        completed (int): Number of completed tasks.
+        modified (float): Last change of the project or its journal (seconds since the epoch).
+    """
+    __slots__ = ("filename", "path", "tasks", "completed", "modified")
+
+    def __init__(self, filename: str, path: str, tasks: int, completed: int, modified: float):
+        self.filename = filename
+        self.path = path
+        self.tasks = tasks
+        self.completed = completed
+        self.modified = modified
+
+    @property
+    def name(self) -> str:
+        """The project name without the .json/.db extension."""
+        return os.path.splitext(self.filename)[0]
+
+    @property
+    def active(self) -> int:
+        """Number of tasks that are not completed yet."""
+        return self.tasks - self.completed
 
-        Example:
-            new_todolist = ToDoList()
-            new_todolist.add_task("Finish the project")
-        """
-        # We could have written it like:
-        #   def add_task(self, title):
-        #       self.tasks.append(Task(title))
-        # But adding "title: str" and "-> None" makes it more easier to understand and test by the new users
-        self.tasks.append(Task(title))
-    
-    def list_tasks(self) -> None:
+    def __str__(self):
         """
-        Print all tasks with their status.
-        
-        Example:
-            new_todolist = ToDoList()
-            new_todolist.list_tasks()
+        Return a one line summary, for example "Work  [3/10 done, modified 2024-05-01 12:00]".
         """
-        
-        if not self.tasks:
-        # Check if the list is empty
-            print("No tasks found.") 
-            return
-        
-        for idx, task in enumerate(self.tasks, start=1):
-            # enumerate counts and go trough the giving list making counting a lot easier
-            # so there is the idx which is just declared
-            # enumerate just affects the print not the list
-            status = "✅" if task.completed else "❌"
-            print(f"{idx}. [{status} {task.title}]")
-            
-    def mark_task_completed(self, task_id: int) -> None:
+        modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.modified))
+        return f"{self.name}  [{self.completed}/{self.tasks} done, modified {modified}]"
+
+
+class ProjectCatalog:
+    """
+    Cached index of the projects folder with task counts for every project.
+
+    Counting the tasks of a project means reading the whole file, so the counts are
+    stored in a small index file next to the projects. One os.scandir() call lists
+    the folder together with the size and modification time of every project and
+    journal, and only projects whose stat data changed since the last scan are read
+    again. The directory mtime alone would not do: appending to a journal does not change it.
+
+    The same stat data keys the results of search() across all projects. Many changed
+    projects are read by a pool of worker processes, one project per worker at a time.
+
+    Example:
+        catalog = ProjectCatalog("projects")
+        for info in catalog.projects():
+            print(info)
+        print(catalog.totals()["active"], "open tasks in all projects")
+    """
+
+    def __init__(self, folder: str = PROJECTS_FOLDER, workers: Optional[int] = None):
         """
-        Mark the task with the given ID as completed.
-        
         Args:
-            task_id(int): The given id that is to be marked as finished
-            
-        Example:
-            new_todolist = ToDoList()
-            new_todolist.mark_task_completed(2)
+            folder (str): The folder that holds the project files.
+            workers (Optional[int]): Worker processes for reading many projects,
+                None for one per CPU, 1 to read everything in this process.
         """
-        if 1 <= task_id <= len(self.tasks):
-            self.tasks[task_id - 1].completed = True
-            # Example easier to understand:
-            # We want task 1. In listed function with enumerate its in the position 1. We write 1 and the position [0] where its our first to-do task
-        else:
-            print("Invalid task ID")
-            
-    def delete_task(self, task_id: int) -> None:
+        self.folder = folder
+        self.workers = workers
+        self.index_path = os.path.join(folder, CATALOG_INDEX)
+        self._entries: Optional[dict] = None   # filename -> cached stat data and counts
+        self._matches: Dict[str, dict] = {}
+            # filename -> {"key": stat data, "queries": {query: matches}}, only kept in memory
+
+    def projects(self) -> List[ProjectInfo]:
         """
-        Delete the task with the given ID.
-        
-        Args:
-            task_id(int): The given id that is marked for delete
-            
-        Example:
-            new_todolist = ToDoList()
-            new_todolist.delete_task(2)
-        """ 
-        if 1 <= task_id <= len(self.tasks):
-            del self.tasks[task_id - 1]
+        Return all projects sorted by name, re-counting only the changed ones.
+
+        Returns:
+            List[ProjectInfo]: One entry per *.json and *.db file in the folder.
+        """
+        if self._entries is None:
+            self._entries = self._read_index()
+
+        scanned = self._scan()
+        entries = {}
+        changed = []
+        for filename, (key, modified) in scanned.items():
+            entry = self._entries.get(filename)
+            if entry is None or entry["key"] != key:
+                changed.append(filename)
+            else:
+                entries[filename] = entry
+
+        if len(changed) < PARALLEL_MIN_PROJECTS or self.workers == 1:
+            for filename in changed:
+                entries[filename] = self._count(filename, *scanned[filename])
         else:
-            print("Invalid task ID")
-    
-    def save_to_file(self, filename: str) -> None:
+            paths = [os.path.join(self.folder, filename) for filename in changed]
+            for filename, (tasks, completed) in zip(changed, _map_projects(_count_project, paths, self.workers)):
+                key, modified = scanned[filename]
+                entries[filename] = {"key": key, "tasks": tasks, "completed": completed, "modified": modified}
+
+        if changed or len(entries) != len(self._entries):
+            self._entries = entries
+            self._write_index()
+
+        return [ProjectInfo(filename, os.path.join(self.folder, filename), entry["tasks"],
+                            entry["completed"], entry["modified"])
+                for filename, entry in sorted(entries.items())]
+
+    def totals(self) -> dict:
         """
-        Save tasks to a file in JSON format
+        Add up the task counts of all projects.
+
+        Returns:
+            dict: {"projects", "tasks", "completed", "active"} over the whole folder.
 
-        Args:
-            filename (str): name of a file where we want to save the file
-            
         Example:
-            new_todolist = ToDoList()
-            new_todolist.save_to_file("Project.json") 
+            get_catalog().totals()  # {"projects": 3000, "tasks": 41250, ...}
         """
-        data = [{"title": task.title, "completed": task.completed} for task in self.tasks]
-        # List comprehension is more easier to make then using basic for + append or even map()
-        # So we make here a dictionary from the tasks we are implementing 
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=4)
-            # indent used for dictionary to make enough space to see clearly and to be more organized for human eye
-            
-    def load_from_file(self, filename: str) -> None:
+        projects = self.projects()
+        tasks = sum(info.tasks for info in projects)
+        completed = sum(info.completed for info in projects)
+        return {"projects": len(projects), "tasks": tasks, "completed": completed,
+                "active": tasks - completed}
+
+    def search(self, query: str, mode: str = SEARCH_PREFIX,
+               status: Optional[str] = None) -> Dict[str, List[Tuple[int, Task]]]:
         """
-        Load tasks from a file
-        
+        Find the tasks of every project whose title contains every word of the query.
+
+        Results are remembered per project with its stat data, so asking again only
+        reads the projects that changed in between.
+
         Args:
-            filename(str): name of a file where we want to load from
-            
+            query (str): One or more words, case does not matter.
+            mode (str): SEARCH_PREFIX or SEARCH_SUBSTRING (see ToDoList.search).
+            status (str): None for all tasks, STATUS_ACTIVE or STATUS_COMPLETED.
+
+        Returns:
+            Dict[str, List[Tuple[int, Task]]]: filename -> (position, task) of every
+                match, only for projects with matches, sorted by filename.
+
         Example:
-            new_todolist = ToDoList()
-            new_todolist.load_from_file("Project.json") 
+            for filename, matches in get_catalog().search("invoice").items():
+                print(filename, len(matches))
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {SEARCH_MODES}, not {mode!r}")
+        if status not in (None, STATUS_ACTIVE, STATUS_COMPLETED):
+            raise ValueError(f"status must be None, {STATUS_ACTIVE!r} or {STATUS_COMPLETED!r}, not {status!r}")
+        terms = sorted(set(_WORD.findall(query.lower())))
+        if not terms:
+            return {}
+        question = f"{mode}:{status}:{' '.join(terms)}"
+
+        scanned = self._scan()
+        self._matches = {filename: cached for filename, cached in self._matches.items()
+                         if filename in scanned and cached["key"] == scanned[filename][0]}
+        # Projects that changed or disappeared forget all their results
+        missing = [filename for filename in scanned
+                   if question not in self._matches.get(filename, {}).get("queries", {})]
+
+        paths = [os.path.join(self.folder, filename) for filename in missing]
+        search = functools.partial(_search_project, terms=terms, mode=mode, status=status)
+        for filename, matches in zip(missing, _map_projects(search, paths, self.workers)):
+            cached = self._matches.setdefault(filename, {"key": scanned[filename][0], "queries": {}})
+            cached["queries"][question] = matches
+            if len(cached["queries"]) > QUERY_CACHE_SIZE:
+                del cached["queries"][next(iter(cached["queries"]))]
+
+        found = {}
+        for filename in sorted(scanned):
+            matches = self._matches[filename]["queries"][question]
+            if matches:
+                found[filename] = matches
+        return found
+
+    def _scan(self) -> Dict[str, tuple]:
+        """
+        List the projects of the folder with one os.scandir() call.
+
+        Returns:
+            Dict[str, tuple]: filename -> (key, modified). The key is the stat data of
+                the project and its journal (or WAL file), it changes with every write.
         """
+        stats = {}
         try:
-            with open(filename, "r") as f:
-                data = json.load(f)
-                self.tasks = [Task(item["title"]) for item in data]
-                # Make list based on first word inside the dictionary 
-                # We are implementing just the value from 'title'
-                for task, item in zip(self.tasks, data):
-                    task.completed = item.get("completed", False)
-                    # We need to add the second part which is completed value so that's why we are using for loop
-                    # Default version supposed to set on False and if not empty he just gonna write what in the dictionary                    
+            with os.scandir(self.folder) as listing:
+                for entry in listing:
+                    if not entry.name.startswith(".") and entry.is_file():
+                        stats[entry.name] = entry.stat()
         except FileNotFoundError:
-            print(f"File '{filename}' not found. Starting with an empty to-do list.")
-            
-    def merge_and_save_to_file(self, filename: str) -> None:
+            return {}
+
+        scanned = {}
+        for filename, stat in stats.items():
+            if not filename.endswith(PROJECT_SUFFIXES):
+                continue
+            side_file = SQLITE_WAL_SUFFIX if filename.endswith(SQLITE_SUFFIX) else JOURNAL_SUFFIX
+            journal = stats.get(filename + side_file)
+            # A database collects its recent changes in the WAL file, like a project in its journal
+            key = [stat.st_size, stat.st_mtime_ns,
+                   journal.st_size if journal else None, journal.st_mtime_ns if journal else None]
+            scanned[filename] = (key, max(stat.st_mtime, journal.st_mtime if journal else 0))
+        return scanned
+
+    def _count(self, filename: str, key: list, modified: float) -> dict:
         """
-        Merge existing tasks in the to-do list with current tasks and save it all together.
+        Read one project and count its tasks.
 
         Args:
-            filename (str): The to-do list to save the merged tasks into.
+            filename (str): The project file name inside the folder.
+            key (list): The stat data the counts belong to.
+            modified (float): Last modification time of the project or its journal.
         """
+        tasks, completed = _count_project(os.path.join(self.folder, filename))
+        return {"key": key, "tasks": tasks, "completed": completed, "modified": modified}
+
+    def _read_index(self) -> dict:
+        """Read the cached counts, an unreadable index just means everything is counted again."""
         try:
-            with open(filename, "r") as f:
-                old_data = json.load(f)
-        except FileNotFoundError:
-            old_data = []
-        # First we are making dictionary from the loaded json file
-            
-        old_tasks = [Task(item["title"]) for item in old_data]
-        # Like from the previous command now we are making the list just from the title parts
-        for task, item in zip(old_tasks, old_data):
-            task.completed = item.get("completed", False)
-            
-        # Merge old tasks with new ones
-        merged_tasks = old_tasks + self.tasks
-        
-        # Prepare data for saving
-        data = [{"title": task.title, "completed": task.completed} for task in merged_tasks]
-        
-        # Save merged tasks back to file
-        with open(filename, "w") as f:
-            json.dump(data, f, indent = 4)
-        
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self) -> None:
+        """Store the counts for the next start. The index is only a cache, so failures are ignored."""
+        try:
+            with _atomic_open(self.index_path, fsync=False) as f:
+                json.dump(self._entries, f)
+        except OSError:
+            pass
+
+
+def _connect_read_only(filename: str) -> sqlite3.Connection:
+    """
+    Open a database for reading only. Unlike SqliteStore nothing is set up or migrated,
+    so counting the projects of a folder leaves a database of an older version as it is
+    (the columns it reads are in every version).
+    """
+    return sqlite3.connect("file:" + urllib.parse.quote(os.path.abspath(filename)) + "?mode=ro", uri=True)
+
+
+def _count_project(path: str) -> Tuple[int, int]:
+    """
+    Count the tasks and the completed tasks of one project (journal included).
+
+    A module level function, so worker processes can run it.
+    """
+    tasks = completed = 0
+    try:
+        if _is_database(path):
+            connection = _connect_read_only(path)
+            try:
+                tasks, completed = connection.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM tasks").fetchone()
+                return tasks, completed
+                # SQLite counts with its index, no task has to be read
+            finally:
+                connection.close()
+        for task in _stream_tasks(path, _read_journal(path)):
+            tasks += 1
+            completed += task.completed
+    except (ValueError, sqlite3.DatabaseError):
+        pass
+        # A broken project is still listed, it just shows no tasks
+    return tasks, completed
+
+
+def _search_project(path: str, terms: List[str], mode: str,
+                    status: Optional[str]) -> List[Tuple[int, Task]]:
+    """
+    Stream one project and return (position, task) of the tasks matching all terms.
+
+    Every title is checked once, building a search index would cost more than that.
+    """
+    matches = []
+    try:
+        for position, task in enumerate(_stream_tasks(path, _read_journal(path)), start=1):
+            if status is not None and task.completed != (status == STATUS_COMPLETED):
+                continue
+            lowered = task.title.lower()
+            if all(term in lowered for term in terms) and _title_matches(lowered, terms, mode):
+                # "in" on the whole title is a fast test that rules out almost every title
+                matches.append((position, task))
+    except (ValueError, sqlite3.DatabaseError):
+        pass
+        # A broken project has no matches, like it has no tasks in the catalog
+    return matches
+
+
+def _map_projects(function: Callable, paths: List[str], workers: Optional[int] = None) -> list:
+    """
+    Run function(path) for every path, in a pool of worker processes when there are many.
+
+    Args:
+        function (Callable): A module level function (or functools.partial of one).
+        paths (List[str]): The project files.
+        workers (Optional[int]): Worker processes, None for one per CPU.
+
+    Returns:
+        list: The results, in the order of paths.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1 or len(paths) < PARALLEL_MIN_PROJECTS:
+        return [function(path) for path in paths]
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    # Not "fork": the GUI calls this from a thread, and forking a process with threads can hang
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return list(pool.map(function, paths, chunksize=max(1, len(paths) // (workers * 4))))
+        # Chunks of projects per message instead of one, but still enough chunks to keep every worker busy
+
+
+_catalogs: Dict[str, ProjectCatalog] = {}
+
+
+def get_catalog(folder: str = PROJECTS_FOLDER) -> ProjectCatalog:
+    """
+    Return the catalog of a projects folder, shared by everyone in this process.
+
+    Example:
+        infos = get_catalog().projects()
+    """
+    if folder not in _catalogs:
+        _catalogs[folder] = ProjectCatalog(folder)
+    return _catalogs[folder]
+
+
+def parse_ranges(text: str, highest: int) -> List[int]:
+    """
+    Turn a selection like "3-50,72" into the task numbers it means.
+
+    Args:
+        text (str): Numbers and ranges separated by commas, e.g. "1, 4-6".
+        highest (int): The largest valid number (the number of tasks).
+
+    Returns:
+        List[int]: The numbers in the order given, without duplicates.
+
+    Raises:
+        ValueError: If a part is not a number or range, or lies outside 1..highest.
+
+    Example:
+        parse_ranges("3-5,9", 10)  # [3, 4, 5, 9]
+    """
+    numbers = {}
+    # A dict keeps the order of the numbers and drops duplicates
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        start = int(first)
+        end = int(last) if last else start
+        if not 1 <= start <= end <= highest:
+            raise ValueError(f"'{part}' is not between 1 and {highest}")
+        for number in range(start, end + 1):
+            numbers[number] = None
+    if not numbers:
+        raise ValueError("no task numbers given")
+    return list(numbers)
+
+
+
+CLI_BATCH_SIZE = 10_000
+    # Lines read from stdin are handled this many at a time, so an import of millions
+    # of lines never holds the raw input in memory next to the tasks
+
+
+def _read_batches(stream, batch_size: int = CLI_BATCH_SIZE) -> Iterator[List[str]]:
+    """
+    Read the non-empty lines of a stream in lists of batch_size lines.
+
+    Args:
+        stream: A text stream, usually sys.stdin.
+        batch_size (int): Lines per batch.
+
+    Yields:
+        List[str]: The next lines, stripped.
+    """
+    batch = []
+    for line in stream:
+        line = line.strip()
+        if line:
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _open_project(filename: str) -> ToDoList:
+    """
+    Load a project once for a batch command. Changes are kept until _finish_project().
+
+    Indexed projects are mapped instead of loaded, so completing tasks in them
+    does not parse the file at all.
+    """
+    todo_list = ToDoList(journal=True, defer_writes=True)
+    # Deferred journal records: all changes of the command are written together at the end
+    if os.path.exists(filename):
+        if detect_format(filename).name == FORMAT_INDEXED:
+            todo_list.load_mapped(filename)
+        else:
+            todo_list.load_from_file(filename)
+    return todo_list
+
+
+def _finish_project(todo_list: ToDoList, filename: str, file_format: Optional[str] = None) -> None:
+    """Write all changes of a batch command in one go: a journal append, or one save."""
+    with todo_list._lock:
+        pending = len(todo_list._pending)
+    if todo_list.filename is None or pending >= todo_list.compact_threshold:
+        # A new project, or so many changes that the journal would be compacted right away
+        if todo_list.filename is None:
+            todo_list.file_format = file_format
+            # Only a new project is written in the --format, an existing one keeps its own
+        todo_list.save_to_file(filename)
+    todo_list.close()
+
+
+def _format_fits(project: str, file_format: Optional[str]) -> bool:
+    """
+    Check the --format of add and import: it chooses the format of a new project.
+    An existing project in another format is refused instead of converted on the side,
+    "export" converts projects. Prints the error.
+    """
+    if file_format is None or not os.path.exists(project):
+        return True
+    current = detect_format(project).name
+    if current == file_format:
+        return True
+    print(f"'{project}' is a {current} project, --format only applies to new projects "
+          f"(use 'export' to convert it).", file=sys.stderr)
+    return False
+
+
+def _selections(args) -> List[str]:
+    """
+    Return the selections of done, rm or plan. With --ids they may come before or after
+    the option ("done P.json 5 --ids" or "done P.json --ids 5"): argparse cannot mix an
+    optional positional with a flag in front of it, so --ids takes the values itself.
+    """
+    return args.selections + (args.ids or [])
+
+
+def _selected_ids(todo_list: ToDoList, selections: List[str], by_id: bool) -> List[int]:
+    """
+    Turn selections like "3-50,72" into stable task ids.
+
+    Args:
+        todo_list (ToDoList): The loaded project.
+        selections (List[str]): Positions (as shown by "ls") or ids with by_id.
+        by_id (bool): The selections are task ids, not positions.
+
+    Raises:
+        ValueError: If a selection is not valid.
+    """
+    ids = []
+    for selection in selections:
+        if by_id:
+            ids.extend(int(part) for part in selection.replace(",", " ").split())
+        else:
+            numbers = parse_ranges(selection, len(todo_list.tasks))
+            ids.extend(todo_list.tasks[number - 1].id for number in numbers)
+    return ids
+
+
+def _command_add(args) -> int:
+    """Add the titles given as arguments, or every line of stdin."""
+    if not _format_fits(args.project, args.format):
+        return 2
+    batches = [args.titles] if args.titles else _read_batches(sys.stdin)
+    added = 0
+    with project_lock(args.project):
+        # One lock for loading, adding and writing, other writers wait and then see our tasks
+        todo_list = _open_project(args.project)
+        for titles in batches:
+            added += len(todo_list.add_tasks(titles, args.priority, args.due))
+        _finish_project(todo_list, args.project, args.format)
+    print(f"{added} task(s) added to '{args.project}'.")
+    return 0
+
+
+def _command_change(args) -> int:
+    """Complete (done) or delete (rm) the selected tasks with one write."""
+    if not os.path.exists(args.project):
+        print(f"Project '{args.project}' not found.", file=sys.stderr)
+        return 1
+    selections = _selections(args)
+    batches = [selections] if selections else _read_batches(sys.stdin)
+    with project_lock(args.project):
+        # Positions are resolved and changed under one lock, nobody can move the tasks in between
+        todo_list = _open_project(args.project)
+        try:
+            ids = []
+            for selections in batches:
+                ids.extend(_selected_ids(todo_list, selections, args.ids is not None))
+                # All positions are resolved before the first change, deletes would shift them
+        except ValueError as error:
+            print(f"Invalid task selection: {error}", file=sys.stderr)
+            todo_list.close()
+            return 2
+        if args.command == "done":
+            changed = todo_list.complete_tasks(ids)
+        else:
+            changed = todo_list.delete_tasks(ids)
+        _finish_project(todo_list, args.project)
+    print(f"{changed} task(s) {'completed' if args.command == 'done' else 'deleted'}.")
+    return 0
+
+
+def _command_plan(args) -> int:
+    """Set the priority and/or due date of the selected tasks with one write."""
+    if not os.path.exists(args.project):
+        print(f"Project '{args.project}' not found.", file=sys.stderr)
+        return 1
+    selections = _selections(args)
+    if not selections:
+        print("No tasks selected.", file=sys.stderr)
+        return 2
+    with project_lock(args.project):
+        todo_list = _open_project(args.project)
+        try:
+            ids = _selected_ids(todo_list, selections, args.ids is not None)
+        except ValueError as error:
+            print(f"Invalid task selection: {error}", file=sys.stderr)
+            todo_list.close()
+            return 2
+        planned = 0
+        for task_id in ids:
+            task = todo_list.get_task(task_id)
+            if task is None:
+                continue
+            priority = task.priority if args.priority is _KEEP else args.priority
+            due = task.due if args.due is _KEEP else args.due
+            # Options that are not given keep what the task has
+            planned += todo_list.plan_task(task_id, priority, due)
+        _finish_project(todo_list, args.project)
+    print(f"{planned} task(s) planned.")
+    return 0
+
+
+def _command_next(args) -> int:
+    """Print the overdue tasks, the tasks due this week and the next tasks to do."""
+    if not os.path.exists(args.project):
+        print(f"Project '{args.project}' not found.", file=sys.stderr)
+        return 1
+    todo_list = ToDoList()
+    todo_list.load_from_file(args.project)
+    for heading, tasks in (("Overdue", todo_list.overdue_tasks()),
+                           ("Due this week", todo_list.due_this_week()),
+                           ("Next", todo_list.next_tasks(args.count))):
+        print(f"{heading}:")
+        for task in tasks:
+            print(f"  {todo_list.position_of(task.id)}. {task.title}{plan_text(task)}")
+            # Positions, like ls prints them and done, rm and plan take them
+        if not tasks:
+            print("  (none)")
+    return 0
+
+
+def _command_ls(args) -> int:
+    """Print the tasks of a project, numbered by their position."""
+    if not os.path.exists(args.project):
+        print(f"Project '{args.project}' not found.", file=sys.stderr)
+        return 1
+    if args.search:
+        todo_list = ToDoList()
+        todo_list.load_from_file(args.project)
+        wanted = {task.id for task in todo_list.search(args.search, mode=SEARCH_SUBSTRING)}
+        tasks = todo_list.tasks
+    else:
+        wanted = None
+        tasks = _stream_tasks(args.project, _read_journal(args.project))
+        # Without a search the tasks are printed while the file is read, nothing is kept
+
+    lines = []
+    for position, task in enumerate(tasks, start=1):
+        if wanted is not None and task.id not in wanted:
+            continue
+        if args.status == "open" and task.completed or args.status == "done" and not task.completed:
+            continue
+        status = "✅" if task.completed else "❌"
+        lines.append(f"{position}. [{status} {task.title}]{plan_text(task)}\n")
+        if len(lines) >= CLI_BATCH_SIZE:
+            sys.stdout.write("".join(lines))
+            lines = []
+    sys.stdout.write("".join(lines))
+    return 0
+
+
+def _command_import(args) -> int:
+    """Merge the tasks of another project, or titles from stdin, into a project."""
+    if not _format_fits(args.project, args.format):
+        return 2
+    source = ToDoList()
+    if args.source == "-":
+        for titles in _read_batches(sys.stdin):
+            source.add_tasks(titles)
+    elif os.path.exists(args.source):
+        source.load_from_file(args.source)
+    else:
+        print(f"File '{args.source}' not found.", file=sys.stderr)
+        return 1
+    source.file_format = args.format
+    imported = source.merge_and_save_to_file(args.project, dedupe=args.dedupe)
+    # The project is not loaded: the tasks are appended to its journal (or database)
+    print(f"{imported} task(s) imported into '{args.project}'.")
+    return 0
+
+
+def _command_export(args) -> int:
+    """Copy a project into another file, or print its titles."""
+    if not os.path.exists(args.project):
+        print(f"Project '{args.project}' not found.", file=sys.stderr)
+        return 1
+    if args.target == "-":
+        for task in _stream_tasks(args.project, _read_journal(args.project)):
+            sys.stdout.write(task.title + "\n")
+        return 0
+    count = convert_project(args.project, args.target, args.format)
+    print(f"{count} task(s) exported to '{args.target}'.")
+    return 0
+
+
+def _command_stats(args) -> int:
+    """Print the task counts, format and disk size of a project."""
+    if not os.path.exists(args.project):
+        print(f"Project '{args.project}' not found.", file=sys.stderr)
+        return 1
+    todo_list = _open_project(args.project)
+    print(f"project:  {args.project}")
+    print(f"format:   {detect_format(args.project).name}")
+    print(f"tasks:    {len(todo_list.tasks)}")
+    print(f"open:     {todo_list.active_count}")
+    print(f"done:     {todo_list.completed_count}")
+    print(f"size:     {_disk_size(args.project)} bytes")
+    todo_list.close()
+    return 0
+
+
+def _command_projects(args) -> int:
+    """Print the task counts of every project in a folder and their totals."""
+    catalog = ProjectCatalog(args.folder, workers=args.workers)
+    for info in catalog.projects():
+        print(f"{info.name}: {info.active} open, {info.completed} done")
+    totals = catalog.totals()
+    # Served from the catalog, the projects are not read a second time
+    print(f"{totals['projects']} projects: {totals['tasks']} tasks, "
+          f"{totals['active']} open, {totals['completed']} done")
+    return 0
+
+
+def _command_find(args) -> int:
+    """Print the matching tasks of every project in a folder."""
+    statuses = {"open": STATUS_ACTIVE, "done": STATUS_COMPLETED}
+    catalog = ProjectCatalog(args.folder, workers=args.workers)
+    found = catalog.search(" ".join(args.query), mode=SEARCH_SUBSTRING if args.substring else SEARCH_PREFIX,
+                           status=statuses.get(args.status))
+    for filename, matches in found.items():
+        name = os.path.splitext(filename)[0]
+        for position, task in matches:
+            status = "✅" if task.completed else "❌"
+            print(f"{name} {position}. [{status} {task.title}]")
+    print(f"{sum(len(matches) for matches in found.values())} task(s) in {len(found)} project(s).")
+    return 0
+
+
+_KEEP = object()
+    # Default of the plan options: the option was not given, the task keeps its value
+
+
+def _priority_option(text: str) -> Optional[int]:
+    """Read the --priority option: 1, 2, 3 or "none"."""
+    if text.lower() == "none":
+        return None
+    if text not in [str(priority) for priority in PRIORITIES]:
+        raise argparse.ArgumentTypeError(f"use one of {', '.join(map(str, PRIORITIES))} or none")
+    return int(text)
+
+
+def _due_option(text: str) -> Optional[date]:
+    """Read the --due option: a date (see parse_due) or "none"."""
+    if text.lower() == "none":
+        return None
+    try:
+        return parse_due(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("use YYYY-MM-DD, today, tomorrow, +N (days) or none")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the parser of the batch command line (python todo.py <command> ...).
+
+    Returns:
+        argparse.ArgumentParser: The parser, every command sets args.handler.
+    """
+    parser = argparse.ArgumentParser(
+        prog="todo.py",
+        description="Change to-do projects from scripts. Without a command the interactive menu starts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    formats = sorted(FORMATS)
+
+    add = commands.add_parser("add", help="add tasks (titles as arguments, or one per line on stdin)")
+    add.add_argument("project")
+    add.add_argument("titles", nargs="*")
+    add.add_argument("--format", choices=formats, help="format of a new project")
+    add.add_argument("--priority", type=_priority_option, help="1 (high), 2 or 3 (low)")
+    add.add_argument("--due", type=_due_option, help="due date: YYYY-MM-DD, today, tomorrow or +N days")
+    add.set_defaults(handler=_command_add)
+
+    for name, text in (("done", "mark tasks as completed"), ("rm", "delete tasks")):
+        change = commands.add_parser(name, help=f"{text} (e.g. 3-50,72, or selections on stdin)")
+        change.add_argument("project")
+        change.add_argument("selections", nargs="*", help="positions as shown by ls, like 3-50,72")
+        change.add_argument("--ids", nargs="*", metavar="ID",
+                            help="the selections are task ids, not positions (they may follow --ids)")
+        change.set_defaults(handler=_command_change)
+
+    plan = commands.add_parser("plan", help="set the priority and due date of tasks (e.g. 3-5 --priority 1)")
+    plan.add_argument("project")
+    plan.add_argument("selections", nargs="*", help="positions as shown by ls, like 3-50,72")
+    plan.add_argument("--ids", nargs="*", metavar="ID",
+                      help="the selections are task ids, not positions (they may follow --ids)")
+    plan.add_argument("--priority", type=_priority_option, default=_KEEP, help="1 (high), 2, 3 (low) or none")
+    plan.add_argument("--due", type=_due_option, default=_KEEP,
+                      help="YYYY-MM-DD, today, tomorrow, +N days or none")
+    plan.set_defaults(handler=_command_plan)
+
+    upcoming = commands.add_parser("next", help="print the overdue tasks, the ones due this week and what is next")
+    upcoming.add_argument("project")
+    upcoming.add_argument("--count", type=int, default=NEXT_TASKS, help=f"next tasks to show (default {NEXT_TASKS})")
+    upcoming.set_defaults(handler=_command_next)
+
+    ls = commands.add_parser("ls", help="print the tasks of a project")
+    ls.add_argument("project")
+    ls.add_argument("--status", choices=("all", "open", "done"), default="all")
+    ls.add_argument("--search", help="only tasks whose title contains these words")
+    ls.set_defaults(handler=_command_ls)
+
+    imports = commands.add_parser("import", help="merge the tasks of a file (or titles on stdin with -) into a project")
+    imports.add_argument("project")
+    imports.add_argument("source", help="a project file in any format, or - for one title per line on stdin")
+    imports.add_argument("--dedupe", action="store_true", help="skip titles the project already has")
+    imports.add_argument("--format", choices=formats, help="format of a new project")
+    imports.set_defaults(handler=_command_import)
+
+    export = commands.add_parser("export", help="copy a project to another file (or its titles to stdout with -)")
+    export.add_argument("project")
+    export.add_argument("target")
+    export.add_argument("--format", choices=formats, help="format of the copy (default: from the name)")
+    export.set_defaults(handler=_command_export)
+
+    stats = commands.add_parser("stats", help="show the task counts and size of a project")
+    stats.add_argument("project")
+    stats.set_defaults(handler=_command_stats)
+
+    projects = commands.add_parser("projects", help="show the task counts of all projects and their totals")
+    find = commands.add_parser("find", help="search the tasks of all projects")
+    find.add_argument("query", nargs="+")
+    find.add_argument("--status", choices=("all", "open", "done"), default="all")
+    find.add_argument("--substring", action="store_true", help="match the words anywhere, not only at the start")
+    for command in (projects, find):
+        command.add_argument("--folder", default=PROJECTS_FOLDER)
+        command.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    projects.set_defaults(handler=_command_projects)
+    find.set_defaults(handler=_command_find)
+    return parser
+
+
+def run_command(argv: List[str]) -> int:
+    """
+    Run one batch command: the project is loaded at most once and written at most once.
+
+    Args:
+        argv (List[str]): The command line without the program name.
+
+    Returns:
+        int: The exit status (0 on success).
+
+    Example:
+        python todo.py add projects/Work.json "Buy milk" "Call mom"
+        cat titles.txt | python todo.py add projects/Work.json
+        python todo.py done projects/Work.json 3-50,72
+        python todo.py ls projects/Work.json --status open
+        python todo.py plan projects/Work.json 3 --priority 1 --due 2026-11-01
+        python todo.py next projects/Work.json
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # The reader of the output (head, less) stopped early, that is not an error
+        sys.stdout = open(os.devnull, "w")
+        return 0
+
+
 def choose_file():
     """
     Shows the list of all available to-do lists.
 
     """
-    folder = "projects"
-    files = [f for f in os.listdir(folder) if f.endswith(".json")]
+    folder = PROJECTS_FOLDER
+    projects = get_catalog(folder).projects()
     # We choose and open the folder premade projects and only made a list made of .json files
+    # The catalog remembers the task counts, so unchanged projects are not read again
     
-    if not files:
+    if not projects:
         print("No to-do list files found.")
         return None
     
     print("\nAvailable To-Do Lists:")
-    for idx, filename in enumerate(files, start=1):
-        print(f"{idx}. {filename}")
+    for idx, info in enumerate(projects, start=1):
+        print(f"{idx}. {info}")
         
     try:
         choice = int(input("Choose a file by number: "))
-        if 1 <= choice <= len(files):
-            return os.path.join(folder, files[choice - 1])
+        if 1 <= choice <= len(projects):
+            return projects[choice - 1].path
         else:
             print("Invalid choice.")
             return None
@@ -247,41 +4847,59 @@ def choose_file():
 
 
 def main():
-    todo_list = ToDoList()
+    todo_list = ToDoList(journal=True, write_behind=True)
+    # Once a project is loaded, changes are journaled in the background and a burst
+    # of changes costs one small write instead of a full save
     filename = None
 
     while True:
         print("\n===== TO-DO LIST MENU =====")
+        if filename is not None and todo_list.reload_changes():
+            print("(The project was changed by another program, its changes are loaded.)")
+            # For example a task added in the GUI while this menu waited for input
+        if todo_list.tasks:
+            print(f"({todo_list.active_count} open, {todo_list.completed_count} done)")
         print("1. Add a task")
         print("2. List all tasks")
         print("3. Mark a task as completed")
         print("4. Delete a task")
         print("5. Save and Exit")
         print("6. Load tasks from a file")  
+        print("7. Search tasks")
+        print("8. Clear completed tasks")
+        print("9. Undo the last change")
+        print("10. Redo")
+        print("11. Set the priority and due date of a task")
+        print("12. Show what to do next")
 
 
-        choice = input("Enter your choice (1-6): ")
+        choice = input("Enter your choice (1-12): ")
 
         if choice == "1":
             title = input("Enter the task title: ")
             todo_list.add_task(title)
 
         elif choice == "2":
-            todo_list.list_tasks()
+            todo_list.list_tasks(page_size=PAGE_SIZE)
 
         elif choice == "3":
             try:
-                task_id = int(input("Enter the task number to mark as completed: "))
-                todo_list.mark_task_completed(task_id)
-            except ValueError:
-                print("Please enter a valid number.")
+                numbers = parse_ranges(input("Enter the task number(s) to mark as completed (e.g. 3-50,72): "),
+                                       len(todo_list.tasks))
+                ids = [todo_list.tasks[number - 1].id for number in numbers]
+                # Numbers are positions, ids stay the same while the tasks change
+                print(f"{todo_list.complete_tasks(ids)} task(s) marked as completed.")
+            except ValueError as error:
+                print(f"Please enter valid numbers ({error}).")
 
         elif choice == "4":
             try:
-                task_id = int(input("Enter the task number to delete: "))
-                todo_list.delete_task(task_id)
-            except ValueError:
-                print("Please enter a valid number.")
+                numbers = parse_ranges(input("Enter the task number(s) to delete (e.g. 3-50,72): "),
+                                       len(todo_list.tasks))
+                ids = [todo_list.tasks[number - 1].id for number in numbers]
+                print(f"{todo_list.delete_tasks(ids)} task(s) deleted.")
+            except ValueError as error:
+                print(f"Please enter valid numbers ({error}).")
 
         elif choice == "5":
             if filename is None:
@@ -310,28 +4928,102 @@ def main():
                     if not new_name.endswith(".json"):
                         new_name += ".json"
                     new_path = os.path.join("projects", new_name)
+                    file_format = input("Store it as 1. JSON  2. compact binary  3. indexed binary "
+                                        "(for huge projects)  4. SQLite database [1]: ").strip()
+                    # Binary files are smaller and load faster, JSON files can be read and edited by hand.
+                    # Indexed files can be opened without loading them (see ToDoList.load_mapped).
+                    # A database is changed row by row and can be used by the CLI and the GUI at once.
+                    formats = {"2": FORMAT_BINARY, "3": FORMAT_INDEXED, "4": FORMAT_SQLITE}
+                    todo_list.file_format = formats.get(file_format)
+                    if todo_list.file_format == FORMAT_SQLITE:
+                        new_path = os.path.splitext(new_path)[0] + SQLITE_SUFFIX
                     todo_list.save_to_file(new_path)
                     print(f"Tasks saved as new project '{new_path}' successfully! Goodbye 👋")
                     break
             else:
-                # filename is already set by 6 choice
-                todo_list.save_to_file(filename)
+                # filename is already set by 6 choice, the changes only need to be written out
+                todo_list.close()
                 print(f"Tasks saved to '{filename}' successfully! Goodbye 👋")
                 break
             
         
         elif choice == "6":
             selected_file = choose_file()
-            if selected_file:
-                todo_list.load_from_file(selected_file)
-                print(f"Tasks loaded from '{selected_file}' successfully!")
+            if selected_file and detect_format(selected_file).name == FORMAT_INDEXED:
+                todo_list.load_mapped(selected_file)
+                # Nothing is read yet, tasks are read from the file when they are shown
+                print(f"{len(todo_list.tasks)} tasks opened from '{selected_file}' successfully!")
+                filename = selected_file
+            elif selected_file:
+                for page_number, page in enumerate(todo_list.load_pages(selected_file)):
+                    if page_number == 0:
+                        # Show the first screen right away, the rest of the file is still being read
+                        for idx, task in enumerate(page, start=1):
+                            print(f"{idx}. {task}")
+                print(f"{len(todo_list.tasks)} tasks loaded from '{selected_file}' successfully!")
                 filename = selected_file
             else:
                 print("No file selected. Returning to menu.")
 
+        elif choice == "7":
+            query = input("Search for (add * to a word to match it anywhere, e.g. *ject): ").strip()
+            status = input("Show which tasks? (a = all, o = open, d = done): ").strip().lower()
+            mode = SEARCH_PREFIX
+            if "*" in query:
+                mode = SEARCH_SUBSTRING
+                query = query.replace("*", "")
+            statuses = {"o": STATUS_ACTIVE, "d": STATUS_COMPLETED}
+            found = todo_list.search(query, mode=mode, status=statuses.get(status))
+            if not found:
+                print("No matching tasks found.")
+            else:
+                wanted = {task.id for task in found}
+                for idx, task in enumerate(todo_list.tasks, start=1):
+                    # The position is what options 3 and 4 ask for, so it is printed too
+                    if task.id in wanted:
+                        print(f"{idx}. {task}")
+
+        elif choice == "8":
+            print(f"{todo_list.clear_completed()} completed task(s) deleted.")
+
+        elif choice == "9":
+            # Undo is journaled like any other change, the project file follows it
+            print("Last change undone." if todo_list.undo() else "Nothing to undo.")
+
+        elif choice == "10":
+            print("Change redone." if todo_list.redo() else "Nothing to redo.")
+
+        elif choice == "11":
+            try:
+                number = int(input("Enter the task number: "))
+                if not 1 <= number <= len(todo_list.tasks):
+                    raise ValueError(f"there is no task {number}")
+                priority = input("Priority 1 (high), 2 or 3 (low), empty for none: ").strip()
+                priority = int(priority) if priority else None
+                due = parse_due(input("Due date (YYYY-MM-DD, today, tomorrow or +N days), empty for none: "))
+                todo_list.plan_task(todo_list.tasks[number - 1].id, priority, due)
+                print(f"{number}. {todo_list.tasks[number - 1]}")
+            except ValueError as error:
+                print(f"Please enter valid values ({error}).")
+
+        elif choice == "12":
+            # Answered from the sorted schedule index, the list is not sorted for this
+            for heading, tasks in (("Overdue", todo_list.overdue_tasks()),
+                                   ("Due this week", todo_list.due_this_week()),
+                                   ("Next", todo_list.next_tasks())):
+                print(f"{heading}:")
+                for task in tasks:
+                    print(f"  {todo_list.position_of(task.id)}. {task}")
+                    # The position is what options 3, 4 and 11 ask for
+                if not tasks:
+                    print("  (none)")
+
         else:
-            print("Invalid choice. Please enter a number between 1 and 6.")
+            print("Invalid choice. Please enter a number between 1 and 12.")
             
 
 if __name__ == "__main__":
+    arguments = configure_instrumentation()
+    if arguments:
+        sys.exit(run_command(arguments))
     main()
\ No newline at end of file